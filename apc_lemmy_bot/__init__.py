@@ -14,7 +14,7 @@
 #    along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """apc_lemmy_bot __init__ module."""
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 __app__: str = "apc_lemmy_bot"
 __version__: str = "0.7.0"
@@ -40,6 +40,38 @@ class ApcLemmyBotLemmyConf:
     user: str = "roig"
     password: str = ""  # Not initialized
     community: str = "workingclasscalendar@lemmy.world"
+    token_cache: str = ""  # Path of the JWT cache file, "" to disable it
+    community_ttl: int = 604800  # seconds
+    # Other (instance, community) where the events are also posted:
+    targets: list[tuple[str, str]] = field(default_factory=list)
+    max_concurrency: int = 2  # concurrent posts per instance
+    rate: float = 1.0  # requests per second to an instance
+    burst: int = 5  # requests allowed at once
+    # Other (instance, rate, burst) for some instances:
+    rate_limits: list[tuple[str, float, int]] = field(default_factory=list)
+    rate_limit_file: str = ""  # Shared state, "" for the user state dir
+    # (instance, profile) escaping profiles of the posts, instance "*" for
+    # all of them (see apc_lemmy_bot.event.ESCAPE_PROFILES):
+    escape_profiles: list[tuple[str, str]] = field(default_factory=list)
+
+
+@dataclass
+class ApcLemmyBotImageConf:
+    """A data class for the image optimization configuration."""
+
+    optimize: bool = False
+    max_dimension: int = 1600  # pixels
+    format: str = "webp"  # webp or jpeg
+    quality: int = 85
+
+
+@dataclass
+class ApcLemmyBotHttpConf:
+    """A data class for the shared HTTP transport configuration."""
+
+    timeout: float = 10.0  # seconds
+    pool_connections: int = 10  # hosts with pooled connections
+    pool_maxsize: int = 10  # connections kept alive per host
 
 
 @dataclass
@@ -50,6 +82,8 @@ class ApcLemmyBotConf:
     lemmy: ApcLemmyBotLemmyConf
     database: str = "sqlite:///apc_database.db"
     delay: int = 5400  # seconds
+    image: ApcLemmyBotImageConf = field(default_factory=ApcLemmyBotImageConf)
+    http: ApcLemmyBotHttpConf = field(default_factory=ApcLemmyBotHttpConf)
 
 
 # The configuration and shared data structure:
@@ -17,7 +17,7 @@
 
 import typer
 
-__all__ = ["app", "db", "post", "show"]
+__all__ = ["app", "db", "post", "serve", "show", "snapshot"]
 
 app = typer.Typer(
     context_settings={"help_option_names": ["--help", "-h"]},
@@ -19,19 +19,23 @@ from typing import Any
 
 import typer
 
-from . import app, common, db, post, show
+from apc_lemmy_bot import transport
 
-# db, post and show required to build the typer.context
+from . import app, common, db, post, serve, show, snapshot
+
+# db, post, serve, show and snapshot required to build the typer.context
 _: Any
 _ = db
 _ = post
+_ = serve
 _ = show
+_ = snapshot
 
 
 @app.callback()
 def main(
     ctx: typer.Context,
-    version: common.opt_version = common.val_version,
+    version: common.opt_version = common.val_version,  # noqa: ARG001
 ) -> None:
     """
     Post supabase events to a Lemmy instance or show them.
@@ -39,6 +43,10 @@ def main(
     You can show additional command help information running, by example,
     'apc_lemmy_bot post --help'
     """
+    # The requests of pythorhead use the shared keep-alive HTTP session while
+    # the command runs:
+    transport.use_in_pythorhead()
+    ctx.call_on_close(transport.restore_pythorhead)
 
 
 def run() -> None:
@@ -16,12 +16,21 @@
 """apc_lemmy_bot cli.callbacks module."""
 
 import datetime
+from pathlib import Path
 from urllib.parse import urlparse
 
 import typer
 from pythorhead.types import LanguageType
 
 from apc_lemmy_bot import __app__, __version__
+from apc_lemmy_bot.image import IMAGE_FORMATS
+from apc_lemmy_bot.lemmy import (
+    LemmyTarget,
+    parse_escape_profile,
+    parse_rate_limit,
+)
+from apc_lemmy_bot.snapshot import SNAPSHOT_FORMATS
+from apc_lemmy_bot.source import SOURCES
 
 
 def date(input_date: str) -> str:
@@ -69,11 +78,14 @@ def from_(value: str) -> str:
     """
     Validate the FROM argument.
 
+    .. versionchanged:: 0.8.0
+       It can be a directory of JSON or JSON Lines files.
+
     Parameters
     ----------
     value : str
-        the source of the events. Right values are: **SUPABASE** and
-        **DATABASE**.
+        the source of the events. Right values are: **SUPABASE**,
+        **DATABASE** and a directory.
 
     Raises
     ------
@@ -83,15 +95,45 @@ def from_(value: str) -> str:
     Returns
     -------
     str
-        The FROM argument in upper case.
+        The FROM argument in upper case, or the directory.
 
     """
-    if (val := value.upper()) in {"SUPABASE", "DATABASE"}:
+    if (val := value.upper()) in SOURCES:
         return val
-    msg = f"It should be 'SUPABASE' or 'DATABASE', not '{value}'"
+    if Path(value).is_dir():
+        return value
+    msg = f"It should be 'SUPABASE', 'DATABASE' or a directory, not '{value}'"
     raise typer.BadParameter(msg)
 
 
+def img_format(value: str) -> str:
+    """
+    Validate the --img-format option.
+
+    It should be 'webp' or 'jpeg'.
+
+    Parameters
+    ----------
+    value : str
+        the image format option.
+
+    Raises
+    ------
+    typer.BadParameter
+        When we cannot validate the option.
+
+    Returns
+    -------
+    str
+        the image format in lower case.
+
+    """
+    if (val := value.lower()) not in IMAGE_FORMATS:
+        msg = f"It should be 'webp' or 'jpeg', not '{value}'"
+        raise typer.BadParameter(msg)
+    return val
+
+
 def langcode(value: str | None) -> str | None:
     """
     Validate the --langcode option.
@@ -126,11 +168,149 @@ def langcode(value: str | None) -> str | None:
     raise typer.BadParameter(msg)
 
 
+def lemmy_targets(ctx: typer.Context, values: list[str]) -> list[str]:
+    """
+    Validate the --lm-target options.
+
+    They should have format INSTANCE,COMMUNITY.
+
+    Parameters
+    ----------
+    ctx : typer.Context
+        The context of the command.
+    values : list[str]
+        The targets.
+
+    Raises
+    ------
+    typer.BadParameter
+        When we cannot validate a target.
+
+    Returns
+    -------
+    list[str]
+        The targets.
+
+    """
+    for value in values:
+        try:
+            target = LemmyTarget.from_str(value)
+        except ValueError as err:
+            msg = f"{err}"
+            raise typer.BadParameter(msg) from err
+        url(ctx, target.instance)
+    return values
+
+
+def lemmy_rate_limits(ctx: typer.Context, values: list[str]) -> list[str]:
+    """
+    Validate the --lm-rate-limit options.
+
+    They should have format INSTANCE,RATE,BURST, where INSTANCE can be '*'.
+
+    Parameters
+    ----------
+    ctx : typer.Context
+        The context of the command.
+    values : list[str]
+        The rate limits.
+
+    Raises
+    ------
+    typer.BadParameter
+        When we cannot validate a rate limit.
+
+    Returns
+    -------
+    list[str]
+        The rate limits.
+
+    """
+    for value in values:
+        try:
+            instance, _, _ = parse_rate_limit(value)
+        except ValueError as err:
+            msg = f"{err}"
+            raise typer.BadParameter(msg) from err
+        if instance != "*":
+            url(ctx, instance)
+    return values
+
+
+def lemmy_escape_profiles(ctx: typer.Context, values: list[str]) -> list[str]:
+    """
+    Validate the --lm-escape-profile options.
+
+    They should have format INSTANCE,PROFILE, where INSTANCE can be '*'.
+
+    Parameters
+    ----------
+    ctx : typer.Context
+        The context of the command.
+    values : list[str]
+        The escaping profiles.
+
+    Raises
+    ------
+    typer.BadParameter
+        When we cannot validate an escaping profile.
+
+    Returns
+    -------
+    list[str]
+        The escaping profiles.
+
+    """
+    for value in values:
+        try:
+            instance, _ = parse_escape_profile(value)
+        except ValueError as err:
+            msg = f"{err}"
+            raise typer.BadParameter(msg) from err
+        if instance != "*":
+            url(ctx, instance)
+    return values
+
+
+def month_day(value: str) -> str:
+    """
+    Validate the --since and --until options.
+
+    It should have format MM-DD, or be empty.
+
+    .. versionadded:: 0.8.0
+
+    Parameters
+    ----------
+    value : str
+        The day of the calendar to validate.
+
+    Raises
+    ------
+    typer.BadParameter
+        When it's not a valid day of the calendar.
+
+    Returns
+    -------
+    str
+        The day of the calendar, with format MM-DD.
+
+    """
+    if not value:
+        return value
+    try:
+        # A leap year, so the 02-29 is valid:
+        return datetime.date.fromisoformat(f"2000-{value}").strftime("%m-%d")
+    except ValueError as err:
+        msg = f"It should be MM-DD, not '{value}'"
+        raise typer.BadParameter(msg) from err
+
+
 def output_format(value: str) -> str:
     """
     Validate the --format option.
 
-    It should be 'json', 'txt' or 'none'.
+    It should be 'json', 'jsonl', 'txt' or 'none'.
 
     Parameters
     ----------
@@ -148,7 +328,37 @@ def output_format(value: str) -> str:
         the output format in lower case.
 
     """
-    if value.lower() not in {"json", "txt", "none"}:
+    if value.lower() not in {"json", "jsonl", "txt", "none"}:
+        msg = f"Not recognized '{value}'"
+        raise typer.BadParameter(msg)
+    return value.lower()
+
+
+def snapshot_format(value: str) -> str:
+    """
+    Validate the --format option of the snapshots.
+
+    It should be 'jsonl' or 'csv'.
+
+    .. versionadded:: 0.8.0
+
+    Parameters
+    ----------
+    value : str
+        the format option.
+
+    Raises
+    ------
+    typer.BadParameter
+        When we cannot validate the option.
+
+    Returns
+    -------
+    str
+        the snapshot format in lower case.
+
+    """
+    if value.lower() not in SNAPSHOT_FORMATS:
         msg = f"Not recognized '{value}'"
         raise typer.BadParameter(msg)
     return value.lower()
@@ -176,13 +386,11 @@ def supabase_key(ctx: typer.Context, value: str) -> str:
         The SUPABASE key.
 
     """
-    # In the db option not originated from SUPABASE the SUPABASE parameters are
-    # optional:
+    # In the commands with events not originated from SUPABASE the SUPABASE
+    # parameters are optional:
     if (
-        ctx.info_name == "db"  # pylint: disable=R2004  # magic-value-comparison
         # pylint: disable=R2004  # magic-value-comparison
-        and ctx.params["from_"] != "SUPABASE"
-        and not value
+        ctx.params.get("from_", "SUPABASE") != "SUPABASE" and not value
     ):
         return value
 
@@ -192,6 +400,37 @@ def supabase_key(ctx: typer.Context, value: str) -> str:
     return value
 
 
+def times(values: list[str]) -> list[str]:
+    """
+    Validate the --at options.
+
+    They should have format HH:MM.
+
+    Parameters
+    ----------
+    values : list[str]
+        The times.
+
+    Raises
+    ------
+    typer.BadParameter
+        When we cannot validate a time.
+
+    Returns
+    -------
+    list[str]
+        The times.
+
+    """
+    for value in values:
+        try:
+            datetime.datetime.strptime(value, "%H:%M")  # noqa: DTZ007
+        except ValueError as err:
+            msg = f"It should be 'HH:MM', not '{value}'"
+            raise typer.BadParameter(msg) from err
+    return values
+
+
 def to_(value: str) -> str:
     """
     Validate the TO argument.
@@ -267,13 +506,11 @@ def url(ctx: typer.Context, input_url: str) -> str:
         The url.
 
     """
-    # In the db option not originated from SUPABASE the SUPABASE parameters are
-    # optional:
+    # In the commands with events not originated from SUPABASE the SUPABASE
+    # parameters are optional:
     if (
-        ctx.info_name == "db"  # pylint: disable=R2004  # magic-value-comparison
         # pylint: disable=R2004  # magic-value-comparison
-        and ctx.params["from_"] != "SUPABASE"
-        and not input_url
+        ctx.params.get("from_", "SUPABASE") != "SUPABASE" and not input_url
     ):
         return input_url
 
@@ -22,6 +22,7 @@ from typing import Annotated
 import typer
 
 from apc_lemmy_bot import apc_lb_conf
+from apc_lemmy_bot.event import ESCAPE_PROFILES
 
 from . import callbacks
 
@@ -39,6 +40,22 @@ arg_date = Annotated[
     ),
 ]
 
+val_from: str = "SUPABASE"
+opt_from = Annotated[
+    str,
+    typer.Option(
+        "--from",
+        help=(
+            "Where we get the events: SUPABASE, DATABASE (the local "
+            "database) or a directory of JSON or JSON Lines files"
+        ),
+        callback=callbacks.from_,
+        show_default=True,
+        # Before the SUPABASE options, that are optional with other sources:
+        is_eager=True,
+    ),
+]
+
 _val_supabase_url: str | None = (
     os.environ.get("APC_SUPABASE_URL")
     if os.environ.get("APC_SUPABASE_URL") is not None
@@ -134,6 +151,17 @@ val_local_database: str = (
     _val_local_database if _val_local_database is not None else ""
 )
 del _val_local_database
+opt_local_database = Annotated[
+    str,
+    typer.Option(
+        "--database",
+        help=(
+            "Local database url (Note: use a extra '/' if you want "
+            "to use an absolute path)"
+        ),
+        envvar="APC_LOCAL_DATABASE",
+    ),
+]
 
 _val_lemmy_user: str | None = (
     os.environ.get("APC_LEMMY_USER")
@@ -173,6 +201,117 @@ val_lemmy_instance: str = (
 )
 del _val_lemmy_instance
 
+_val_lemmy_token_cache: str | None = (
+    os.environ.get("APC_LEMMY_TOKEN_CACHE")
+    if os.environ.get("APC_LEMMY_TOKEN_CACHE") is not None
+    else apc_lb_conf.lemmy.token_cache
+)
+val_lemmy_token_cache: str = (
+    _val_lemmy_token_cache if _val_lemmy_token_cache is not None else ""
+)
+del _val_lemmy_token_cache
+opt_lemmy_token_cache = Annotated[
+    str,
+    typer.Option(
+        "--lm-token-cache",
+        rich_help_panel="Lemmy",
+        help="File where the login tokens are cached between runs",
+        envvar="APC_LEMMY_TOKEN_CACHE",
+    ),
+]
+
+val_lemmy_targets: list[str] = [
+    f"{instance},{community}"
+    for instance, community in apc_lb_conf.lemmy.targets
+]
+opt_lemmy_targets = Annotated[
+    list[str],
+    typer.Option(
+        "--lm-target",
+        rich_help_panel="Lemmy",
+        help=(
+            "Other INSTANCE,COMMUNITY where the events are also posted. It can "
+            "be repeated"
+        ),
+        callback=callbacks.lemmy_targets,
+        envvar="APC_LEMMY_TARGETS",
+    ),
+]
+
+val_lemmy_max_concurrency: int = apc_lb_conf.lemmy.max_concurrency
+opt_lemmy_max_concurrency = Annotated[
+    int,
+    typer.Option(
+        "--lm-max-concurrency",
+        rich_help_panel="Lemmy",
+        help="Maximum concurrent posts per lemmy instance",
+        min=1,
+        envvar="APC_LEMMY_MAX_CONCURRENCY",
+    ),
+]
+
+val_lemmy_rate_limits: list[str] = [
+    f"*,{apc_lb_conf.lemmy.rate},{apc_lb_conf.lemmy.burst}",
+    *(
+        f"{instance},{rate},{burst}"
+        for instance, rate, burst in apc_lb_conf.lemmy.rate_limits
+    ),
+]
+opt_lemmy_rate_limits = Annotated[
+    list[str],
+    typer.Option(
+        "--lm-rate-limit",
+        rich_help_panel="Lemmy",
+        help=(
+            "INSTANCE,RATE,BURST requests per second and at once to an "
+            "instance, '*' for all of them. It can be repeated"
+        ),
+        callback=callbacks.lemmy_rate_limits,
+        envvar="APC_LEMMY_RATE_LIMITS",
+    ),
+]
+
+val_lemmy_escape_profiles: list[str] = [
+    f"{instance},{profile}"
+    for instance, profile in apc_lb_conf.lemmy.escape_profiles
+]
+opt_lemmy_escape_profiles = Annotated[
+    list[str],
+    typer.Option(
+        "--lm-escape-profile",
+        rich_help_panel="Lemmy",
+        help=(
+            "INSTANCE,PROFILE escaping of the markdown of the descriptions "
+            f"({', '.join(ESCAPE_PROFILES)}) in an instance, '*' for all of "
+            "them. It can be repeated"
+        ),
+        callback=callbacks.lemmy_escape_profiles,
+        envvar="APC_LEMMY_ESCAPE_PROFILES",
+    ),
+]
+
+_val_lemmy_rate_limit_file: str | None = os.environ.get(
+    "APC_LEMMY_RATE_LIMIT_FILE",
+)
+val_lemmy_rate_limit_file: str = (
+    _val_lemmy_rate_limit_file
+    if _val_lemmy_rate_limit_file is not None
+    else apc_lb_conf.lemmy.rate_limit_file
+)
+del _val_lemmy_rate_limit_file
+opt_lemmy_rate_limit_file = Annotated[
+    str,
+    typer.Option(
+        "--lm-rate-limit-file",
+        rich_help_panel="Lemmy",
+        help=(
+            "File shared by the bot processes to limit the requests, by "
+            "default in the state directory of the user"
+        ),
+        envvar="APC_LEMMY_RATE_LIMIT_FILE",
+    ),
+]
+
 _val_langcode: str | None = os.environ.get("APC_LANGCODE")
 val_langcode: str = _val_langcode if _val_langcode else ""
 del _val_langcode
@@ -16,37 +16,146 @@
 """apc_lemmy_bot.cli db module."""
 
 import datetime
-import tempfile
-from pathlib import Path
-from typing import Annotated, Any
+from pathlib import PurePath
+from typing import Annotated
 
 import typer
 
 import apc_lemmy_bot.database
 from apc_lemmy_bot import apc_lb_conf
-from apc_lemmy_bot.event import Event, get_dated_events
+from apc_lemmy_bot.event import Event
+from apc_lemmy_bot.image import (
+    IMAGE_FORMATS,
+    ImageError,
+    optimization_available,
+)
 from apc_lemmy_bot.lemmy import (
     LemmyError,
-    create_event_post,
-    login,
-    upload_img,
+    LemmySession,
+    LemmyTarget,
+    TargetResult,
+    community_cache,
+    create_event_posts,
+    find_event_post,
+    get_session,
+    image_exists,
+    parse_escape_profile,
+    parse_rate_limit,
+    upload_img_urls,
 )
 from apc_lemmy_bot.resilient_uuid import UUID
+from apc_lemmy_bot.source import SourceError, get_source
 
 from . import app, callbacks, common
 
 
+def _image_to_upload(
+    event: Event,
+    database_obj: apc_lemmy_bot.database.Database,
+) -> tuple[bytes, str] | None:
+    """
+    Return the image stored in the database that must be uploaded to Lemmy.
+
+    The images without a public URL are uploaded to the instances, optimized
+    if it's enabled.
+
+    Returns
+    -------
+    Optional[tuple[bytes, str]]
+        The image and its file name, or None if it's not uploaded.
+
+    """
+    view = database_obj.get_view_by_id(UUID(event.id))
+    if not (
+        view is not None
+        and "extended" in view.__dict__
+        and "images" in view.__dict__
+        and event.imgSrc is not None
+        and (view.extended.img_url is None or not view.extended.img_url)
+        and view.images[0]
+        and view.images[0].img
+    ):
+        return None
+
+    name: str = event.imgSrc.replace("/", "_").replace("\\", "_")
+    img: bytes = apc_lemmy_bot.database.large_binary_to_bytes(
+        view.images[0].img,
+    )
+    if apc_lb_conf.image.optimize:
+        try:
+            img = database_obj.get_optimized_image(view.images[0])
+            # The format changes, so does the extension:
+            name = str(
+                PurePath(name).with_suffix(
+                    IMAGE_FORMATS[apc_lb_conf.image.format],
+                ),
+            )
+        except ImageError as err:
+            print(f"\nImageError: {err}. Uploading the original image")
+    return img, name
+
+
+def _upload_image(
+    event: Event,
+    image: tuple[bytes, str],
+    lemmy_session: LemmySession,
+    database_obj: apc_lemmy_bot.database.Database,
+) -> str | None:
+    """
+    Upload the image of an event to a Lemmy instance, only once.
+
+    Returns
+    -------
+    Optional[str]
+        The URL of the image in the instance, or None if it cannot be
+        uploaded.
+
+    """
+    # It was uploaded before ?
+    uploaded = database_obj.get_uploaded_image(
+        UUID(event.id),
+        lemmy_session.instance,
+    )
+    if uploaded is not None and image_exists(uploaded.image_url):
+        return uploaded.image_url
+
+    img, name = image
+    try:
+        img_url, delete_url = lemmy_session.call(
+            upload_img_urls,
+            image=memoryview(img),
+            name=name,
+        )
+    except LemmyError as err:
+        print(f"\nLemmyError: uploading to {lemmy_session.instance}: {err}")
+        return None
+    database_obj.update_uploaded_image(
+        UUID(event.id),
+        lemmy_session.instance,
+        img_url,
+        delete_url,
+    )
+    return img_url
+
+
 def _create_event_post(
     event: Event,
     silence: bool,
-    lemmy_instance: str,
+    lemmy_targets: list[LemmyTarget],
     lemmy_user: str,
     lemmy_password: str,
-    lemmy_community: str,
     database_obj: apc_lemmy_bot.database.Database,
-) -> dict[Any, Any] | None:
+) -> list[TargetResult]:
     """
-    Create a post in a lemmy instance.
+    Create the posts of an event in the lemmy communities.
+
+    .. versionchanged:: 0.8.0
+       It posts the event to several communities and instances.
+
+    The image of the event is uploaded once to each instance, so the posts
+    of an instance don't depend on the others. If it cannot be uploaded to
+    an instance, its posts link the original image. The posts of an
+    instance where we cannot login fail.
 
     Parameters
     ----------
@@ -54,109 +163,236 @@ def _create_event_post(
         The event to be posted.
     silence : bool
         Don't show information.
-    lemmy_instance : str
-        The lemmy instance to connect (e.g.: `https:enterprise.lemmy.ml`).
+    lemmy_targets : list[LemmyTarget]
+        The communities where it will be posted.
     lemmy_user : str
         The lemmy user.
     lemmy_password : str
         The lemmy user password.
-    lemmy_community : str
-        The community where it will be posted.
     database_obj : apc_lemmy_bot.database.Database
         The database object where the events are stored
 
-
-    Raises
-    ------
-    typer.Exit
-        If the Event cannot be posted.
-
     Returns
     -------
-    Optional[dict]
-        post data if successful.
+    list[TargetResult]
+        The result of each post.
 
     """
-    if not silence:
-        print(
-            f"Logging to lemmy instance {apc_lb_conf.lemmy.instance}",
-            end=" ... ",
-        )
-    try:
-        lemmy = login(lemmy_instance, lemmy_user, lemmy_password)
-    except LemmyError as err:
-        print(f"\nLemmyError: {err}")
-        raise typer.Exit(1) from err
+    image = _image_to_upload(event, database_obj)
+    image_urls: dict[str, str] = {}
+    for instance in dict.fromkeys(target.instance for target in lemmy_targets):
+        lemmy_session = get_session(instance, lemmy_user, lemmy_password)
+        if not silence:
+            print(
+                f"Logging to lemmy instance {lemmy_session.instance}",
+                end=" ... ",
+            )
+        try:
+            lemmy_session.login()
+        except LemmyError as err:
+            # Its posts will fail, and they will be retried:
+            print(f"\nLemmyError: {err}")
+            continue
+        if not silence:
+            print("Logued.")
 
-    if not silence:
-        print("Logued.")
+        if image is not None:
+            if not silence:
+                print("Uploading image", end=" ... ")
+            img_url = _upload_image(event, image, lemmy_session, database_obj)
+            if img_url is not None:
+                image_urls[instance] = img_url
 
     if not silence:
         print(f"Posting {event.id}: {event.slugTitle}", end=" ... ")
 
-    # We check if we must upload the image to the lemmy instance
-    view = database_obj.get_view_by_id(UUID(event.id))
-    if (
-        view is not None
-        and "extended" in view.__dict__
-        and "images" in view.__dict__
-        and "imgSrc" in event.__dict__
-        and event.imgSrc is not None
-        and (view.extended.img_url is None or not view.extended.img_url)
-        and view.images[0]
-        and view.images[0].img
-    ):
-        # We upload the image from the database to the instance and we
-        # update the url of the image in the event.
-        if not silence:
-            print("Uploading image", end=" ... ")
+    results = create_event_posts(
+        event,
+        lemmy_targets,
+        lemmy_user,
+        lemmy_password,
+        langcode=event.langcode,
+        image_urls=image_urls,
+    )
 
-        _suffix: str = (
-            event.imgSrc.replace("/", "_").replace("\\", "_")
-            if event.imgSrc is not None
-            else ""
-        )
-        with tempfile.NamedTemporaryFile(
-            suffix=_suffix,
-            delete=False,
-        ) as tmp_file:
-            tmp_file.write(
-                apc_lemmy_bot.database.large_binary_to_bytes(
-                    view.images[0].img,
-                ),
+    for result in results:
+        if result.error is not None:
+            print(
+                f"\nLemmyError: {result.target.community} in "
+                f"{result.target.instance}: {result.error}",
             )
-        tmp_file.close()
-        img_url = ""
-        try:
-            img_url = upload_img(lemmy, tmp_file.name)
-        except LemmyError as err:
-            Path(tmp_file.name).unlink()  # the temp file should be removed
-            print(f"\nLemmyError: {err}")
-            raise typer.Exit(1) from err
+        elif not silence:
+            print(f"Posted: {result.url}")
 
-        Path(tmp_file.name).unlink()  # the temp file should be removed
+    return results
 
-        event.base_event_img_url = ""
-        event.imgSrc = img_url
 
-    try:
-        ret = create_event_post(
-            event,
-            lemmy,
-            lemmy_community,
-            langcode=event.langcode,
+def _enqueue_random_event(
+    database_obj: apc_lemmy_bot.database.Database,
+    date_dt: datetime.datetime,
+    lemmy_targets: list[LemmyTarget],
+    silence: bool,
+) -> None:
+    """
+    Enqueue the posts of a random event of a date in the outbox.
+
+    .. versionadded:: 0.8.0
+
+    No event is selected while there are unfinished posts of the date in the
+    outbox: they are resumed instead. The unfinished posts of other dates
+    don't stop the selection.
+    """
+    if any(
+        job.date == date_dt.date()
+        for state in (
+            apc_lemmy_bot.database.OUTBOX_PENDING,
+            apc_lemmy_bot.database.OUTBOX_IN_FLIGHT,
         )
-    except LemmyError as err:
-        print(f"\nLemmyError: {err}")
-        raise typer.Exit(1) from err
+        for job in database_obj.get_outbox(state)
+    ):
+        if not silence:
+            print("Resuming the unfinished posts.")
+        return
 
+    views = database_obj.get_views_by_month_day(date_dt.month, date_dt.day)
     if not silence:
-        if ret:
-            print(f"Posted: {ret['post_view']['post']['ap_id']}")
+        print(f"{0 if not views else len(views)} found in the database.")
+    random_event = (
+        database_obj.get_random_dated_event(views, date_dt) if views else None
+    )
+    if not random_event:
+        print("There are not events for today or all has been posted.")
+        return
+
+    for target in lemmy_targets:
+        database_obj.enqueue_post(
+            UUID(random_event.id),
+            target.instance,
+            target.community,
+            date_dt.date(),
+        )
+
+
+OUTBOX_MAX_ATTEMPTS: int = 5
+OUTBOX_STALE: datetime.timedelta = datetime.timedelta(minutes=15)
+
+
+def _recover_outbox(
+    database_obj: apc_lemmy_bot.database.Database,
+    silence: bool,
+    lemmy_user: str,
+    lemmy_password: str,
+) -> None:
+    """
+    Recover the posts of the outbox interrupted while they were in flight.
+
+    If the post was created in the community it is marked as done, if not it
+    is returned to pending. The recent ones can be still in flight in other
+    process and they are not recovered.
+    """
+    for job in database_obj.get_outbox(
+        apc_lemmy_bot.database.OUTBOX_IN_FLIGHT,
+        before=datetime.datetime.now(tz=datetime.UTC) - OUTBOX_STALE,
+    ):
+        event = database_obj.get_event_by_id(job.event_id_uuid)
+        if event is None:
+            database_obj.release_outbox(job, "Event not found", failed=True)
+            continue
+        try:
+            post = get_session(job.instance, lemmy_user, lemmy_password).call(
+                find_event_post,
+                event=event,
+                community=job.community,
+            )
+        except Exception as err:  # noqa: BLE001
+            # We cannot know if it was posted, we will try it later:
+            print(f"LemmyError: recovering {job.event_id_uuid}: {err}")
+            continue
+        if post is not None:
+            database_obj.complete_outbox(
+                job,
+                TargetResult(
+                    LemmyTarget(job.instance, job.community), post
+                ).url,
+            )
         else:
-            print("Posted.")
+            database_obj.release_outbox(job, "Interrupted")
+        if not silence:
+            print(
+                f"Recovered {job.event_id_uuid} in {job.community}: "
+                f"{'posted' if post is not None else 'pending'}.",
+            )
+
+
+def _drain_outbox(
+    database_obj: apc_lemmy_bot.database.Database,
+    silence: bool,
+    lemmy_user: str,
+    lemmy_password: str,
+) -> bool:
+    """
+    Post the pending posts of the outbox.
 
-    return ret
+    .. versionadded:: 0.8.0
+
+    The interrupted posts are recovered first. Each post is claimed before
+    posting it and it's marked as done, with the event as posted, in the same
+    transaction, so a post is not posted twice. The failed posts remain
+    pending until they fail `OUTBOX_MAX_ATTEMPTS` times.
+
+    Parameters
+    ----------
+    database_obj : apc_lemmy_bot.database.Database
+        The database object with the outbox.
+    silence : bool
+        Don't show information.
+    lemmy_user : str
+        The lemmy user.
+    lemmy_password : str
+        The lemmy user password.
+
+    Returns
+    -------
+    bool
+        False if any post failed.
+
+    """
+    _recover_outbox(database_obj, silence, lemmy_user, lemmy_password)
+
+    # The posts of the same event are posted together:
+    jobs_by_event: dict[str, list[apc_lemmy_bot.database.Outbox]] = {}
+    for job in database_obj.claim_outbox():
+        jobs_by_event.setdefault(str(job.event_id_uuid), []).append(job)
+
+    success = True
+    for event_id, jobs in jobs_by_event.items():
+        event = database_obj.get_event_by_id(UUID(event_id))
+        if event is None:
+            for job in jobs:
+                database_obj.release_outbox(
+                    job, "Event not found", failed=True
+                )
+            success = False
+            continue
+        results = _create_event_post(
+            event,
+            silence,
+            [LemmyTarget(job.instance, job.community) for job in jobs],
+            lemmy_user,
+            lemmy_password,
+            database_obj,
+        )
+        for job, result in zip(jobs, results, strict=True):
+            if result.error is None:
+                database_obj.complete_outbox(job, result.url)
+            else:
+                success = False
+                database_obj.release_outbox(
+                    job,
+                    str(result.error),
+                    failed=job.attempts + 1 >= OUTBOX_MAX_ATTEMPTS,
+                )
+    return success
 
 
 @app.command()
@@ -166,7 +402,10 @@ def db(
         typer.Argument(
             callback=callbacks.from_,
             metavar="FROM",
-            help="Where we get the events ['SUPABASE'|'DATABASE']",
+            help=(
+                "Where we get the events ['SUPABASE'|'DATABASE'|a directory "
+                "of JSON or JSON Lines files]"
+            ),
         ),
     ],
     to_: Annotated[
@@ -233,12 +472,57 @@ def db(
             envvar="APC_LEMMY_INSTANCE",
         ),
     ] = common.val_lemmy_instance,
+    lemmy_targets: common.opt_lemmy_targets = common.val_lemmy_targets,
+    lemmy_max_concurrency: common.opt_lemmy_max_concurrency = (
+        common.val_lemmy_max_concurrency
+    ),
+    lemmy_token_cache: common.opt_lemmy_token_cache = (
+        common.val_lemmy_token_cache
+    ),
+    lemmy_rate_limits: common.opt_lemmy_rate_limits = (
+        common.val_lemmy_rate_limits
+    ),
+    lemmy_rate_limit_file: common.opt_lemmy_rate_limit_file = (
+        common.val_lemmy_rate_limit_file
+    ),
+    lemmy_escape_profiles: common.opt_lemmy_escape_profiles = (
+        common.val_lemmy_escape_profiles
+    ),
+    img_optimize: Annotated[
+        bool,
+        typer.Option(
+            "--img-optimize/--no-img-optimize",
+            rich_help_panel="Images",
+            help="Downscale and re-encode the images before uploading them",
+            envvar="APC_IMG_OPTIMIZE",
+        ),
+    ] = apc_lb_conf.image.optimize,
+    img_max_dimension: Annotated[
+        int,
+        typer.Option(
+            "--img-max-dimension",
+            rich_help_panel="Images",
+            help="Max width or height in pixels of the optimized images",
+            min=1,
+            envvar="APC_IMG_MAX_DIMENSION",
+        ),
+    ] = apc_lb_conf.image.max_dimension,
+    img_format: Annotated[
+        str,
+        typer.Option(
+            "--img-format",
+            rich_help_panel="Images",
+            help="Format of the optimized images [webp | jpeg]",
+            callback=callbacks.img_format,
+            envvar="APC_IMG_FORMAT",
+        ),
+    ] = apc_lb_conf.image.format,
     output_format: Annotated[
         str,
         typer.Option(
             "--format",
             "-f",
-            help="Output format [json | txt | none].",
+            help="Output format [json | jsonl | txt | none].",
             show_default=True,
             callback=callbacks.output_format,
         ),
@@ -264,29 +548,61 @@ def db(
     apc_lb_conf.lemmy.user = lemmy_user
     apc_lb_conf.lemmy.password = lemmy_password
     apc_lb_conf.lemmy.community = lemmy_community
+    apc_lb_conf.lemmy.token_cache = lemmy_token_cache
+    apc_lb_conf.lemmy.targets = [
+        (target.instance, target.community)
+        for target in map(LemmyTarget.from_str, lemmy_targets)
+    ]
+    apc_lb_conf.lemmy.max_concurrency = lemmy_max_concurrency
+    apc_lb_conf.lemmy.rate_limits = list(
+        map(parse_rate_limit, lemmy_rate_limits),
+    )
+    apc_lb_conf.lemmy.rate_limit_file = lemmy_rate_limit_file
+    apc_lb_conf.lemmy.escape_profiles = list(
+        map(parse_escape_profile, lemmy_escape_profiles),
+    )
     apc_lb_conf.database = database
+    apc_lb_conf.image.optimize = img_optimize
+    apc_lb_conf.image.max_dimension = img_max_dimension
+    apc_lb_conf.image.format = img_format
+
+    if img_optimize and not optimization_available():
+        print("Warning: Pillow is not installed. Images won't be optimized.")
+        apc_lb_conf.image.optimize = False
 
     database_obj = apc_lemmy_bot.database.Database(
         database_url=apc_lb_conf.database,
         echo=False,
     )
 
+    # The community ids are persisted in the database:
+    community_cache.store = database_obj
+
     date_dt = datetime.datetime.strptime(date, "%Y-%m-%d").astimezone(None)
 
     match from_:
-        case "SUPABASE":
-            # Get the data from supabase and we store it to the database:
+        case "DATABASE":
+            pass
+
+        case _:
+            # Get the data from supabase, or a directory, and we store it to
+            # the database:
             if not silence:
                 d_str = date_dt.strftime("%d %B")
                 print(f"Fetching events for date {d_str}:")
-            events = get_dated_events(
-                date=date_dt,
+            source = get_source(
+                from_,
                 url=supabase_url,
                 key=supabase_key,
                 base_event_url=base_event_url,
                 base_event_img_url=base_event_img_url,
                 force_langcode=langcode if langcode else None,
             )
+            try:
+                events = list(source.fetch(date_dt))
+            except SourceError as err:
+                print(f"SourceError: {err}")
+                raise typer.Exit(1) from err
             if not silence:
                 print(f"{len(events)} fetched.")
             for event in events:
@@ -300,50 +616,30 @@ def db(
                     )
                 database_obj.add_event(event, silence)
 
-        case "DATABASE":
-            pass
-
-        case _:
-            msg = f"Error: unexpected FROM '{from_}'"
-            raise typer.BadParameter(msg)
-
     match to_:
         case "DATABASE":
             pass
 
         case "LEMMY":
-            views = database_obj.get_views_by_month_day(
-                date_dt.month,
-                date_dt.day,
+            _enqueue_random_event(
+                database_obj,
+                date_dt,
+                [
+                    LemmyTarget(lemmy_instance, lemmy_community),
+                    *(
+                        LemmyTarget(*target)
+                        for target in apc_lb_conf.lemmy.targets
+                    ),
+                ],
+                silence,
             )
-            if not silence:
-                print(
-                    f"{0 if not views else len(views)} found in the database.",
-                )
-            random_event = None
-            if views:
-                random_event = database_obj.get_random_dated_event(
-                    views,
-                    date_dt,
-                )
-            if not random_event:
-                print("There are not events for today or all has been posted.")
-            else:
-                post = _create_event_post(
-                    random_event,
-                    silence,
-                    lemmy_instance,
-                    lemmy_user,
-                    lemmy_password,
-                    lemmy_community,
-                    database_obj,
-                )
-                url_ = (
-                    f"{post['post_view']['post']['ap_id']}"
-                    if post
-                    else f"url:{random_event.id}"
-                )
-                database_obj.update_posted_event(UUID(random_event.id), url_)
+            if not _drain_outbox(
+                database_obj,
+                silence,
+                lemmy_user,
+                lemmy_password,
+            ):
+                raise typer.Exit(1)
 
         case "SHOW":
             views = database_obj.get_views_by_month_day(
@@ -366,6 +662,8 @@ def db(
                 match output_format:
                     case "json":
                         print(random_event.json())
+                    case "jsonl":
+                        print(random_event.json_line())
                     case "txt":
                         print(random_event.get_content())
                     case "none":
@@ -22,9 +22,19 @@ from typing import Annotated
 
 import typer
 
+import apc_lemmy_bot.database
 from apc_lemmy_bot import apc_lb_conf
-from apc_lemmy_bot.event import Event, get_dated_events
-from apc_lemmy_bot.lemmy import LemmyError, create_event_post, login
+from apc_lemmy_bot.event import Event
+from apc_lemmy_bot.lemmy import (
+    LemmyError,
+    LemmySession,
+    LemmyTarget,
+    create_event_posts,
+    get_session,
+    parse_escape_profile,
+    parse_rate_limit,
+)
+from apc_lemmy_bot.source import SourceError, get_source
 
 from . import app, callbacks, common
 
@@ -33,18 +43,16 @@ def _create_event_post(
     event: Event,
     schedule: sched.scheduler,
     silence: bool,
-    lemmy_instance: str,
-    lemmy_user: str,
-    lemmy_password: str,
-    lemmy_community: str,
+    lemmy_session: LemmySession,
+    lemmy_targets: list[LemmyTarget],
 ) -> None:
     if not silence:
         print(
-            f"Logging to lemmy instance {apc_lb_conf.lemmy.instance}",
+            f"Logging to lemmy instance {lemmy_session.instance}",
             end=" ... ",
         )
     try:
-        lemmy = login(lemmy_instance, lemmy_user, lemmy_password)
+        lemmy_session.login()
     except LemmyError as err:
         print(f"\nLemmyError: {err}")
         raise typer.Exit(1) from err
@@ -55,16 +63,21 @@ def _create_event_post(
     if not silence:
         print(f"Posting {event.id}: {event.slugTitle}", end=" ... ")
 
-    try:
-        create_event_post(
-            event,
-            lemmy,
-            lemmy_community,
-            langcode=event.langcode,
-        )
-    except LemmyError as err:
-        print(f"\nLemmyError: {err}")
-        raise typer.Exit(1) from err
+    results = create_event_posts(
+        event,
+        lemmy_targets,
+        lemmy_session.user,
+        lemmy_session.password,
+        langcode=event.langcode,
+    )
+    for result in results:
+        if result.error is not None:
+            print(
+                f"\nLemmyError: {result.target.community} in "
+                f"{result.target.instance}: {result.error}",
+            )
+    if all(result.error is not None for result in results):
+        raise typer.Exit(1)
 
     if not silence:
         print("Posted.")
@@ -83,6 +96,8 @@ def _create_event_post(
 @app.command()
 def post(
     date: common.arg_date = common.val_date,
+    from_: common.opt_from = common.val_from,
+    database: common.opt_local_database = common.val_local_database,
     supabase_url: common.opt_supabase_url = common.val_supabase_url,
     supabase_key: common.opt_supabase_key = common.val_supabase_key,
     base_event_url: common.opt_base_event_url = common.val_base_event_url,
@@ -138,6 +153,22 @@ def post(
             envvar="APC_DELAY",
         ),
     ] = apc_lb_conf.delay,
+    lemmy_targets: common.opt_lemmy_targets = common.val_lemmy_targets,
+    lemmy_max_concurrency: common.opt_lemmy_max_concurrency = (
+        common.val_lemmy_max_concurrency
+    ),
+    lemmy_token_cache: common.opt_lemmy_token_cache = (
+        common.val_lemmy_token_cache
+    ),
+    lemmy_rate_limits: common.opt_lemmy_rate_limits = (
+        common.val_lemmy_rate_limits
+    ),
+    lemmy_rate_limit_file: common.opt_lemmy_rate_limit_file = (
+        common.val_lemmy_rate_limit_file
+    ),
+    lemmy_escape_profiles: common.opt_lemmy_escape_profiles = (
+        common.val_lemmy_escape_profiles
+    ),
     langcode: common.opt_langcode = common.val_langcode,
     silence: common.opt_silence = common.val_silence,
     version: common.opt_version = common.val_version,
@@ -153,6 +184,19 @@ def post(
     apc_lb_conf.lemmy.user = lemmy_user
     apc_lb_conf.lemmy.password = lemmy_password
     apc_lb_conf.lemmy.community = lemmy_community
+    apc_lb_conf.lemmy.token_cache = lemmy_token_cache
+    apc_lb_conf.lemmy.targets = [
+        (target.instance, target.community)
+        for target in map(LemmyTarget.from_str, lemmy_targets)
+    ]
+    apc_lb_conf.lemmy.max_concurrency = lemmy_max_concurrency
+    apc_lb_conf.lemmy.rate_limits = list(
+        map(parse_rate_limit, lemmy_rate_limits),
+    )
+    apc_lb_conf.lemmy.rate_limit_file = lemmy_rate_limit_file
+    apc_lb_conf.lemmy.escape_profiles = list(
+        map(parse_escape_profile, lemmy_escape_profiles),
+    )
     apc_lb_conf.delay = delay
 
     if not silence:
@@ -166,18 +210,39 @@ def post(
             end=" ... ",
         )
 
-    events = get_dated_events(
-        date=datetime.datetime.strptime(date, "%Y-%m-%d").astimezone(None),
+    source = get_source(
+        from_,
+        database=(
+            apc_lemmy_bot.database.Database(database_url=database, echo=False)
+            if from_ == "DATABASE"
+            else None
+        ),
         url=supabase_url,
         key=supabase_key,
         base_event_url=base_event_url,
         base_event_img_url=base_event_img_url,
         force_langcode=None if langcode == "" else langcode,
     )
+    try:
+        events = list(
+            source.fetch(
+                datetime.datetime.strptime(date, "%Y-%m-%d").astimezone(None),
+            ),
+        )
+    except SourceError as err:
+        print(f"\nSourceError: {err}")
+        raise typer.Exit(1) from err
 
     if not silence:
         print(f"{len(events)} fetched.")
 
+    # The same login is used by all the posts:
+    lemmy_session = get_session(lemmy_instance, lemmy_user, lemmy_password)
+    lemmy_targets_ = [
+        LemmyTarget(lemmy_instance, lemmy_community),
+        *(LemmyTarget(*target) for target in apc_lb_conf.lemmy.targets),
+    ]
+
     schedule = sched.scheduler(time.monotonic, time.sleep)
     acum_delay: int = 0
     for event in events:
@@ -189,10 +254,8 @@ def post(
                 event,
                 schedule,
                 silence,
-                lemmy_instance,
-                lemmy_user,
-                lemmy_password,
-                lemmy_community,
+                lemmy_session,
+                lemmy_targets_,
             ),
         )
         acum_delay += apc_lb_conf.delay
@@ -0,0 +1,344 @@
+#    Copyright (C) 2025 Carles Muñoz Gorriz <carlesmu@internautas.org>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as
+#    published by the Free Software Foundation, either version 3 of the
+#    License, or (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""apc_lemmy_bot.cli serve module."""
+
+import asyncio
+import datetime
+import traceback
+from typing import Annotated
+
+import typer
+
+import apc_lemmy_bot.database
+from apc_lemmy_bot import apc_lb_conf
+from apc_lemmy_bot.event import get_dated_events
+from apc_lemmy_bot.lemmy import (
+    LemmyError,
+    LemmyTarget,
+    community_cache,
+    get_session,
+    parse_escape_profile,
+    parse_rate_limit,
+)
+
+from . import app, callbacks, common
+from .db import _drain_outbox, _enqueue_random_event
+
+
+def _next_run(
+    now: datetime.datetime,
+    times: list[datetime.time],
+) -> datetime.datetime:
+    """
+    Return the next datetime, after `now`, of one of the daily local `times`.
+
+    The local UTC offset of each day is used, so the times are kept when the
+    daylight saving time changes.
+    """
+    return min(
+        run
+        for run in (
+            datetime.datetime.combine(
+                now.date() + datetime.timedelta(days=day),
+                daily_time,
+            ).astimezone()
+            for day in (0, 1)
+            for daily_time in times
+        )
+        if run > now
+    )
+
+
+def _run_cycle(
+    date: datetime.datetime,
+    fetch: bool,
+    database_obj: apc_lemmy_bot.database.Database,
+    lemmy_targets: list[LemmyTarget],
+    langcode: str | None,
+    silence: bool,
+) -> None:
+    """
+    Run a fetch → select → post cycle.
+
+    The posts are enqueued in the outbox of the database and the outbox is
+    drained, so the unfinished posts of previous cycles are resumed.
+
+    Parameters
+    ----------
+    date : datetime.datetime
+        The date of the events.
+    fetch : bool
+        Fetch the events from supabase and store them in the database before
+        selecting one.
+    database_obj : apc_lemmy_bot.database.Database
+        The local database.
+    lemmy_targets : list[LemmyTarget]
+        Where the event is posted.
+    langcode : Optional[str]
+        The language code of the events.
+    silence : bool
+        Don't show information.
+
+    Returns
+    -------
+    None
+
+    """
+    if fetch:
+        if not silence:
+            print(f"Fetching events for date {date.strftime('%d %B')}:")
+        events = get_dated_events(
+            date=date,
+            url=apc_lb_conf.supabase.url,
+            key=apc_lb_conf.supabase.key,
+            base_event_url=apc_lb_conf.supabase.base_event_url,
+            base_event_img_url=apc_lb_conf.supabase.base_event_img_url,
+            force_langcode=langcode,
+        )
+        if not silence:
+            print(f"{len(events)} fetched.")
+        for event in events:
+            database_obj.add_event(event, silence=True)
+
+    _enqueue_random_event(database_obj, date, lemmy_targets, silence)
+    if not _drain_outbox(
+        database_obj,
+        silence,
+        apc_lb_conf.lemmy.user,
+        apc_lb_conf.lemmy.password,
+    ):
+        print("Some posts failed, they will be retried in the next cycle.")
+
+
+async def _serve(
+    times: list[datetime.time],
+    days: int,
+    run_now: bool,
+    database_obj: apc_lemmy_bot.database.Database,
+    lemmy_targets: list[LemmyTarget],
+    langcode: str | None,
+    silence: bool,
+) -> None:
+    """Run the cycles at the configured times."""
+    fetched: datetime.date | None = None
+    first_day = datetime.datetime.now(tz=datetime.UTC).astimezone(None).date()
+
+    while True:
+        now = datetime.datetime.now(tz=datetime.UTC).astimezone(None)
+        if not run_now:
+            next_run = _next_run(now, times)
+            if days and (next_run.date() - first_day).days >= days:
+                return
+            if not silence:
+                print(f"Next post at {next_run:%Y-%m-%d %H:%M}.")
+            await asyncio.sleep((next_run - now).total_seconds())
+            now = datetime.datetime.now(tz=datetime.UTC).astimezone(None)
+        run_now = False
+
+        try:
+            await asyncio.to_thread(
+                _run_cycle,
+                now,
+                fetched != now.date(),
+                database_obj,
+                lemmy_targets,
+                langcode,
+                silence,
+            )
+            fetched = now.date()
+        except (typer.Exit, LemmyError, AssertionError) as err:
+            # We continue with the next cycle:
+            print(f"Error in the cycle of {now:%Y-%m-%d %H:%M}: {err!r}")
+        except Exception as err:  # noqa: BLE001
+            # An unexpected error cannot stop the daemon:
+            print(f"Error in the cycle of {now:%Y-%m-%d %H:%M}: {err!r}")
+            traceback.print_exc()
+
+
+@app.command()
+def serve(
+    times: Annotated[
+        list[str],
+        typer.Option(
+            "--at",
+            help="Local time [HH:MM] of a daily post. It can be repeated",
+            callback=callbacks.times,
+            envvar="APC_SERVE_AT",
+        ),
+    ] = ["09:00"],  # noqa: B006
+    days: Annotated[
+        int,
+        typer.Option(
+            "--days",
+            help="Days to run, 0 to run forever",
+            min=0,
+        ),
+    ] = 0,
+    run_now: Annotated[
+        bool,
+        typer.Option(
+            "--now",
+            help="Run the first cycle at start",
+        ),
+    ] = False,
+    database: Annotated[
+        str,
+        typer.Option(
+            help=(
+                "Local database url (Note: use a extra '/' if you want "
+                "to use an absolute path)"
+            ),
+            envvar="APC_LOCAL_DATABASE",
+        ),
+    ] = common.val_local_database,
+    supabase_url: common.opt_supabase_url = common.val_supabase_url,
+    supabase_key: common.opt_supabase_key = common.val_supabase_key,
+    base_event_url: common.opt_base_event_url = common.val_base_event_url,
+    base_event_img_url: common.opt_base_event_img_url = common.val_base_event_img_url,
+    lemmy_user: Annotated[
+        str,
+        typer.Option(
+            "--lm-user",
+            rich_help_panel="Lemmy",
+            help="User of the lemmy instance that will post the events",
+            show_default=True,
+            envvar="APC_LEMMY_USER",
+        ),
+    ] = common.val_lemmy_user,
+    lemmy_password: Annotated[
+        str,
+        typer.Option(
+            "--lm-password",
+            rich_help_panel="Lemmy",
+            help="Password of the user of the lemmy instance",
+            envvar="APC_LEMMY_PASSWORD",
+        ),
+    ] = common.val_lemmy_password,
+    lemmy_community: Annotated[
+        str,
+        typer.Option(
+            "--lm-community",
+            rich_help_panel="Lemmy",
+            help="Lemmy comumunity of the instance where the events be posted",
+            envvar="APC_LEMMY_COMMUNITY",
+        ),
+    ] = common.val_lemmy_community,
+    lemmy_instance: Annotated[
+        str,
+        typer.Option(
+            "--lm-instance",
+            rich_help_panel="Lemmy",
+            help=(
+                "Base URL of the lemmy instance where the events will be posted"
+            ),
+            callback=callbacks.url,
+            show_default=True,
+            envvar="APC_LEMMY_INSTANCE",
+        ),
+    ] = common.val_lemmy_instance,
+    lemmy_targets: common.opt_lemmy_targets = common.val_lemmy_targets,
+    lemmy_max_concurrency: common.opt_lemmy_max_concurrency = (
+        common.val_lemmy_max_concurrency
+    ),
+    lemmy_token_cache: common.opt_lemmy_token_cache = (
+        common.val_lemmy_token_cache
+    ),
+    lemmy_rate_limits: common.opt_lemmy_rate_limits = (
+        common.val_lemmy_rate_limits
+    ),
+    lemmy_rate_limit_file: common.opt_lemmy_rate_limit_file = (
+        common.val_lemmy_rate_limit_file
+    ),
+    lemmy_escape_profiles: common.opt_lemmy_escape_profiles = (
+        common.val_lemmy_escape_profiles
+    ),
+    langcode: common.opt_langcode = common.val_langcode,
+    silence: common.opt_silence = common.val_silence,
+    version: common.opt_version = common.val_version,
+) -> None:
+    """Run a daemon that posts the events of each day at the given times."""
+    _ = version  # unused variable required for the command line
+
+    apc_lb_conf.supabase.url = supabase_url
+    apc_lb_conf.supabase.key = supabase_key
+    apc_lb_conf.supabase.base_event_url = base_event_url
+    apc_lb_conf.supabase.base_event_img_url = base_event_img_url
+    apc_lb_conf.lemmy.instance = lemmy_instance
+    apc_lb_conf.lemmy.user = lemmy_user
+    apc_lb_conf.lemmy.password = lemmy_password
+    apc_lb_conf.lemmy.community = lemmy_community
+    apc_lb_conf.lemmy.token_cache = lemmy_token_cache
+    apc_lb_conf.lemmy.targets = [
+        (target.instance, target.community)
+        for target in map(LemmyTarget.from_str, lemmy_targets)
+    ]
+    apc_lb_conf.lemmy.max_concurrency = lemmy_max_concurrency
+    apc_lb_conf.lemmy.rate_limits = list(
+        map(parse_rate_limit, lemmy_rate_limits),
+    )
+    apc_lb_conf.lemmy.rate_limit_file = lemmy_rate_limit_file
+    apc_lb_conf.lemmy.escape_profiles = list(
+        map(parse_escape_profile, lemmy_escape_profiles),
+    )
+    apc_lb_conf.database = database
+
+    # The database, the supabase client and the lemmy sessions are kept
+    # between cycles:
+    database_obj = apc_lemmy_bot.database.Database(
+        database_url=apc_lb_conf.database,
+        echo=False,
+    )
+    community_cache.store = database_obj
+
+    if not silence:
+        print(f"Logging to lemmy instance {lemmy_instance}", end=" ... ")
+    try:
+        get_session(lemmy_instance, lemmy_user, lemmy_password).login()
+    except LemmyError as err:
+        print(f"\nLemmyError: {err}")
+        raise typer.Exit(1) from err
+    if not silence:
+        print("Logued.")
+
+    # Resume the posts unfinished when the daemon was stopped:
+    try:
+        _drain_outbox(database_obj, silence, lemmy_user, lemmy_password)
+    except Exception as err:  # noqa: BLE001
+        # They are resumed again in the next cycle:
+        print(f"Error resuming the unfinished posts: {err!r}")
+        traceback.print_exc()
+
+    try:
+        asyncio.run(
+            _serve(
+                [datetime.time.fromisoformat(t) for t in times],
+                days,
+                run_now,
+                database_obj,
+                [
+                    LemmyTarget(lemmy_instance, lemmy_community),
+                    *(
+                        LemmyTarget(*target)
+                        for target in apc_lb_conf.lemmy.targets
+                    ),
+                ],
+                langcode if langcode else None,
+                silence,
+            ),
+        )
+    except KeyboardInterrupt:
+        if not silence:
+            print("Stopped.")
@@ -20,8 +20,9 @@ from typing import Annotated
 
 import typer
 
+import apc_lemmy_bot.database
 from apc_lemmy_bot import apc_lb_conf
-from apc_lemmy_bot.event import get_dated_events
+from apc_lemmy_bot.source import SourceError, get_source
 
 from . import app, callbacks, common
 
@@ -29,6 +30,8 @@ from . import app, callbacks, common
 @app.command()
 def show(
     date: common.arg_date = common.val_date,
+    from_: common.opt_from = common.val_from,
+    database: common.opt_local_database = common.val_local_database,
     supabase_url: common.opt_supabase_url = common.val_supabase_url,
     supabase_key: common.opt_supabase_key = common.val_supabase_key,
     base_event_url: common.opt_base_event_url = common.val_base_event_url,
@@ -38,7 +41,7 @@ def show(
         typer.Option(
             "--format",
             "-f",
-            help="Output format [json | txt | none]. Only useful with SHOW",
+            help="Output format [json | jsonl | txt | none]. Only useful with SHOW",
             show_default=True,
             callback=callbacks.output_format,
         ),
@@ -47,7 +50,7 @@ def show(
     silence: common.opt_silence = common.val_silence,
     version: common.opt_version = common.val_version,
 ) -> None:
-    """Show a day's events stored in a supabase database."""
+    """Show a day's events stored in a supabase database or other source."""
     _ = version  # unused variable required for the command line
 
     apc_lb_conf.supabase.url = supabase_url
@@ -63,8 +66,13 @@ def show(
         )
         print(f"Fetching events for date {d_str}:")
 
-    events = get_dated_events(
-        date=datetime.datetime.strptime(date, "%Y-%m-%d").astimezone(None),
+    source = get_source(
+        from_,
+        database=(
+            apc_lemmy_bot.database.Database(database_url=database, echo=False)
+            if from_ == "DATABASE"
+            else None
+        ),
         url=supabase_url,
         key=supabase_key,
         base_event_url=base_event_url,
@@ -72,17 +80,29 @@ def show(
         force_langcode=None if langcode == "" else langcode,
     )
 
-    for event in events:
-        match output_format:
-            case "json":
-                print(event.json())
-            case "txt":
-                print(event.get_content())
-            case "none":
-                pass
-            case _:
-                msg = "Non recognized -f {output_format}"
-                raise typer.BadParameter(msg)
+    count = 0
+    try:
+        for count, event in enumerate(  # noqa: B007
+            source.fetch(
+                datetime.datetime.strptime(date, "%Y-%m-%d").astimezone(None),
+            ),
+            start=1,
+        ):
+            match output_format:
+                case "json":
+                    print(event.json())
+                case "jsonl":
+                    print(event.json_line())
+                case "txt":
+                    print(event.get_content())
+                case "none":
+                    pass
+                case _:
+                    msg = "Non recognized -f {output_format}"
+                    raise typer.BadParameter(msg)
+    except SourceError as err:
+        print(f"SourceError: {err}")
+        raise typer.Exit(1) from err
 
     if not silence:
-        print(f"{len(events)} fetched.")
+        print(f"{count} fetched.")
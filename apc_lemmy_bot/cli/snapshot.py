@@ -0,0 +1,206 @@
+#    Copyright (C) 2025 Carles Muñoz Gorriz <carlesmu@internautas.org>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as
+#    published by the Free Software Foundation, either version 3 of the
+#    License, or (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""apc_lemmy_bot.cli snapshot module."""
+
+import sys
+import time
+from typing import Annotated
+
+import typer
+
+import apc_lemmy_bot.database
+from apc_lemmy_bot import apc_lb_conf
+from apc_lemmy_bot.snapshot import (
+    SnapshotError,
+    export_snapshot,
+    import_snapshot,
+)
+
+from . import app, callbacks, common
+
+
+def _month_day(value: str) -> tuple[int, int] | None:
+    """Return the (month, day) of a validated MM-DD option."""
+    if not value:
+        return None
+    month, day = value.split("-")
+    return int(month), int(day)
+
+
+@app.command()
+def export(
+    output: Annotated[
+        str,
+        typer.Argument(
+            metavar="OUTPUT",
+            help=(
+                "Snapshot file, '-' for the standard output. The '.gz' and "
+                "'.zst' suffixes compress it"
+            ),
+        ),
+    ] = "-",
+    database: Annotated[
+        str,
+        typer.Option(
+            help=(
+                "Local database url (Note: use a extra '/' if you want "
+                "to use an absolute path)"
+            ),
+            envvar="APC_LOCAL_DATABASE",
+        ),
+    ] = common.val_local_database,
+    output_format: Annotated[
+        str,
+        typer.Option(
+            "--format",
+            "-f",
+            help="Output format: jsonl or csv",
+            show_default=True,
+            callback=callbacks.snapshot_format,
+        ),
+    ] = "jsonl",
+    since: Annotated[
+        str,
+        typer.Option(
+            help="First day of the calendar to export (MM-DD)",
+            callback=callbacks.month_day,
+        ),
+    ] = "",
+    until: Annotated[
+        str,
+        typer.Option(
+            help=(
+                "Last day of the calendar to export (MM-DD). It can be "
+                "before --since to export across the new year"
+            ),
+            callback=callbacks.month_day,
+        ),
+    ] = "",
+    images: Annotated[
+        bool,
+        typer.Option(
+            "--images",
+            help="Export the images too, encoded in base64",
+        ),
+    ] = False,
+    batch_size: Annotated[
+        int,
+        typer.Option(
+            help="Events fetched from the database at once",
+            min=1,
+            show_default=True,
+        ),
+    ] = 500,
+    silence: common.opt_silence = common.val_silence,
+    version: common.opt_version = common.val_version,
+) -> None:
+    """
+    Export the events of the local database to a snapshot.
+
+    The events are streamed with their links, tags and posting history.
+    """
+    _ = version  # unused variable required for the command line
+
+    apc_lb_conf.database = database
+    database_obj = apc_lemmy_bot.database.Database(
+        database_url=apc_lb_conf.database,
+        echo=False,
+    )
+
+    start = time.perf_counter()
+    try:
+        count = export_snapshot(
+            database_obj,
+            output,
+            output_format=output_format,
+            since=_month_day(since),
+            until=_month_day(until),
+            images=images,
+            batch_size=batch_size,
+        )
+    except (SnapshotError, OSError) as err:
+        print(f"Error: {err}", file=sys.stderr)
+        raise typer.Exit(1) from err
+    elapsed = time.perf_counter() - start
+
+    if not silence:
+        # The snapshot can be written to the standard output:
+        print(
+            f"{count} events exported in {elapsed:.2f} seconds "
+            f"({count / elapsed if elapsed else 0:.0f} events/s).",
+            file=sys.stderr,
+        )
+
+
+@app.command("import")
+def import_(
+    input_: Annotated[
+        str,
+        typer.Argument(
+            metavar="FILE",
+            help=(
+                "JSON Lines snapshot, '-' for the standard input. It can be "
+                "compressed with gzip or zstd"
+            ),
+        ),
+    ] = "-",
+    database: Annotated[
+        str,
+        typer.Option(
+            help=(
+                "Local database url (Note: use a extra '/' if you want "
+                "to use an absolute path)"
+            ),
+            envvar="APC_LOCAL_DATABASE",
+        ),
+    ] = common.val_local_database,
+    batch_size: Annotated[
+        int,
+        typer.Option(
+            help="Events inserted in the database at once",
+            min=1,
+            show_default=True,
+        ),
+    ] = 1000,
+    silence: common.opt_silence = common.val_silence,
+    version: common.opt_version = common.val_version,
+) -> None:
+    """
+    Import a snapshot to the local database.
+
+    The events already stored are skipped.
+    """
+    _ = version  # unused variable required for the command line
+
+    apc_lb_conf.database = database
+    database_obj = apc_lemmy_bot.database.Database(
+        database_url=apc_lb_conf.database,
+        echo=False,
+    )
+
+    start = time.perf_counter()
+    try:
+        stats = import_snapshot(database_obj, input_, batch_size=batch_size)
+    except (SnapshotError, OSError) as err:
+        print(f"Error: {err}", file=sys.stderr)
+        raise typer.Exit(1) from err
+    elapsed = time.perf_counter() - start
+
+    if not silence:
+        print(
+            f"{stats.events} events imported ({stats.skipped} skipped), "
+            f"{stats.rows} rows in {elapsed:.2f} seconds "
+            f"({stats.rows / elapsed if elapsed else 0:.0f} rows/s).",
+        )
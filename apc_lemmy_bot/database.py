@@ -15,16 +15,19 @@
 """apc_lemmy_bot database module."""
 
 import datetime
+import hashlib
 import random
-import urllib.request
+from typing import Any, cast
 from uuid import UUID
 
+import requests
 import sqlalchemy as sa
 import sqlalchemy.orm as saorm
 from sqlalchemy_utils import database_exists
 
-from apc_lemmy_bot import __version__, apc_lb_conf
+from apc_lemmy_bot import __version__, apc_lb_conf, transport
 from apc_lemmy_bot.event import Event
+from apc_lemmy_bot.image import optimize_image
 
 # Changing to the new UUID, returns this error (we maintain the uuid import for
 # the SQLAlchemy definitions):
@@ -154,6 +157,72 @@ class Images(Base):  # pylint: disable=R0903  # Too few public methods
         )
 
 
+class ImagesOptimized(Base):  # pylint: disable=R0903  # Too few public methods
+    """Declarative class for the **images_optimized** table."""
+
+    __tablename__ = "images_optimized"
+
+    id_int: saorm.Mapped[int] = saorm.mapped_column(primary_key=True)
+    image_id_int = saorm.mapped_column(sa.ForeignKey("images.id_int"))
+    img: saorm.Mapped[sa.LargeBinary] = saorm.mapped_column(
+        sa.LargeBinary,
+        nullable=False,
+    )
+    format: saorm.Mapped[str] = saorm.mapped_column(sa.String(10))
+    max_dimension: saorm.Mapped[int]
+    quality: saorm.Mapped[int] = saorm.mapped_column(sa.SmallInteger)
+
+    # Add composed index:
+    __table_args__ = (
+        sa.Index(
+            "imageVariant",
+            "image_id_int",
+            "format",
+            "max_dimension",
+            "quality",
+            unique=True,
+        ),
+    )
+
+    def __repr__(self) -> str:
+        """Return a string representation of a ImagesOptimized object."""
+        return (
+            f"<ImagesOptimized>("
+            f"image_id_int={self.image_id_int!r}, format={self.format!r}, "
+            f"max_dimension={self.max_dimension!r}, quality={self.quality!r})"
+        )
+
+
+class ImagesUploaded(Base):  # pylint: disable=R0903  # Too few public methods
+    """Declarative class for the **images_uploaded** table."""
+
+    __tablename__ = "images_uploaded"
+
+    id_int: saorm.Mapped[int] = saorm.mapped_column(primary_key=True)
+    event_id_int = saorm.mapped_column(sa.ForeignKey("events.id_int"))
+    event_id_uuid = saorm.mapped_column(sa.ForeignKey("events.id_uuid"))
+    instance: saorm.Mapped[str]
+    image_url: saorm.Mapped[str]
+    delete_url: saorm.Mapped[str | None] = saorm.mapped_column(nullable=True)
+    timestamp: saorm.Mapped[datetime.datetime] = saorm.mapped_column(
+        nullable=True,
+    )
+
+    # Add composed index:
+    __table_args__ = (
+        sa.Index("eventInstance", "event_id_uuid", "instance", unique=True),
+    )
+
+    def __repr__(self) -> str:
+        """Return a string representation of a ImagesUploaded object."""
+        return (
+            f"<ImagesUploaded>("
+            f"event_id_uuid={self.event_id_uuid!r}, "
+            f"instance={self.instance!r}, image_url={self.image_url!r}, "
+            f"timestamp={self.timestamp!r})"
+        )
+
+
 class Links(Base):  # pylint: disable=R0903  # Too few public methods
     """Declarative class for the **links** table."""
 
@@ -259,6 +328,53 @@ class EventsPosted(Base):  # pylint: disable=R0903  # Too few public methods
         )
 
 
+class Outbox(Base):  # pylint: disable=R0903  # Too few public methods
+    """
+    Declarative class for the **outbox** table.
+
+    Each row is a post of an event to a community. Its `state` goes from
+    *pending* to *in_flight* while it's being posted and to *done* (or
+    *failed*) at the end.
+    """
+
+    __tablename__ = "outbox"
+
+    id_int: saorm.Mapped[int] = saorm.mapped_column(primary_key=True)
+    key: saorm.Mapped[str] = saorm.mapped_column(
+        sa.String(40),
+        index=True,
+        unique=True,
+        nullable=False,
+    )
+    event_id_int = saorm.mapped_column(sa.ForeignKey("events.id_int"))
+    event_id_uuid = saorm.mapped_column(sa.ForeignKey("events.id_uuid"))
+    instance: saorm.Mapped[str]
+    community: saorm.Mapped[str]
+    date: saorm.Mapped[datetime.date]
+    state: saorm.Mapped[str] = saorm.mapped_column(sa.String(10), index=True)
+    attempts: saorm.Mapped[int] = saorm.mapped_column(default=0)
+    url: saorm.Mapped[str] = saorm.mapped_column(nullable=True)
+    error: saorm.Mapped[str] = saorm.mapped_column(nullable=True)
+    timestamp: saorm.Mapped[datetime.datetime] = saorm.mapped_column(
+        nullable=True,
+    )
+
+    def __repr__(self) -> str:
+        """Return a string representation of a Outbox object."""
+        return (
+            f"<Outbox>("
+            f"event_id_uuid={self.event_id_uuid!r}, "
+            f"instance={self.instance!r}, community={self.community!r}, "
+            f"date={self.date!r}, state={self.state!r}, url={self.url!r})"
+        )
+
+
+OUTBOX_PENDING: str = "pending"
+OUTBOX_IN_FLIGHT: str = "in_flight"
+OUTBOX_DONE: str = "done"
+OUTBOX_FAILED: str = "failed"
+
+
 class Database:
     """Main class of the database module."""
 
@@ -289,6 +405,9 @@ class Database:
         self.metadata = Base.metadata
         if not database_exists(self.database_url):
             self.create_database()
+        else:
+            # Create the tables added by newer versions:
+            self.metadata.create_all(self.engine)
 
     def create_database(self) -> None:
         """
@@ -330,6 +449,53 @@ class Database:
         ).scalar_one()
         last_change.value = f"{datetime.datetime.now(tz=datetime.UTC)}"
 
+    def get_info(self, key: str) -> str | None:
+        """
+        Get a value of the **info** table.
+
+        Parameters
+        ----------
+        key : str
+            The key of the value.
+
+        Returns
+        -------
+        Optional[str]
+            The value, or None if it's not stored.
+
+        """
+        with saorm.sessionmaker(self.engine)() as session:
+            return session.scalars(
+                sa.select(Info.value).filter_by(key=key),
+            ).first()
+
+    def set_info(self, key: str, value: str | None) -> None:
+        """
+        Store (or remove if `value` is None) a value of the **info** table.
+
+        Parameters
+        ----------
+        key : str
+            The key of the value.
+        value : Optional[str]
+            The value to store, or None to remove it.
+
+        Returns
+        -------
+        None
+
+        """
+        with saorm.sessionmaker(self.engine)() as session:
+            info = session.scalars(sa.select(Info).filter_by(key=key)).first()
+            if value is None:
+                if info is not None:
+                    session.delete(info)
+            elif info is None:
+                session.add(Info(key=key, value=value))
+            else:
+                info.value = value
+            session.commit()
+
     @classmethod
     def _get_event_from_view(cls, view: Events) -> Event:
         """
@@ -353,23 +519,21 @@ class Database:
             img_src = view.images[0].imgSrc if view.images[0] else None
             img_alt_txt = view.images[0].imgAltText if view.images[0] else None
 
-        return Event(
-            {
-                "id": str(view.id_uuid),
-                "title": view.title,
-                "slugTitle": view.slugTitle,
-                "otd": view.otd,
-                "description": view.description,
-                "imgSrc": img_src,
-                "imgAltText": img_alt_txt,
-                "NSFW": view.NSFW,
-                "date": view.date.strftime("%Y-%m-%d"),
-                "links": [x.link for x in view.links],
-                "tags": [x.tag for x in view.tags],
-                "day": view.day,
-                "month": view.month,
-                "langcode": view.langcode,
-            },
+        return Event.from_fields(
+            id=str(view.id_uuid),
+            title=view.title,
+            slugTitle=view.slugTitle,
+            otd=view.otd,
+            description=view.description,
+            imgSrc=img_src,
+            imgAltText=img_alt_txt,
+            NSFW=view.NSFW,
+            date=view.date,
+            links=[x.link for x in view.links],
+            tags=[x.tag for x in view.tags],
+            day=view.day,
+            month=view.month,
+            langcode=view.langcode,
             base_event_url=view.extended.base_event_url,
             base_event_img_url=view.extended.base_event_img_url,
         )
@@ -420,30 +584,26 @@ class Database:
 
         _img = None
         if event.imgSrc:
-            req = urllib.request.Request(
-                img_url,
-                data=None,
-                headers={
-                    "User-Agent": (
-                        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_9_3) "
-                        "AppleWebKit/537.36 (KHTML, like Gecko) "
-                        "Chrome/35.0.1916.47 "
-                        "Safari/537.36"
-                    ),
-                },
-            )
+            headers = {
+                "User-Agent": (
+                    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_9_3) "
+                    "AppleWebKit/537.36 (KHTML, like Gecko) "
+                    "Chrome/35.0.1916.47 "
+                    "Safari/537.36"
+                ),
+            }
 
             # Some times we get this error:
-            # urllib.error.URLError: <urlopen error
             # [SSL:CERTIFICATE_VERIFY_FAILED]
             # certificate verify failed: unable to get local issuer certificate
             try:
-                with urllib.request.urlopen(req) as response:
-                    _img = response.read()
-            except urllib.error.URLError as err:
+                response = transport.request("GET", img_url, headers=headers)
+                response.raise_for_status()
+            except requests.RequestException as err:
                 print(f"Warning: Error {err}. We try again ...")
-                with urllib.request.urlopen(req) as response:
-                    _img = response.read()
+                response = transport.request("GET", img_url, headers=headers)
+                response.raise_for_status()
+            _img = response.content
 
         if event.imgAltText or _img:
             view.images.append(
@@ -610,6 +770,386 @@ class Database:
             )
             session.commit()
 
+    def enqueue_post(
+        self,
+        id_uuid: R_UUID | UUID,
+        instance: str,
+        community: str,
+        date: datetime.date,
+    ) -> bool:
+        """
+        Add a post of an event to the outbox.
+
+        The event, the instance, the community and the date are the
+        idempotency key: the same post is only enqueued once.
+
+        Parameters
+        ----------
+        id_uuid : R_UUID | UUID
+            The *UUID* of the event.
+        instance : str
+            The Lemmy instance URL.
+        community : str
+            The community.
+        date : datetime.date
+            The date of the post.
+
+        Raises
+        ------
+        DatabaseError
+            If the event is not found.
+
+        Returns
+        -------
+        bool
+            False if it was already enqueued.
+
+        """
+        view = self.get_view_by_id(id_uuid)
+        if view is None:
+            msg = f"View/row not found f{id_uuid}"
+            raise DatabaseError(msg)
+
+        key = hashlib.sha1(
+            f"{view.id_uuid}|{instance}|{community}|{date}".encode(),
+            usedforsecurity=False,
+        ).hexdigest()
+        with saorm.sessionmaker(self.engine)() as session:
+            if session.scalars(
+                sa.select(Outbox.id_int).filter_by(key=key),
+            ).first():
+                return False
+            session.add(
+                Outbox(
+                    key=key,
+                    event_id_int=view.id_int,
+                    event_id_uuid=view.id_uuid,
+                    instance=instance,
+                    community=community,
+                    date=date,
+                    state=OUTBOX_PENDING,
+                    attempts=0,
+                    timestamp=datetime.datetime.now(tz=datetime.UTC),
+                ),
+            )
+            try:
+                session.commit()
+            except sa.exc.IntegrityError:  # Enqueued by other process
+                return False
+        return True
+
+    def get_outbox(
+        self,
+        state: str,
+        before: datetime.datetime | None = None,
+    ) -> list[Outbox]:
+        """
+        Get the posts of the outbox in a state.
+
+        Parameters
+        ----------
+        state : str
+            The state (e.g.: `OUTBOX_IN_FLIGHT`).
+        before : Optional[datetime.datetime], optional
+            Only the posts updated before this UTC time. The default is None.
+
+        Returns
+        -------
+        list[Outbox]
+            The outbox rows.
+
+        """
+        stmt = sa.select(Outbox).filter_by(state=state).order_by(Outbox.id_int)
+        if before is not None:
+            stmt = stmt.where(Outbox.timestamp < before)
+        with saorm.sessionmaker(self.engine)() as session:
+            return list(session.scalars(stmt).all())
+
+    def claim_outbox(self) -> list[Outbox]:
+        """
+        Move the pending posts of the outbox to *in_flight* and return them.
+
+        A post is only claimed once, even with several processes draining the
+        outbox.
+
+        Returns
+        -------
+        list[Outbox]
+            The claimed outbox rows.
+
+        """
+        claimed: list[Outbox] = []
+        with saorm.sessionmaker(self.engine)() as session:
+            for job in self.get_outbox(OUTBOX_PENDING):
+                result = cast(
+                    "sa.CursorResult[Any]",
+                    session.execute(
+                        sa.update(Outbox)
+                        .where(Outbox.id_int == job.id_int)
+                        .where(Outbox.state == OUTBOX_PENDING)
+                        .values(
+                            state=OUTBOX_IN_FLIGHT,
+                            attempts=Outbox.attempts + 1,
+                            timestamp=datetime.datetime.now(tz=datetime.UTC),
+                        ),
+                    ),
+                )
+                session.commit()
+                if result.rowcount == 1:
+                    claimed.append(job)
+        return claimed
+
+    def complete_outbox(self, job: Outbox, url: str | None) -> None:
+        """
+        Mark a post of the outbox as *done* and the event as posted.
+
+        Both are updated in the same transaction.
+
+        Parameters
+        ----------
+        job : Outbox
+            The outbox row.
+        url : Optional[str]
+            The URL of the post. If it's unknown, `outbox:<key>` is stored,
+            that is unique for each post.
+
+        Returns
+        -------
+        None
+
+        """
+        url = url or f"outbox:{job.key}"
+        timestamp = datetime.datetime.now(tz=datetime.UTC)
+        with saorm.sessionmaker(self.engine)() as session:
+            session.execute(
+                sa.update(Outbox)
+                .where(Outbox.id_int == job.id_int)
+                .values(
+                    state=OUTBOX_DONE,
+                    url=url,
+                    error=None,
+                    timestamp=timestamp,
+                ),
+            )
+            session.execute(
+                sa.insert(EventsPosted),
+                [
+                    {
+                        "event_id_int": job.event_id_int,
+                        "event_id_uuid": job.event_id_uuid,
+                        "url": url,
+                        "date": timestamp.date(),
+                        "timestamp": timestamp,
+                    },
+                ],
+            )
+            session.commit()
+
+    def release_outbox(
+        self,
+        job: Outbox,
+        error: str | None = None,
+        failed: bool = False,
+    ) -> None:
+        """
+        Return a post of the outbox to *pending*, or mark it as *failed*.
+
+        Parameters
+        ----------
+        job : Outbox
+            The outbox row.
+        error : Optional[str], optional
+            The error of the last attempt. The default is None.
+        failed : bool, optional
+            Don't try it again. The default is False.
+
+        Returns
+        -------
+        None
+
+        """
+        with saorm.sessionmaker(self.engine)() as session:
+            session.execute(
+                sa.update(Outbox)
+                .where(Outbox.id_int == job.id_int)
+                .values(
+                    state=OUTBOX_FAILED if failed else OUTBOX_PENDING,
+                    error=error,
+                    timestamp=datetime.datetime.now(tz=datetime.UTC),
+                ),
+            )
+            session.commit()
+
+    def get_event_by_id(self, id_uuid: R_UUID | UUID) -> Event | None:
+        """
+        Get the event with a *UUID*.
+
+        Parameters
+        ----------
+        id_uuid : R_UUID | UUID
+            The *UUID* to look for.
+
+        Returns
+        -------
+        Optional[Event]
+            The event, or None if it is not stored.
+
+        """
+        view = self.get_view_by_id(id_uuid)
+        return self._get_event_from_view(view) if view else None
+
+    def get_uploaded_image(
+        self,
+        id_uuid: R_UUID | UUID,
+        instance: str,
+    ) -> ImagesUploaded | None:
+        """
+        Get the image of an event uploaded to a Lemmy instance.
+
+        Parameters
+        ----------
+        id_uuid : R_UUID | UUID
+            The *UUID* of the event.
+        instance : str
+            The Lemmy instance URL.
+
+        Returns
+        -------
+        Optional[ImagesUploaded]
+            The uploaded image view/row, or None if it was not uploaded.
+
+        """
+        with saorm.sessionmaker(self.engine)() as session:
+            return session.scalars(
+                sa.select(ImagesUploaded)
+                .where(ImagesUploaded.event_id_uuid == id_uuid)
+                .where(ImagesUploaded.instance == instance),
+            ).first()
+
+    def update_uploaded_image(
+        self,
+        id_uuid: R_UUID | UUID,
+        instance: str,
+        image_url: str,
+        delete_url: str | None = None,
+    ) -> None:
+        """
+        Store the image of an event uploaded to a Lemmy instance.
+
+        Parameters
+        ----------
+        id_uuid : R_UUID | UUID
+            The *UUID* of the event.
+        instance : str
+            The Lemmy instance URL.
+        image_url : str
+            The URL of the uploaded image.
+        delete_url : Optional[str], optional
+            The URL to delete the uploaded image. The default is None.
+
+        Raises
+        ------
+        DatabaseError
+            If the event is not found.
+
+        Returns
+        -------
+        None
+
+        """
+        view = self.get_view_by_id(id_uuid)
+        if view is None:
+            msg = f"View/row not found f{id_uuid}"
+            raise DatabaseError(msg)
+
+        with saorm.sessionmaker(self.engine)() as session:
+            uploaded = session.scalars(
+                sa.select(ImagesUploaded)
+                .where(ImagesUploaded.event_id_uuid == view.id_uuid)
+                .where(ImagesUploaded.instance == instance),
+            ).first()
+            if uploaded is None:
+                uploaded = ImagesUploaded(
+                    event_id_int=view.id_int,
+                    event_id_uuid=view.id_uuid,
+                    instance=instance,
+                )
+                session.add(uploaded)
+            uploaded.image_url = image_url
+            uploaded.delete_url = delete_url
+            uploaded.timestamp = datetime.datetime.now(tz=datetime.UTC)
+            session.commit()
+
+    def get_optimized_image(
+        self,
+        image: Images,
+        max_dimension: int | None = None,
+        img_format: str | None = None,
+        quality: int | None = None,
+    ) -> bytes:
+        """
+        Get the optimized variant of a stored image.
+
+        The variant is created the first time and stored next to the original
+        image, so the next calls only read it.
+
+        Parameters
+        ----------
+        image : Images
+            The image view/row.
+        max_dimension : Optional[int], optional
+            The maximum width or height of the image. The default is
+            `apc_lb_conf.image.max_dimension`.
+        img_format : Optional[str], optional
+            The output format. The default is `apc_lb_conf.image.format`.
+        quality : Optional[int], optional
+            The encoder quality. The default is `apc_lb_conf.image.quality`.
+
+        Raises
+        ------
+        apc_lemmy_bot.image.ImageError
+            If the image cannot be optimized.
+
+        Returns
+        -------
+        bytes
+            The optimized image.
+
+        """
+        max_dimension = max_dimension or apc_lb_conf.image.max_dimension
+        img_format = (img_format or apc_lb_conf.image.format).lower()
+        quality = quality or apc_lb_conf.image.quality
+
+        with saorm.sessionmaker(self.engine)() as session:
+            stmt = (
+                sa.select(ImagesOptimized.img)
+                .where(ImagesOptimized.image_id_int == image.id_int)
+                .where(ImagesOptimized.format == img_format)
+                .where(ImagesOptimized.max_dimension == max_dimension)
+                .where(ImagesOptimized.quality == quality)
+            )
+            stored = session.scalars(stmt).first()
+            if stored is not None:
+                return large_binary_to_bytes(stored)
+
+            optimized = optimize_image(
+                large_binary_to_bytes(image.img),
+                max_dimension,
+                img_format,
+                quality,
+            )
+            session.add(
+                ImagesOptimized(
+                    image_id_int=image.id_int,
+                    img=optimized,
+                    format=img_format,
+                    max_dimension=max_dimension,
+                    quality=quality,
+                ),
+            )
+            session.commit()
+        return optimized
+
     def get_view_by_id(
         self, id_uuid: R_UUID | UUID, session: saorm.Session | None = None
     ) -> Events | None:
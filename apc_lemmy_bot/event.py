@@ -19,22 +19,208 @@ apc_lemmy_bot event module.
 """
 
 import datetime
+import functools
 import json
+import re
 import textwrap
 import warnings
-from typing import Any
+from collections.abc import Callable
+from typing import Any, Self
 from urllib.parse import urlsplit
 
 # https://github.com/supabase-community/supabase-py
 from supabase import Client, create_client
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None  # type: ignore[assignment]
+
 from apc_lemmy_bot import apc_lb_conf
 
 TODAY: datetime.date = datetime.datetime.now(tz=datetime.UTC).date()
 
 
+#: The fields of an event, in the order they are serialized.
+EVENT_FIELDS: tuple[str, ...] = (
+    "id",
+    "title",
+    "slugTitle",
+    "otd",
+    "description",
+    "imgAltText",
+    "NSFW",
+    "imgSrc",
+    "date",
+    "links",
+    "tags",
+    "day",
+    "month",
+    "langcode",
+    "base_event_url",
+    "base_event_img_url",
+)
+
+_SCHEMA: frozenset[str] = frozenset(EVENT_FIELDS)
+
+# The fields expected in the event data:
+_REQUIRED: frozenset[str] = _SCHEMA - {
+    "base_event_url",
+    "base_event_img_url",
+    "langcode",
+}
+
+# The fields of a supabase row:
+_ROW: frozenset[str] = _REQUIRED | {"langcode"}
+
+# The factories of the values of the fields missed in the event data:
+_DEFAULTS: dict[str, Callable[[], Any]] = dict.fromkeys(
+    _REQUIRED,
+    lambda: None,
+) | {"links": list, "tags": list}
+
+
+#: The abbreviations that don't end a sentence in `Event.nice_title`, by
+#: langcode. The "" key is used for the langcodes not in the dictionary.
+ABBREVIATIONS: dict[str, frozenset[str]] = {
+    "": frozenset(
+        {
+            "Dr",
+            "Mr",
+            "Ms",
+            "Sr",
+            "U.S",
+            "U.S.A",
+            "V",  # for Eugene V. Debs
+        },
+    ),
+}
+
+
+#: The escaping profiles of `Event.nice_description`, by name: the
+#: characters of the descriptions that are markdown for the Lemmy front-ends
+#: and their replacements.
+ESCAPE_PROFILES: dict[str, tuple[tuple[str, str], ...]] = {
+    "default": (
+        ("*", "✱"),  # Asterisk * with heavy asterisk ✱
+        ("_", chr(0xFF3F)),  # Underscore _ with full-with low line: U+FF3F
+        ("`", "'"),  # Grave accent ` with apostrophe '
+    ),
+    "backslash": (("*", r"\*"), ("_", r"\_"), ("`", r"\`")),
+    "none": (),
+}
+
+
+@functools.cache
+def _sentence_end_pattern(abbreviations: frozenset[str]) -> re.Pattern[str]:
+    """
+    Return the compiled pattern of the sentence ends of `Event.nice_title`.
+
+    The pattern is searched in the reversed title: it matches a reversed
+    dot+space that is not after one of the `abbreviations`, so the first
+    match is the end of the latest sentence.
+    """
+    if not abbreviations:
+        return re.compile(r" \.")
+    reversed_abbreviations = "|".join(
+        re.escape(abbreviation[::-1]) for abbreviation in sorted(abbreviations)
+    )
+    return re.compile(rf" \.(?!(?:{reversed_abbreviations}) )")
+
+
+def _last_paragraph(text: str) -> tuple[str, str, str]:
+    r"""
+    Partition `text` before and after its last paragraph separator.
+
+    The last part is the last item of `text.split("\n\n")`.
+    """
+    head, sep, last = text.rpartition("\n\n")
+    if (len(head) - len(head.rstrip("\n"))) % 2:
+        # split() pairs the newlines from the left, so the odd one is the
+        # first character of the last paragraph:
+        return head[:-1], sep, f"\n{last}"
+    return head, sep, last
+
+
+def _json_default(value: Any) -> str:  # noqa: ANN401
+    """Encode the values that are not JSON types, like orjson does."""
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    return str(value)
+
+
+def json_line(data: Any) -> str:  # noqa: ANN401
+    """
+    Serialize `data` to compact JSON in one line, e.g. a JSON Lines record.
+
+    It uses `orjson` when it is installed (the `json` extra), or the standard
+    library. Both give the same output: the non ASCII characters are not
+    escaped and the dates are encoded in ISO 8601 format.
+
+    .. versionadded:: 0.8.0
+
+    Parameters
+    ----------
+    data : Any
+        The data to serialize.
+
+    Returns
+    -------
+    str
+        The JSON document, without newlines.
+
+    """
+    if orjson is not None:
+        return orjson.dumps(data, default=str).decode()
+    return json.dumps(
+        data,
+        ensure_ascii=False,
+        separators=(",", ":"),
+        default=_json_default,
+    )
+
+
+def _freeze(value: Any) -> Any:  # noqa: ANN401
+    """Return a hashable version of `value`."""
+    if isinstance(value, list | tuple):
+        return tuple(map(_freeze, value))
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(val)) for key, val in value.items()))
+    return value
+
+
 class Event:
-    """A class to store events."""
+    """
+    A class to store events.
+
+    The rendered content and the tuple used to compare and hash an event are
+    cached until one of its attributes is set. The lists of `links` and
+    `tags` must not be changed in place: set them to a new list instead,
+    e.g. ``event.tags = [*event.tags, "tag"]``.
+    """
+
+    __slots__ = (*EVENT_FIELDS, "_extra", "_key", "_parts", "_content")
+
+    id: str | None
+    title: str | None
+    slugTitle: str | None  # noqa: N815
+    otd: str | None
+    description: str | None
+    imgAltText: str | None  # noqa: N815
+    NSFW: bool | None
+    imgSrc: str | None  # noqa: N815
+    date: datetime.date | None
+    links: list[str | None]
+    tags: list[str | None]
+    day: int | None
+    month: int | None
+    langcode: str
+    base_event_url: str
+    base_event_img_url: str
+    _extra: dict[str, Any]
+    _key: tuple[Any, ...] | None
+    _parts: dict[str, tuple[str, str]] | None
+    _content: dict[tuple[str | None, str], str] | None
 
     def __init__(
         self,
@@ -63,53 +249,43 @@ class Event:
         None.
 
         """
-        self.id: str | None = None
-        self.title: str | None = None
-        self.slugTitle: str | None = None
-        self.otd: str | None = None
-        self.description: str | None = None
-        self.imgAltText: str | None = None
-        self.NSFW: bool | None = None
-        self.imgSrc: str | None = None
-        self.date: datetime.date | None = None
-        self.links: list[str | None] = []
-        self.tags: list[str | None] = []
-        self.day: int | None = None
-        self.month: int | None = None
-
-        if force_langcode:
-            self.langcode = force_langcode
-        else:
-            self.langcode = ""
-
-        self.base_event_url: str = (
+        set_ = object.__setattr__
+        set_(self, "_key", None)
+        set_(self, "_parts", None)
+        set_(self, "_content", None)
+        set_(self, "_extra", {})
+        set_(self, "langcode", force_langcode or "")
+        set_(
+            self,
+            "base_event_url",
             base_event_url
             if base_event_url is not None
-            else apc_lb_conf.supabase.base_event_url
+            else apc_lb_conf.supabase.base_event_url,
         )
-
-        self.base_event_img_url: str = (
+        set_(
+            self,
+            "base_event_img_url",
             base_event_img_url
             if base_event_img_url is not None
-            else apc_lb_conf.supabase.base_event_img_url
+            else apc_lb_conf.supabase.base_event_img_url,
         )
 
-        if event.keys() != self.__dict__.keys():
-            for missed_dict in [x for x in self.__dict__ if x not in event]:
-                if missed_dict not in [
-                    "base_event_url",
-                    "base_event_img_url",
-                    "langcode",
-                ]:
-                    warnings.warn(
-                        (
-                            f"Key '{missed_dict}' missed in event "
-                            f"'{event['slugTitle']}'."
-                        ),
-                        stacklevel=2,
-                    )
-
-            for missed_key in [x for x in event if x not in self.__dict__]:
+        keys = event.keys()
+        missed: frozenset[str] | set[str] = frozenset()
+        unexpected: frozenset[str] | set[str] = frozenset()
+        # The fast path, the event data has the fields of a supabase row:
+        if keys != _ROW:
+            missed = _REQUIRED - keys
+            unexpected = keys - _SCHEMA
+            for missed_dict in [x for x in EVENT_FIELDS if x in missed]:
+                warnings.warn(
+                    (
+                        f"Key '{missed_dict}' missed in event "
+                        f"'{event['slugTitle']}'."
+                    ),
+                    stacklevel=2,
+                )
+            for missed_key in [x for x in event if x in unexpected]:
                 warnings.warn(
                     (
                         f"Unexpected key '{missed_key}' in event "
@@ -117,12 +293,14 @@ class Event:
                     ),
                     stacklevel=2,
                 )
+            for missed_dict in missed:
+                set_(self, missed_dict, _DEFAULTS[missed_dict]())
 
         for e_key, e_value in event.items():
             match e_key:
                 case "date":
                     dstr = e_value.split("-")
-                    setattr(
+                    set_(
                         self,
                         e_key,
                         datetime.date(
@@ -132,9 +310,155 @@ class Event:
                         ),
                     )
                 case "month" | "day":
-                    setattr(self, e_key, int(e_value))
+                    set_(self, e_key, int(e_value))
+                case _ if e_key in unexpected:
+                    self._extra[e_key] = e_value
                 case _:
-                    setattr(self, e_key, e_value)
+                    set_(self, e_key, e_value)
+
+    @classmethod
+    def from_fields(
+        cls,
+        *,
+        id: str | None,  # noqa: A002
+        title: str | None,
+        slugTitle: str | None,  # noqa: N803
+        otd: str | None,
+        description: str | None,
+        imgAltText: str | None,  # noqa: N803
+        NSFW: bool | None,  # noqa: N803
+        imgSrc: str | None,  # noqa: N803
+        date: datetime.date | None,
+        links: list[str | None],
+        tags: list[str | None],
+        day: int | None,
+        month: int | None,
+        langcode: str = "",
+        base_event_url: str | None = None,
+        base_event_img_url: str | None = None,
+    ) -> Self:
+        """
+        Create an event from the typed values of its fields.
+
+        Unlike `Event(event_data)`, the values are not parsed nor validated,
+        so it is used to hydrate the events from trusted sources, like the
+        rows of the local database.
+
+        .. versionadded:: 0.8.0
+
+        Parameters
+        ----------
+        id, title, slugTitle, otd, description, imgAltText, imgSrc : str
+            The text fields of the event, or None.
+        NSFW : Optional[bool]
+            The event image is not safe for work.
+        date : Optional[datetime.date]
+            The date of the event.
+        links, tags : list[Optional[str]]
+            The links and tags of the event.
+        day, month : Optional[int]
+            The day and month of the event.
+        langcode : str, optional
+            The ISO 639-2 language code of the event. The default is "".
+        base_event_url : Optional[str], optional
+            The base/common URL shared for the events. The default is
+            apc_lb_conf.supabase.base_event_url.
+        base_event_img_url : Optional[str], optional
+            The base/common URLs shared for the images. The default is
+            apc_lb_conf.supabase.base_event_img_url.
+
+        Returns
+        -------
+        Event
+            The event.
+
+        """
+        event = cls.__new__(cls)
+        set_ = object.__setattr__
+        for field, value in zip(
+            EVENT_FIELDS,
+            (
+                id,
+                title,
+                slugTitle,
+                otd,
+                description,
+                imgAltText,
+                NSFW,
+                imgSrc,
+                date,
+                links,
+                tags,
+                day,
+                month,
+                langcode,
+                base_event_url
+                if base_event_url is not None
+                else apc_lb_conf.supabase.base_event_url,
+                base_event_img_url
+                if base_event_img_url is not None
+                else apc_lb_conf.supabase.base_event_img_url,
+            ),
+            strict=True,
+        ):
+            set_(event, field, value)
+        set_(event, "_extra", {})
+        set_(event, "_key", None)
+        set_(event, "_parts", None)
+        set_(event, "_content", None)
+        return event
+
+    def __setattr__(self, name: str, value: Any) -> None:  # noqa: ANN401
+        """Set an attribute, invalidating the cached canonical tuple/content."""
+        if name.startswith("_"):
+            object.__setattr__(self, name, value)
+            return
+        if name in _SCHEMA:
+            object.__setattr__(self, name, value)
+        else:
+            self._extra[name] = value
+        for cache in ("_key", "_parts", "_content"):
+            object.__setattr__(self, cache, None)
+
+    def __getattr__(self, name: str) -> Any:  # noqa: ANN401
+        """Get the unexpected keys of the event data as attributes."""
+        try:
+            return object.__getattribute__(self, "_extra")[name]
+        except KeyError:
+            msg = f"'Event' object has no attribute '{name}'"
+            raise AttributeError(msg) from None
+
+    def as_dict(self) -> dict[str, Any]:
+        """
+        Get the event data as a dictionary.
+
+        The event fields come first, in the order of `EVENT_FIELDS`, followed
+        by the unexpected keys of the event data.
+
+        .. versionadded:: 0.8.0
+
+        Returns
+        -------
+        dict[str, Any]
+            The event data.
+
+        """
+        ret = {field: getattr(self, field) for field in EVENT_FIELDS}
+        ret.update(self._extra)
+        return ret
+
+    def _canonical(self) -> tuple[Any, ...]:
+        """Return the cached canonical tuple used to compare and hash."""
+        if self._key is None:
+            object.__setattr__(
+                self,
+                "_key",
+                (
+                    *(_freeze(getattr(self, field)) for field in EVENT_FIELDS),
+                    _freeze(self._extra),
+                ),
+            )
+        return self._key  # type: ignore[return-value]
 
     def json(self) -> str:
         """
@@ -146,7 +470,23 @@ class Event:
             The serialized str of the event.
 
         """
-        return json.dumps(self.__dict__, indent=4, default=str)
+        return json.dumps(self.as_dict(), indent=4, default=str)
+
+    def json_line(self) -> str:
+        """
+        Get a compact serialization of the event in one line.
+
+        It is a JSON Lines record, see `apc_lemmy_bot.event.json_line`.
+
+        .. versionadded:: 0.8.0
+
+        Returns
+        -------
+        str
+            The serialized str of the event.
+
+        """
+        return json_line(self.as_dict())
 
     def get_event_url(self) -> str:
         """
@@ -181,6 +521,10 @@ class Event:
         .. versionchanged:: 0.7.0
            It returns the text before the latest dot+space.
 
+        .. versionchanged:: 0.8.0
+           The abbreviations are found in one pass and they depend on the
+           `langcode` (see `ABBREVIATIONS`).
+
         Parameters
         ----------
         max_length : Optional[int], optional
@@ -205,29 +549,32 @@ class Event:
         if not nice_title.endswith("..."):
             return nice_title  # Shorten that max_length
 
-        aux_title = nice_title
-        while True:
-            new_title = aux_title.rsplit(". ", 1)[0]
-            if not new_title.endswith(
-                (
-                    " Dr",
-                    " Mr",
-                    " Ms",
-                    " Sr",
-                    " U.S",
-                    " U.S.A",
-                    " V",  # for Eugene V. Debs
-                )
-            ):
-                return new_title  # We have found a full sentence
-            if new_title == aux_title:  # Cannot be split
-                return nice_title  # Return the original title
-            aux_title = new_title  # We try to split it another time
-
-    def nice_description(self) -> str:
+        # We look for the latest dot+space that is not after an abbreviation
+        # in the reversed title:
+        sentence_end = _sentence_end_pattern(
+            ABBREVIATIONS.get(self.langcode.upper(), ABBREVIATIONS[""]),
+        ).search(nice_title[::-1])
+        if sentence_end is None:  # Cannot be split
+            return nice_title  # Return the original title
+        # We have found a full sentence:
+        return nice_title[: len(nice_title) - sentence_end.end()]
+
+    def nice_description(self, profile: str = "default") -> str:
         """
         Improved description to be added in a Lemmy post.
 
+        The characters of the escaping `profile` are replaced and the
+        quotation at the end of the description is formatted.
+
+        .. versionchanged:: 0.8.0
+           The `profile` parameter.
+
+        Parameters
+        ----------
+        profile : str, optional
+            The name of the escaping profile in `ESCAPE_PROFILES`. The default
+            is "default".
+
         Returns
         -------
         str
@@ -236,94 +583,119 @@ class Event:
         """
         if not self.description:
             return ""
-        # Replace asterisks * with heavy asterisk ✱
-        nice_desc = self.description.replace("*", "✱")
-        # Replace underscore _ with full-with low line: U+FF3F
-        nice_desc = nice_desc.replace("_", chr(0xFF3F))
-        # Replace grave accent ` with apostrophe '
-        nice_desc = nice_desc.replace("`", "'")
+        nice_desc = self.description
+        for char, replacement in ESCAPE_PROFILES[profile]:
+            nice_desc = nice_desc.replace(char, replacement)
 
         # Improve quotation text at end of the description:
-        text = nice_desc.split("\n\n")
-        if (
-            len(text) > 1
-            and text[-1].startswith("- ")
-            and text[-2].startswith('"')
-            and text[-2].endswith('"')
-        ):
-            text[-2] = f"> *{text[-2]}*"
-            text[-1] = f"> `{text[-1]}`"
-            nice_desc = "\n\n".join(text[:-1])
-            nice_desc = f"{nice_desc}\n> \n{text[-1]}"
+        head, sep, author = _last_paragraph(nice_desc)
+        if sep and author.startswith("- "):
+            head, sep, quote = _last_paragraph(head)
+            if quote.startswith('"') and quote.endswith('"'):
+                return f"{head}{sep}> *{quote}*\n> \n> `{author}`"
         return nice_desc
 
-    def get_content(self) -> str:
+    def _content_parts(self, profile: str) -> tuple[str, str]:
+        """Return the cached parts of the content before/after the image."""
+        if self._parts is None:
+            object.__setattr__(self, "_parts", {})
+        parts = self._parts.get(profile)  # type: ignore[union-attr]
+        if parts is not None:
+            return parts
+
+        head = [f"## {self.title}\n\n"]
+        if self.date:
+            head.append(f"### {self.date.strftime('%a %b %d, %Y')}\n")
+
+        tail = [self.nice_description(profile), "\n\n---\n"]
+        if self.date is not None:
+            tail.append(f"- Date: {self.date}\n")
+        if len(self.links) > 0:
+            tail += (
+                "- Learn More: ",
+                ", ".join(
+                    f"[{urlsplit(link).netloc!s}]({link})"
+                    for link in self.links
+                ),
+                ".\n",
+            )
+        if len(self.tags) > 0:
+            tail.append("- Tags: ")
+            last = len(self.tags) - 1
+            for i, tag in enumerate(self.tags):
+                if not isinstance(tag, str):
+                    continue
+                tag_ = tag.replace(" ", "")
+                tail += (
+                    (
+                        f"[#{tag_}](/search?q=%23{tag_}&type=Posts"
+                        "&listingType=All&page=1&sort=New)"
+                    ),
+                    ", " if i < last else ".",
+                )
+            tail.append("\n")
+        event_url = self.get_event_url()
+        tail.append(f"- Source: [{urlsplit(event_url).netloc}]({event_url})")
+
+        parts = ("".join(head), "".join(tail))
+        self._parts[profile] = parts  # type: ignore[index]
+        return parts
+
+    def get_content(
+        self,
+        image_url: str | None = None,
+        profile: str = "default",
+    ) -> str:
         """
         Return a formatted message content of the event.
 
-        It contains markdown formatted text.
+        It contains markdown formatted text. The content is rendered once per
+        image URL and escaping profile, and it is cached until a field of the
+        event is set.
+
+        .. versionchanged:: 5.5.1
+           Remove spaces from tags and their search link.
+
+        .. versionchanged:: 0.8.0
+           The content is cached and it accepts the `image_url` and the
+           escaping `profile` of a target instance.
+
+        Parameters
+        ----------
+        image_url : Optional[str], optional
+            The URL of the image, e.g.: the image uploaded to a target
+            instance. The default is `self.get_image_url()`.
+        profile : str, optional
+            The name of the escaping profile of the description in
+            `ESCAPE_PROFILES`. The default is "default".
 
         Returns
         -------
         str
             The event content.
 
-        .. versionchanged:: 5.5.1
-           Remove spaces from tags and their search link.
-
         """
-        ret = f"## {self.title}\n\n"
-
-        if self.date:
-            ret += f"### {self.date.strftime('%a %b %d, %Y')}\n"
-
-        if self.get_image_url() is not None:
-            if self.NSFW:
-                ret += "::: spoiler Image (NSFW):\n"
-            ret += f"![Image]({self.get_image_url()})\n"
+        if image_url is None:
+            image_url = self.get_image_url()
+        if self._content is None:
+            object.__setattr__(self, "_content", {})
+        content = self._content.get((image_url, profile))  # type: ignore[union-attr]
+        if content is not None:
+            return content
+
+        head, tail = self._content_parts(profile)
+        image = ""
+        if image_url is not None:
+            image = f"![Image]({image_url})\n"
             if self.NSFW:
-                ret += ":::\n"
+                image = f"::: spoiler Image (NSFW):\n{image}:::\n"
             if self.imgAltText is not None:
-                ret += f"\nImage: *{self.imgAltText}*\n"
-            ret += "\n---\n"
+                image += f"\nImage: *{self.imgAltText}*\n"
+            image += "\n---\n"
 
-        ret += self.nice_description() + "\n\n---\n"
-
-        if self.date is not None:
-            ret += f"- Date: {self.date}\n"
-
-        if len(self.links) > 0:
-            ret += "- Learn More: "
-            for i, link in enumerate(self.links):
-                ret += f"[{urlsplit(link).netloc!s}]({link})"
-                if i < len(self.links) - 1:
-                    ret += ", "
-                else:
-                    ret += "."
-            ret += "\n"
-
-        if len(self.tags) > 0:
-            ret += "- Tags: "
-            for i, tag in enumerate(self.tags):
-                if not isinstance(tag, str):
-                    continue
-                ret += (
-                    f"[#{tag.replace(' ', '')}](/search?q=%23"
-                    f"{tag.replace(' ', '')}&type=Posts&listingType=All&page=1"
-                    "&sort=New)"
-                )
-                if i < len(self.tags) - 1:
-                    ret += ", "
-                else:
-                    ret += "."
-            ret += "\n"
-
-        ret += (
-            f"- Source: [{urlsplit(self.get_event_url()).netloc}]"
-            f"({self.get_event_url()})"
-        )
-
-        return ret
+        content = f"{head}{image}{tail}"
+        self._content[(image_url, profile)] = content  # type: ignore[index]
+        return content
 
     def __eq__(self, other: object) -> bool:
         """
@@ -342,7 +714,7 @@ class Event:
         """
         if not isinstance(other, Event):
             return NotImplemented
-        return self.__dict__ == other.__dict__
+        return self._canonical() == other._canonical()
 
     def __hash__(self) -> int:
         """
@@ -351,10 +723,16 @@ class Event:
         Returns
         -------
         int
-            The hashed integer of the representation of the object __dict__.
+            The hashed integer of the canonical tuple of the event data.
 
         """
-        return hash(repr(self.__dict__))
+        return hash(self._canonical())
+
+
+@functools.cache
+def _supabase_client(url: str, key: str) -> Client:
+    """Return a Supabase client, created only once per url and key."""
+    return create_client(url, key)
 
 
 def get_dated_events(
@@ -403,7 +781,7 @@ def get_dated_events(
         base_event_img_url if base_event_img_url else ""
     )
 
-    supabase: Client = create_client(
+    supabase: Client = _supabase_client(
         apc_lb_conf.supabase.url,
         apc_lb_conf.supabase.key,
     )
@@ -420,4 +798,5 @@ def get_dated_events(
     return [
         Event(ev, base_event_url, base_event_img_url, force_langcode)
         for ev in response.data
+        if isinstance(ev, dict)
     ]
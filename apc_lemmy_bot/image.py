@@ -0,0 +1,120 @@
+#    Copyright (C) 2025 Carles Muñoz Gorriz <carlesmu@internautas.org>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as
+#    published by the Free Software Foundation, either version 3 of the
+#    License, or (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+apc_lemmy_bot image module.
+
+Optional optimization of the images before they are uploaded to a Lemmy
+instance. It requires `Pillow`; install it with the `image` extra.
+"""
+
+import io
+
+try:
+    from PIL import Image as PillowImage
+except ImportError:  # pragma: no cover
+    PillowImage = None  # type: ignore[assignment]
+
+from apc_lemmy_bot import apc_lb_conf
+
+IMAGE_FORMATS: dict[str, str] = {
+    "webp": ".webp",
+    "jpeg": ".jpg",
+}
+
+
+class ImageError(Exception):
+    """Exception raised for errors optimizing images."""
+
+
+def optimization_available() -> bool:
+    """
+    Return if the image optimization can be done.
+
+    Returns
+    -------
+    bool
+        True if `Pillow` is installed.
+
+    """
+    return PillowImage is not None
+
+
+def optimize_image(
+    img: bytes,
+    max_dimension: int | None = None,
+    img_format: str | None = None,
+    quality: int | None = None,
+) -> bytes:
+    """
+    Downscale and re-encode an image.
+
+    Parameters
+    ----------
+    img : bytes
+        The original image.
+    max_dimension : Optional[int], optional
+        The maximum width or height of the image. The default is
+        `apc_lb_conf.image.max_dimension`.
+    img_format : Optional[str], optional
+        The output format, `webp` or `jpeg`. The default is
+        `apc_lb_conf.image.format`.
+    quality : Optional[int], optional
+        The encoder quality (1-100). The default is
+        `apc_lb_conf.image.quality`.
+
+    Raises
+    ------
+    ImageError
+        If `Pillow` is not installed, the format is not supported or the image
+        cannot be decoded.
+
+    Returns
+    -------
+    bytes
+        The optimized image.
+
+    """
+    if PillowImage is None:
+        msg = "Sorry, image optimization requires Pillow."
+        raise ImageError(msg)
+
+    max_dimension = max_dimension or apc_lb_conf.image.max_dimension
+    img_format = (img_format or apc_lb_conf.image.format).lower()
+    quality = quality or apc_lb_conf.image.quality
+    if img_format not in IMAGE_FORMATS:
+        msg = f"Sorry, unsupported image format '{img_format}'."
+        raise ImageError(msg)
+
+    try:
+        with PillowImage.open(io.BytesIO(img)) as pil_img:
+            pil_img.thumbnail(
+                (max_dimension, max_dimension),
+                PillowImage.Resampling.LANCZOS,
+            )
+            to_save: PillowImage.Image = pil_img
+            if img_format == "jpeg" and pil_img.mode not in {"RGB", "L"}:
+                to_save = pil_img.convert("RGB")
+            out = io.BytesIO()
+            to_save.save(
+                out,
+                format=img_format,
+                quality=quality,
+                optimize=True,
+            )
+    except (OSError, ValueError) as err:
+        msg = f"Sorry, cannot optimize the image: {err}"
+        raise ImageError(msg) from err
+
+    return out.getvalue()
@@ -14,20 +14,306 @@
 #    along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """apc_lemmy_bot Lemmy module."""
 
+import base64
+import binascii
+import concurrent.futures
+import contextlib
+import datetime
+import email.utils
+import hashlib
+import json
+import os
+import random
+import secrets
+import sqlite3
+import threading
+import time
+import urllib.parse
 import warnings
-from typing import Any
+from collections.abc import Callable
+from dataclasses import dataclass
+from http import HTTPStatus
+from pathlib import Path
+from typing import Any, BinaryIO, Protocol, TypeVar
 
+import requests
 from pythorhead import Lemmy
-from pythorhead.types import LanguageType
+from pythorhead.requestor import Request
+from pythorhead.types import LanguageType, SortType
 
-from apc_lemmy_bot import LEMMY_MAX_TITLE_LENGTH, apc_lb_conf
-from apc_lemmy_bot.event import Event
+from apc_lemmy_bot import LEMMY_MAX_TITLE_LENGTH, apc_lb_conf, transport
+from apc_lemmy_bot.event import ESCAPE_PROFILES, Event
+
+T = TypeVar("T")
 
 
 class LemmyError(Exception):
     """Exception raised for errors connecting to the Lemmy instance."""
 
 
+class RateLimiter:
+    """
+    A token bucket rate limiter of the requests to the Lemmy instances.
+
+    There is a bucket per instance. Its state is kept in a SQLite file, so
+    all the bot processes of the host share the same budget.
+    """
+
+    def __init__(
+        self,
+        path: str | None = None,
+        rate: float | None = None,
+        burst: int | None = None,
+        limits: list[tuple[str, float, int]] | None = None,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        """
+        Initialize a RateLimiter object.
+
+        Parameters
+        ----------
+        path : Optional[str], optional
+            The SQLite file with the buckets. The default is
+            `apc_lb_conf.lemmy.rate_limit_file` or `apc_lemmy_bot/rate.sqlite`
+            in the state directory of the user (`$XDG_STATE_HOME` or
+            `~/.local/state`).
+        rate : Optional[float], optional
+            Requests per second. The default is `apc_lb_conf.lemmy.rate`.
+        burst : Optional[int], optional
+            Requests allowed at once. The default is
+            `apc_lb_conf.lemmy.burst`.
+        limits : Optional[list[tuple[str, float, int]]], optional
+            The (instance, rate, burst) of the instances with other limits.
+            The default is `apc_lb_conf.lemmy.rate_limits`.
+        sleep : Callable[[float], None], optional
+            The function used to wait. The default is `time.sleep`.
+
+        """
+        self.path: str | None = path
+        self.rate: float | None = rate
+        self.burst: int | None = burst
+        self.limits: list[tuple[str, float, int]] | None = limits
+        self.sleep: Callable[[float], None] = sleep
+
+    @staticmethod
+    def _bucket(instance: str) -> str:
+        """Return the bucket name of an instance."""
+        return instance.strip().rstrip("/").lower()
+
+    def _path(self) -> str:
+        """Return the path of the SQLite file."""
+        if self.path:
+            return self.path
+        if apc_lb_conf.lemmy.rate_limit_file:
+            return apc_lb_conf.lemmy.rate_limit_file
+        # Shared by the processes of the user, but not with other users:
+        state = Path(
+            os.environ.get("XDG_STATE_HOME")
+            or Path.home() / ".local" / "state",
+        )
+        path = state / "apc_lemmy_bot" / "rate.sqlite"
+        path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        return str(path)
+
+    @staticmethod
+    def _connect(path: str) -> sqlite3.Connection:
+        """Connect to the SQLite file, creating it only readable by us."""
+        with contextlib.suppress(FileExistsError):
+            os.close(
+                os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+            )
+        return sqlite3.connect(path, timeout=30, isolation_level=None)
+
+    def get_limit(self, instance: str) -> tuple[float, int]:
+        """Return the (rate, burst) of an instance."""
+        bucket = self._bucket(instance)
+        limits = (
+            self.limits
+            if self.limits is not None
+            else (apc_lb_conf.lemmy.rate_limits)
+        )
+        limit = {self._bucket(x[0]): (x[1], x[2]) for x in limits}
+        # "*" sets the limit of all the instances:
+        if (rate_burst := limit.get(bucket, limit.get("*"))) is not None:
+            return rate_burst
+        return (
+            self.rate if self.rate is not None else apc_lb_conf.lemmy.rate,
+            self.burst if self.burst is not None else apc_lb_conf.lemmy.burst,
+        )
+
+    def try_acquire(self, instance: str, tokens: int = 1) -> float:
+        """
+        Try to take tokens from the bucket of an instance.
+
+        Parameters
+        ----------
+        instance : str
+            The Lemmy instance URL.
+        tokens : int, optional
+            The number of requests. The default is 1.
+
+        Returns
+        -------
+        float
+            0 if the tokens were taken, or the seconds to wait for them.
+
+        """
+        rate, burst = self.get_limit(instance)
+        if rate <= 0:  # Not limited
+            return 0.0
+        tokens = min(tokens, max(burst, 1))
+        bucket = self._bucket(instance)
+        with contextlib.closing(self._connect(self._path())) as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS buckets "
+                "(instance TEXT PRIMARY KEY, tokens REAL, updated REAL)",
+            )
+            # The write lock is held until the bucket is updated:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                row = conn.execute(
+                    "SELECT tokens, updated FROM buckets WHERE instance = ?",
+                    (bucket,),
+                ).fetchone()
+                available = (
+                    float(burst)
+                    if row is None
+                    else min(
+                        float(burst),
+                        row[0] + max(0.0, now - row[1]) * rate,
+                    )
+                )
+                wait = 0.0
+                if available >= tokens:
+                    available -= tokens
+                else:
+                    wait = (tokens - available) / rate
+                conn.execute(
+                    "INSERT OR REPLACE INTO buckets VALUES (?, ?, ?)",
+                    (bucket, available, now),
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return wait
+
+    def acquire(self, instance: str, tokens: int = 1) -> None:
+        """
+        Wait until tokens can be taken from the bucket of an instance.
+
+        Parameters
+        ----------
+        instance : str
+            The Lemmy instance URL.
+        tokens : int, optional
+            The number of requests. The default is 1.
+
+        Returns
+        -------
+        None
+
+        """
+        while (wait := self.try_acquire(instance, tokens)) > 0:
+            self.sleep(wait)
+
+
+def parse_rate_limit(value: str) -> tuple[str, float, int]:
+    """
+    Parse a 'INSTANCE,RATE,BURST' rate limit.
+
+    Parameters
+    ----------
+    value : str
+        The rate limit (e.g.: `https://lemmy.ml,0.5,3`). The instance `*`
+        sets the limit of all the instances.
+
+    Raises
+    ------
+    ValueError
+        If the string has not the right format.
+
+    Returns
+    -------
+    tuple[str, float, int]
+        The instance, the requests per second and the burst.
+
+    """
+    parts = [part.strip() for part in value.split(",")]
+    try:
+        instance, rate, burst = parts[0], float(parts[1]), int(parts[2])
+    except (IndexError, ValueError) as err:
+        msg = f"It should be 'INSTANCE,RATE,BURST', not '{value}'"
+        raise ValueError(msg) from err
+    if len(parts) != 3 or not instance or rate < 0 or burst < 1:  # noqa: PLR2004
+        msg = f"It should be 'INSTANCE,RATE,BURST', not '{value}'"
+        raise ValueError(msg)
+    return instance, rate, burst
+
+
+def parse_escape_profile(value: str) -> tuple[str, str]:
+    """
+    Parse a 'INSTANCE,PROFILE' escaping profile of the posts.
+
+    Parameters
+    ----------
+    value : str
+        The escaping profile (e.g.: `https://lemmy.ml,backslash`), where the
+        profile is a key of `apc_lemmy_bot.event.ESCAPE_PROFILES`. The
+        instance `*` sets the profile of all the instances.
+
+    Raises
+    ------
+    ValueError
+        If the string has not the right format or the profile is unknown.
+
+    Returns
+    -------
+    tuple[str, str]
+        The instance and the profile.
+
+    """
+    instance, _, profile = (part.strip() for part in value.partition(","))
+    if not instance or profile not in ESCAPE_PROFILES:
+        msg = (
+            f"It should be 'INSTANCE,PROFILE', with PROFILE in "
+            f"{', '.join(ESCAPE_PROFILES)}, not '{value}'"
+        )
+        raise ValueError(msg)
+    return instance, profile
+
+
+def escape_profile(instance: str) -> str:
+    """
+    Return the escaping profile of the posts in an instance.
+
+    It is configured in `apc_lb_conf.lemmy.escape_profiles`.
+
+    Parameters
+    ----------
+    instance : str
+        The Lemmy instance URL.
+
+    Returns
+    -------
+    str
+        The name of the profile in `apc_lemmy_bot.event.ESCAPE_PROFILES`.
+
+    """
+    bucket = RateLimiter._bucket  # noqa: SLF001
+    profiles = {
+        bucket(x_instance): x_profile
+        for x_instance, x_profile in apc_lb_conf.lemmy.escape_profiles
+    }
+    # "*" sets the profile of all the instances:
+    return profiles.get(bucket(instance), profiles.get("*", "default"))
+
+
+# The rate limiter of all the requests to the Lemmy instances:
+rate_limiter: RateLimiter = RateLimiter()
+
+
 def login(
     instance: str = apc_lb_conf.lemmy.user,
     user: str = apc_lb_conf.lemmy.user,
@@ -38,7 +324,17 @@ def login(
     apc_lb_conf.lemmy.user = user
     apc_lb_conf.lemmy.password = password
 
-    lemmy = Lemmy(instance, raise_exceptions=True, request_timeout=10)
+    return _login(instance, user, password)
+
+
+def _login(instance: str, user: str, password: str) -> Lemmy:
+    """Login into a Lemmy instance without changing the configuration."""
+    rate_limiter.acquire(instance, tokens=2)  # nodeinfo and login
+    lemmy = Lemmy(
+        instance,
+        raise_exceptions=True,
+        request_timeout=apc_lb_conf.http.timeout,
+    )
     if not lemmy.nodeinfo:
         msg = f"Sorry, cannot connect to the Lemmy instance {instance}."
         raise LemmyError(msg)
@@ -53,16 +349,337 @@ def login(
     return lemmy
 
 
-def upload_img(lemmy: Lemmy, file_name: str) -> str:
+def _http_response(err: BaseException) -> requests.Response | None:
     """
-    Upload a image to a Lemmy instance.
+    Return the HTTP response of an error or of its causes, if any.
+
+    pythorhead raises a bare `Exception` ending with the text of the failed
+    response, that is the last failed response of the thread when pythorhead
+    uses the shared session (see `transport.use_in_pythorhead`). It can be
+    the cause of the error, e.g. of a `LemmyError` raised after the retries.
+    """
+    last_response = transport.last_error_response()
+    cause: BaseException | None = err
+    while cause is not None:
+        response = getattr(cause, "response", None)
+        if isinstance(response, requests.Response):
+            return response
+        if (
+            last_response is not None
+            and type(cause) is Exception
+            and str(cause).endswith(f": {last_response.text}")
+        ):
+            return last_response
+        cause = cause.__cause__
+    return None
+
+
+def _http_status(err: BaseException) -> int | None:
+    """Return the HTTP status code of an error, if it's known."""
+    response = _http_response(err)
+    return response.status_code if response is not None else None
+
+
+def _is_auth_error(err: Exception) -> bool:
+    """Return if the error is due to a missing or expired login."""
+    if _http_status(err) == HTTPStatus.UNAUTHORIZED:
+        return True
+    # Some Lemmy versions reject the token with a 400 "not_logged_in":
+    return "not_logged_in" in str(err)
+
+
+def _jwt_expired(token: str) -> bool:
+    """
+    Return if a JWT has expired.
+
+    Lemmy tokens usually don't have an `exp` claim: they are valid until the
+    instance rejects them.
+    """
+    try:
+        payload = token.split(".")[1]
+        claims = json.loads(
+            base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)),
+        )
+    except (IndexError, ValueError, binascii.Error):
+        return False
+    if not isinstance(claims, dict) or "exp" not in claims:
+        return False
+    return bool(
+        claims["exp"] <= datetime.datetime.now(tz=datetime.UTC).timestamp(),
+    )
+
+
+class LemmySession:
+    """
+    A Lemmy login reused between posts.
+
+    It logs in once, and again only when the token has expired or when the
+    instance rejects it. The token can be cached in a file to reuse it
+    between runs.
+    """
+
+    def __init__(
+        self,
+        instance: str | None = None,
+        user: str | None = None,
+        password: str | None = None,
+        token_cache: str | None = None,
+    ) -> None:
+        """
+        Initialize a LemmySession object.
+
+        Parameters
+        ----------
+        instance : Optional[str], optional
+            The Lemmy instance URL. The default is apc_lb_conf.lemmy.instance.
+        user : Optional[str], optional
+            The Lemmy user. The default is apc_lb_conf.lemmy.user.
+        password : Optional[str], optional
+            The Lemmy user password. The default is
+            apc_lb_conf.lemmy.password.
+        token_cache : Optional[str], optional
+            The path of the file where the tokens are cached, or "" to not
+            cache them. The default is apc_lb_conf.lemmy.token_cache.
+
+        """
+        self.instance: str = instance or apc_lb_conf.lemmy.instance
+        self.user: str = user or apc_lb_conf.lemmy.user
+        self.password: str = (
+            password if password is not None else apc_lb_conf.lemmy.password
+        )
+        self.token_cache: str = (
+            token_cache
+            if token_cache is not None
+            else apc_lb_conf.lemmy.token_cache
+        )
+        self._lemmy: Lemmy | None = None
+        self._token: str | None = None
+        self._lock = threading.RLock()
+
+    @property
+    def _cache_key(self) -> str:
+        return f"{self.user}@{self.instance}"
+
+    def _read_token_cache(self) -> dict[str, Any]:
+        """Read the token cache file."""
+        if not self.token_cache:
+            return {}
+        try:
+            cache = json.loads(Path(self.token_cache).read_text("utf-8"))
+        except (OSError, ValueError):
+            return {}
+        return cache if isinstance(cache, dict) else {}
+
+    def _write_token_cache(self, token: str | None) -> None:
+        """Store (or remove if None) our token in the token cache file."""
+        if not self.token_cache:
+            return
+        cache = self._read_token_cache()
+        if token is None:
+            cache.pop(self._cache_key, None)
+        else:
+            cache[self._cache_key] = {
+                "jwt": token,
+                "timestamp": f"{datetime.datetime.now(tz=datetime.UTC)}",
+            }
+        path = Path(self.token_cache)
+        tmp_path = path.with_name(
+            f"{path.name}.{os.getpid()}.{secrets.token_hex(4)}.tmp",
+        )
+        try:
+            # Created only readable by us, it's never readable by others:
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as tmp_file:
+                    tmp_file.write(json.dumps(cache))
+                tmp_path.replace(path)
+            except OSError:
+                tmp_path.unlink(missing_ok=True)
+                raise
+        except OSError as err:
+            warnings.warn(
+                f"Cannot write the token cache '{path}': {err}",
+                stacklevel=2,
+            )
+
+    def _restore(self) -> Lemmy | None:
+        """Create a Lemmy object using a cached token."""
+        cached = self._read_token_cache().get(self._cache_key)
+        if not isinstance(cached, dict) or not cached.get("jwt"):
+            return None
+        token = str(cached["jwt"])
+        if _jwt_expired(token):
+            return None
+
+        rate_limiter.acquire(self.instance)  # nodeinfo
+        lemmy = Lemmy(
+            self.instance,
+            raise_exceptions=True,
+            request_timeout=apc_lb_conf.http.timeout,
+        )
+        if not lemmy.nodeinfo:
+            msg = (
+                f"Sorry, cannot connect to the Lemmy instance {self.instance}."
+            )
+            raise LemmyError(msg)
+        # pylint: disable=W0212  # protected-access
+        lemmy._requestor._auth.set_token(token)  # noqa: SLF001
+        lemmy._requestor.logged_in_username = self.user  # noqa: SLF001
+        lemmy._requestor.current_password = self.password  # noqa: SLF001
+        self._token = token
+        return lemmy
+
+    def login(self, force: bool = False) -> Lemmy:
+        """
+        Return a logged Lemmy object.
+
+        Parameters
+        ----------
+        force : bool, optional
+            Login again even if we have a valid token. The default is False.
+
+        Raises
+        ------
+        LemmyError
+            If we cannot login.
+
+        Returns
+        -------
+        Lemmy
+            The logged Lemmy object.
+
+        """
+        with self._lock:
+            if (
+                not force
+                and self._lemmy is not None
+                and self._token is not None
+                and not _jwt_expired(self._token)
+            ):
+                return self._lemmy
+
+            if not force and (lemmy := self._restore()) is not None:
+                self._lemmy = lemmy
+                return lemmy
+
+            self._lemmy = _login(self.instance, self.user, self.password)
+            # pylint: disable=W0212  # protected-access
+            self._token = self._lemmy._requestor._auth.token  # noqa: SLF001
+            self._write_token_cache(self._token)
+            return self._lemmy
+
+    def invalidate(self) -> None:
+        """Forget the current login and its cached token."""
+        with self._lock:
+            self._lemmy = None
+            self._token = None
+            self._write_token_cache(None)
+
+    def call(
+        self, func: Callable[..., T], *args: object, **kwargs: object
+    ) -> T:
+        """
+        Call `func(*args, lemmy=lemmy, **kwargs)` with a logged Lemmy object.
+
+        If the instance rejects our token, we login again and repeat the call
+        once.
+
+        Returns
+        -------
+        T
+            The value returned by `func`.
+
+        """
+        try:
+            return func(*args, lemmy=self.login(), **kwargs)
+        except Exception as err:
+            if not _is_auth_error(err):
+                raise
+            self.invalidate()
+            return func(*args, lemmy=self.login(force=True), **kwargs)
+
+
+_sessions: dict[tuple[str, str], LemmySession] = {}
+
+
+def get_session(
+    instance: str | None = None,
+    user: str | None = None,
+    password: str | None = None,
+) -> LemmySession:
+    """
+    Get the shared session of a user in a Lemmy instance.
+
+    Parameters
+    ----------
+    instance : Optional[str], optional
+        The Lemmy instance URL. The default is apc_lb_conf.lemmy.instance.
+    user : Optional[str], optional
+        The Lemmy user. The default is apc_lb_conf.lemmy.user.
+    password : Optional[str], optional
+        The Lemmy user password. The default is apc_lb_conf.lemmy.password.
+
+    Returns
+    -------
+    LemmySession
+        The session, created the first time.
+
+    """
+    session = LemmySession(instance, user, password)
+    key = (session.instance, session.user)
+    if key not in _sessions or _sessions[key].password != session.password:
+        _sessions[key] = session
+    return _sessions[key]
+
+
+def _upload_pictrs(
+    lemmy: Lemmy,
+    image: bytes | bytearray | memoryview | BinaryIO,
+    name: str,
+) -> list[dict[str, str]] | None:
+    """
+    Upload an image to the pict-rs of a Lemmy instance.
+
+    It's like `pythorhead.image.Image.upload` but the image is sent from
+    memory or from an open file.
+    """
+    rate_limiter.acquire(_instance_of(lemmy))
+    # pylint: disable=W0212  # protected-access
+    requestor = lemmy._requestor  # noqa: SLF001
+    data = requestor.image(Request.POST, files={"images[]": (name, image)})
+    if not data or "files" not in data:
+        return None
+
+    image_url = requestor._auth.image_url  # noqa: SLF001
+    return [
+        {
+            "image_url": f"{image_url}/{file['file']}",
+            "delete_url": (
+                f"{image_url}/delete/{file['delete_token']}/{file['file']}"
+            ),
+        }
+        for file in data["files"]
+    ]
+
+
+def upload_img_urls(
+    lemmy: Lemmy,
+    image: str | bytes | bytearray | memoryview | BinaryIO,
+    name: str | None = None,
+) -> tuple[str, str]:
+    """
+    Upload a image to a Lemmy instance and return its URLs.
 
     Parameters
     ----------
     lemmy : Lemmy
         The Lemmy instance that we get after login to it.
-    file_name : str
-        The image path to upload to the Lemmy instance.
+    image : str | bytes | bytearray | memoryview | BinaryIO
+        The image path, the image itself or a binary file object to upload to
+        the Lemmy instance.
+    name : Optional[str], optional
+        The file name sent with the image. The default is the path, or "image"
+        for the other image types.
 
     Raises
     ------
@@ -71,13 +688,20 @@ def upload_img(lemmy: Lemmy, file_name: str) -> str:
 
     Returns
     -------
-    str
-        The url of the uploaded image.
+    tuple[str, str]
+        The url of the uploaded image and the url to delete it.
 
     """
-    uploaded = lemmy.image.upload(file_name)
+    if isinstance(image, str):
+        name = name or Path(image).name
+        with Path(image).open("rb") as img_file:
+            uploaded = _upload_pictrs(lemmy, img_file, name)
+    else:
+        name = name or "image"
+        uploaded = _upload_pictrs(lemmy, image, name)
+
     if not uploaded:
-        msg = f"Sorry, cannot upload {file_name}."
+        msg = f"Sorry, cannot upload {name}."
         raise LemmyError(msg)
 
     if (
@@ -85,10 +709,242 @@ def upload_img(lemmy: Lemmy, file_name: str) -> str:
         or "image_url" not in uploaded[0]
         or "delete_url" not in uploaded[0]
     ):
-        msg = f"Sorry, cannot upload {file_name}: {uploaded}"
+        msg = f"Sorry, cannot upload {name}: {uploaded}"
         raise LemmyError(msg)
     print(uploaded)
-    return f"{uploaded[0]['image_url']}"
+    return uploaded[0]["image_url"], uploaded[0]["delete_url"]
+
+
+def upload_img(
+    lemmy: Lemmy,
+    image: str | bytes | bytearray | memoryview | BinaryIO,
+    name: str | None = None,
+) -> str:
+    """
+    Upload a image to a Lemmy instance.
+
+    .. versionchanged:: 0.8.0
+       The image can be uploaded from memory or from a file object.
+
+    Parameters
+    ----------
+    lemmy : Lemmy
+        The Lemmy instance that we get after login to it.
+    image : str | bytes | bytearray | memoryview | BinaryIO
+        The image path, the image itself or a binary file object to upload to
+        the Lemmy instance.
+    name : Optional[str], optional
+        The file name sent with the image. The default is the path, or "image"
+        for the other image types.
+
+    Raises
+    ------
+    LemmyError
+        If the upload has failed.
+
+    Returns
+    -------
+    str
+        The url of the uploaded image.
+
+    """
+    return upload_img_urls(lemmy, image, name)[0]
+
+
+def image_exists(url: str, timeout: float | None = None) -> bool:
+    """
+    Check, with a HEAD request, if an uploaded image is still available.
+
+    Parameters
+    ----------
+    url : str
+        The image URL.
+    timeout : Optional[float], optional
+        Seconds to wait for the response. The default is
+        `apc_lb_conf.http.timeout`.
+
+    Returns
+    -------
+    bool
+        True if the image can be retrieved.
+
+    """
+    parts = urllib.parse.urlsplit(url)
+    rate_limiter.acquire(f"{parts.scheme}://{parts.netloc}")
+    try:
+        response = transport.request(
+            "HEAD",
+            url,
+            allow_redirects=True,
+            timeout=timeout
+            if timeout is not None
+            else apc_lb_conf.http.timeout,
+        )
+    except requests.RequestException:
+        return False
+    return bool(response.status_code == HTTPStatus.OK)
+
+
+# Errors returned by Lemmy when the community id is not valid anymore:
+_COMMUNITY_ERRORS: tuple[str, ...] = (
+    "couldnt_find_community",
+    "community_not_found",
+)
+
+
+def _is_community_error(err: Exception) -> bool:
+    """Return if the error is due to a wrong community id."""
+    return any(x in str(err) for x in _COMMUNITY_ERRORS)
+
+
+def _instance_of(lemmy: Lemmy) -> str:
+    """Return the URL of the instance of a Lemmy object."""
+    # pylint: disable=W0212  # protected-access
+    domain = lemmy._requestor.domain  # noqa: SLF001
+    return str(domain) if domain else apc_lb_conf.lemmy.instance
+
+
+class InfoStore(Protocol):
+    """A key/value store, like `apc_lemmy_bot.database.Database`."""
+
+    def get_info(self, key: str) -> str | None:
+        """Get a stored value."""
+
+    def set_info(self, key: str, value: str | None) -> None:
+        """Store (or remove if `value` is None) a value."""
+
+
+class CommunityCache:
+    """
+    A cache of the ids of the communities.
+
+    The ids are kept in memory and, if there is a store, persisted in it.
+    They are resolved again when they have expired or when a post fails with
+    a community error.
+    """
+
+    def __init__(
+        self,
+        ttl: int | None = None,
+        store: InfoStore | None = None,
+    ) -> None:
+        """
+        Initialize a CommunityCache object.
+
+        Parameters
+        ----------
+        ttl : Optional[int], optional
+            Seconds a community id is valid. The default is
+            `apc_lb_conf.lemmy.community_ttl`.
+        store : Optional[InfoStore], optional
+            Where the ids are persisted, usually the local database. The
+            default is None.
+
+        """
+        self.ttl: int | None = ttl
+        self.store: InfoStore | None = store
+        self._ids: dict[str, tuple[int, float]] = {}
+
+    @staticmethod
+    def _key(instance: str, community: str) -> str:
+        """Return the key (max 30 chars) of a community in an instance."""
+        digest = hashlib.sha1(
+            f"{instance}|{community}".encode(),
+            usedforsecurity=False,
+        ).hexdigest()
+        return f"community:{digest[:20]}"
+
+    def _get(self, key: str) -> int | None:
+        """Get a not expired id from memory or from the store."""
+        ttl = (
+            self.ttl
+            if self.ttl is not None
+            else apc_lb_conf.lemmy.community_ttl
+        )
+        cached = self._ids.get(key)
+        if cached is None and self.store is not None:
+            try:
+                stored = json.loads(self.store.get_info(key) or "null")
+                if stored:
+                    cached = (int(stored["id"]), float(stored["timestamp"]))
+                    self._ids[key] = cached
+            except (ValueError, TypeError, KeyError):
+                cached = None
+        if cached is None or cached[1] + ttl < time.time():
+            return None
+        return cached[0]
+
+    def _set(self, key: str, community_id: int | None) -> None:
+        """Store (or remove if None) an id in memory and in the store."""
+        if community_id is None:
+            self._ids.pop(key, None)
+            value = None
+        else:
+            self._ids[key] = (community_id, time.time())
+            value = json.dumps(
+                {"id": community_id, "timestamp": self._ids[key][1]},
+            )
+        if self.store is not None:
+            self.store.set_info(key, value)
+
+    def get(self, lemmy: Lemmy, community: str) -> int:
+        """
+        Get the id of a community, resolving it if it's not cached.
+
+        Parameters
+        ----------
+        lemmy : Lemmy
+            The Lemmy object used to resolve the community.
+        community : str
+            The community name (e.g.: `workingclasscalendar@lemmy.world`).
+
+        Raises
+        ------
+        LemmyError
+            If the community cannot be found.
+
+        Returns
+        -------
+        int
+            The community id in the instance.
+
+        """
+        key = self._key(_instance_of(lemmy), community)
+        if (community_id := self._get(key)) is not None:
+            return community_id
+
+        # pythorhead has its own cache, shared by all the instances:
+        # pylint: disable=W0212  # protected-access
+        lemmy._known_communities.pop(community, None)  # noqa: SLF001
+        rate_limiter.acquire(_instance_of(lemmy))
+        community_id = lemmy.discover_community(community)
+        if community_id is None:
+            msg = f"Sorry, cannot find community '{community}'"
+            raise LemmyError(msg)
+        self._set(key, int(community_id))
+        return int(community_id)
+
+    def invalidate(self, lemmy: Lemmy, community: str) -> None:
+        """
+        Forget the id of a community.
+
+        Parameters
+        ----------
+        lemmy : Lemmy
+            The Lemmy object of the instance of the community.
+        community : str
+            The community name.
+
+        Returns
+        -------
+        None
+
+        """
+        self._set(self._key(_instance_of(lemmy), community), None)
+
+
+# The community ids shared cache:
+community_cache: CommunityCache = CommunityCache()
 
 
 def _create_post(
@@ -113,20 +969,29 @@ def _create_post(
                 stacklevel=2,
             )
 
-    community_id = lemmy.discover_community(community)
-    if community_id is None:
-        msg = f"Sorry, cannot find community '{community}'"
-        raise LemmyError(msg)
+    def _create(community_id: int) -> dict[Any, Any] | None:
+        rate_limiter.acquire(_instance_of(lemmy))
+        created: dict[Any, Any] | None = lemmy.post.create(
+            community_id,
+            name=title,
+            url=url,
+            body=body,
+            nsfw=nsfw,
+            honeypot=honeypot,
+            language_id=language_id,
+        )
+        return created
 
-    created: dict[Any, Any] | None = lemmy.post.create(
-        community_id,
-        name=title,
-        url=url,
-        body=body,
-        nsfw=nsfw,
-        honeypot=honeypot,
-        language_id=language_id,
-    )
+    community_id = community_cache.get(lemmy, community)
+    try:
+        created = _create(community_id)
+    except Exception as err:
+        if not _is_community_error(err):
+            raise
+        # The cached id is not valid anymore, we resolve it again:
+        community_cache.invalidate(lemmy, community)
+        community_id = community_cache.get(lemmy, community)
+        created = _create(community_id)
 
     if not created:
         msg = (
@@ -137,6 +1002,156 @@ def _create_post(
     return created
 
 
+@dataclass
+class RetryPolicy:
+    """
+    How the failed requests to a Lemmy instance are retried.
+
+    The delay between tries grows exponentially, with some random jitter, and
+    it's never shorter than the `Retry-After` sent by the instance.
+    """
+
+    retries: int = 3  # tries, including the first one
+    base_delay: float = 2.0  # seconds
+    max_delay: float = 120.0  # seconds
+    jitter: float = 0.5  # fraction of the delay that can be random
+    sleep: Callable[[float], None] = time.sleep
+
+    def is_retryable(self, err: Exception) -> bool:
+        """
+        Return if a request that has failed with an error can be retried.
+
+        Parameters
+        ----------
+        err : Exception
+            The error.
+
+        Returns
+        -------
+        bool
+            False for errors that will fail again: our own errors, wrong
+            requests (HTTP 4xx except 408 and 429) and errors reported by the
+            Lemmy API.
+
+        """
+        if isinstance(err, LemmyError) or _is_auth_error(err):
+            return False
+        if _is_rate_limit_error(err):
+            return True
+        if (status := _http_status(err)) is not None:
+            return (
+                status >= HTTPStatus.INTERNAL_SERVER_ERROR
+                or status == HTTPStatus.REQUEST_TIMEOUT
+            )
+        # pythorhead errors with a Lemmy API error, like '{"error":"..."}':
+        return '"error"' not in str(err)
+
+    def delay(self, try_num: int, err: Exception | None = None) -> float:
+        """
+        Return the seconds to wait before the next try.
+
+        Parameters
+        ----------
+        try_num : int
+            The number of the failed try, starting at 1.
+        err : Optional[Exception], optional
+            The error of the failed try. The default is None.
+
+        Returns
+        -------
+        float
+            The delay in seconds.
+
+        """
+        delay = min(self.max_delay, self.base_delay * 2.0 ** (try_num - 1))
+        delay -= delay * self.jitter * random.random()
+        retry_after = _retry_after(err) if err is not None else None
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+
+def _is_rate_limit_error(err: Exception) -> bool:
+    """Return if the error is due to the rate limit of the instance."""
+    return _http_status(
+        err
+    ) == HTTPStatus.TOO_MANY_REQUESTS or "rate_limit_error" in str(err)
+
+
+def _retry_after(err: Exception) -> float | None:
+    """Return the seconds of the `Retry-After` header of an error, if any."""
+    response = _http_response(err)
+    value = (
+        response.headers.get("Retry-After") if response is not None else None
+    )
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_date = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(
+        0.0,
+        (retry_date - datetime.datetime.now(tz=datetime.UTC)).total_seconds(),
+    )
+
+
+def _create_post_with_retries(
+    lemmy: Lemmy,
+    policy: RetryPolicy,
+    slug_title: str | None,
+    **kwargs: Any,  # noqa: ANN401
+) -> dict[Any, Any] | None:
+    """
+    Create a Lemmy post, retrying the failed tries.
+
+    The `kwargs` are passed to `_create_post`.
+    """
+    try_num = 0
+    while True:
+        try_num += 1
+        try:
+            return _create_post(lemmy, **kwargs)
+        except Exception as err:
+            if try_num >= policy.retries or not policy.is_retryable(err):
+                if isinstance(err, LemmyError):
+                    raise
+                msg = (
+                    f"Sorry, cannot create post '{slug_title}' after "
+                    f"{try_num} tries: {err}"
+                )
+                raise LemmyError(msg) from err
+            delay = policy.delay(try_num, err)
+            warnings.warn(
+                f"[{try_num}/{policy.retries}] Error '{err}' creating post "
+                f"'{slug_title}'. Retrying in {delay:.1f} seconds.",
+                stacklevel=3,
+            )
+            policy.sleep(delay)
+
+
+def _event_post_data(
+    event: Event,
+    image_url: str | None = None,
+    profile: str = "default",
+) -> dict[str, Any]:
+    """Render the title, url, body and nsfw of the post of an event."""
+    # We post the image, if it not exists, the link to the event:
+    _url = image_url if image_url is not None else event.get_image_url()
+    if _url is None:
+        _url = event.get_event_url()
+    return {
+        "title": event.nice_title(LEMMY_MAX_TITLE_LENGTH),
+        "url": _url,
+        "body": event.get_content(image_url, profile),
+        "nsfw": event.NSFW if event.NSFW else False,
+    }
+
+
 def create_event_post(
     event: Event,
     lemmy: Lemmy,
@@ -144,38 +1159,228 @@ def create_event_post(
     honeypot: str | None = None,
     langcode: str | None = None,
     retries: int = 3,
+    retry_policy: RetryPolicy | None = None,
 ) -> dict[Any, Any] | None:
     """
     Create a Lemmy post using an event.
 
     When we don't have a link to the event, we upload the image to the Lemmy
     instance.
+
+    .. versionchanged:: 0.8.0
+       The failed tries are retried following a `RetryPolicy` and the
+       description is escaped with the `escape_profile` of the instance.
+
+    Raises
+    ------
+    LemmyError
+        If the post cannot be created.
+
     """
     apc_lb_conf.lemmy.community = community
+    return _create_post_with_retries(
+        lemmy,
+        retry_policy if retry_policy is not None else RetryPolicy(retries),
+        event.slugTitle,
+        community=community,
+        honeypot=honeypot,
+        langcode=langcode,
+        **_event_post_data(
+            event,
+            profile=escape_profile(_instance_of(lemmy)),
+        ),
+    )
 
-    # We post the image, if it not exists, the link to the event:
-    _url = event.get_image_url()
-    if _url is None:
-        _url = event.get_event_url()
-    for try_num in range(retries):
-        try:
-            return _create_post(
-                lemmy,
-                title=event.nice_title(LEMMY_MAX_TITLE_LENGTH),
-                url=_url,
-                body=event.get_content(),
-                nsfw=event.NSFW if event.NSFW else False,
-                community=community,
-                honeypot=honeypot,
-                langcode=langcode,
-            )
-        except Exception as err:
-            warnings.warn(
-                f"[{try_num}/{retries}] Error '{err=}/{type(err)=}' \
-                creating post '{event}'.",
-                stacklevel=2,
-            )
-            if try_num == retries:
-                raise
-    msg = "This code cannot be executed. Contacts devs."
-    raise LemmyError(msg)
+
+@dataclass(frozen=True)
+class LemmyTarget:
+    """A community of a Lemmy instance where the events are posted."""
+
+    instance: str
+    community: str
+
+    @classmethod
+    def from_str(cls, value: str) -> "LemmyTarget":
+        """
+        Create a LemmyTarget from a 'INSTANCE,COMMUNITY' string.
+
+        Parameters
+        ----------
+        value : str
+            The target (e.g.: `https://lemmy.ml,workingclasscalendar@lemmy.ml`).
+
+        Raises
+        ------
+        ValueError
+            If the string has not the right format.
+
+        Returns
+        -------
+        LemmyTarget
+            The target.
+
+        """
+        instance, _, community = value.partition(",")
+        instance, community = instance.strip(), community.strip()
+        if not instance or not community:
+            msg = f"It should be 'INSTANCE,COMMUNITY', not '{value}'"
+            raise ValueError(msg)
+        return cls(instance, community)
+
+
+@dataclass
+class TargetResult:
+    """The result of posting an event to a `LemmyTarget`."""
+
+    target: LemmyTarget
+    post: dict[Any, Any] | None = None
+    error: Exception | None = None
+
+    @property
+    def url(self) -> str | None:
+        """The URL (`ap_id`) of the created post, if any."""
+        if not self.post:
+            return None
+        return f"{self.post['post_view']['post']['ap_id']}"
+
+
+def find_event_post(
+    event: Event,
+    lemmy: Lemmy,
+    community: str,
+    limit: int = 50,
+) -> dict[Any, Any] | None:
+    """
+    Find a post of an event created by the logged user in a community.
+
+    It is used to know if an interrupted post was created before retrying it.
+
+    Parameters
+    ----------
+    event : Event
+        The event.
+    lemmy : Lemmy
+        The logged Lemmy object.
+    community : str
+        The community.
+    limit : int, optional
+        The number of newest posts where it is searched. The default is 50.
+
+    Returns
+    -------
+    Optional[dict[Any, Any]]
+        The post, as returned when it is created, or None if it's not found.
+
+    """
+    title = event.nice_title(LEMMY_MAX_TITLE_LENGTH)
+    # The login can be an email, the creator is the name of our person:
+    rate_limiter.acquire(_instance_of(lemmy), tokens=2)  # site and posts
+    site = lemmy.site.get()
+    if not site or not site.get("my_user"):
+        msg = f"Sorry, cannot get the user logged in {_instance_of(lemmy)}."
+        raise LemmyError(msg)
+    name = site["my_user"]["local_user_view"]["person"]["name"]
+    posts = lemmy.post.list(
+        community_id=community_cache.get(lemmy, community),
+        sort=SortType.New,
+        limit=limit,
+    )
+    for post_view in posts or []:
+        if (
+            post_view["post"]["name"] == title
+            and post_view["creator"]["name"] == name
+        ):
+            return {"post_view": post_view}
+    return None
+
+
+def create_event_posts(
+    event: Event,
+    targets: list[LemmyTarget],
+    user: str | None = None,
+    password: str | None = None,
+    honeypot: str | None = None,
+    langcode: str | None = None,
+    retry_policy: RetryPolicy | None = None,
+    max_concurrency: int | None = None,
+    image_urls: dict[str, str] | None = None,
+) -> list[TargetResult]:
+    """
+    Create the posts of an event in several communities and instances.
+
+    The post is rendered once per image URL and escaping profile (see
+    `escape_profile`), and it is posted concurrently, with a limit of
+    concurrent posts per instance. Each target is retried independently.
+
+    .. versionchanged:: 0.8.0
+       The `image_urls` parameter and the escaping profiles.
+
+    Parameters
+    ----------
+    event : Event
+        The event to post.
+    targets : list[LemmyTarget]
+        Where the event is posted.
+    user : Optional[str], optional
+        The user in all the instances. The default is apc_lb_conf.lemmy.user.
+    password : Optional[str], optional
+        The user password. The default is apc_lb_conf.lemmy.password.
+    honeypot : Optional[str], optional
+        The honeypot of the posts. The default is None.
+    langcode : Optional[str], optional
+        The language code of the posts. The default is None.
+    retry_policy : Optional[RetryPolicy], optional
+        How the failed posts are retried. The default is `RetryPolicy()`.
+    max_concurrency : Optional[int], optional
+        The maximum concurrent posts per instance. The default is
+        apc_lb_conf.lemmy.max_concurrency.
+    image_urls : Optional[dict[str, str]], optional
+        The URL of the image to post in an instance (e.g.: the image
+        uploaded to it), by instance. The default is the image of the event.
+
+    Returns
+    -------
+    list[TargetResult]
+        The results, in the same order that the targets.
+
+    """
+    policy = retry_policy if retry_policy is not None else RetryPolicy()
+    max_concurrency = max_concurrency or apc_lb_conf.lemmy.max_concurrency
+    image_urls = image_urls or {}
+    post_data = {
+        instance: _event_post_data(
+            event,
+            image_urls.get(instance),
+            escape_profile(instance),
+        )
+        for instance in {target.instance for target in targets}
+    }
+    semaphores = {
+        target.instance: threading.BoundedSemaphore(max_concurrency)
+        for target in targets
+    }
+
+    def _post(target: LemmyTarget) -> TargetResult:
+        with semaphores[target.instance]:
+            try:
+                return TargetResult(
+                    target,
+                    post=get_session(target.instance, user, password).call(
+                        _create_post_with_retries,
+                        policy=policy,
+                        slug_title=event.slugTitle,
+                        community=target.community,
+                        honeypot=honeypot,
+                        langcode=langcode,
+                        **post_data[target.instance],
+                    ),
+                )
+            except Exception as err:  # noqa: BLE001
+                return TargetResult(target, error=err)
+
+    if len(targets) <= 1:
+        return [_post(target) for target in targets]
+    with concurrent.futures.ThreadPoolExecutor(
+        max_workers=max_concurrency * len(semaphores),
+    ) as executor:
+        return list(executor.map(_post, targets))
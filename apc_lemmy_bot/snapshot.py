@@ -0,0 +1,651 @@
+#    Copyright (C) 2025 Carles Muñoz Gorriz <carlesmu@internautas.org>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as
+#    published by the Free Software Foundation, either version 3 of the
+#    License, or (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+apc_lemmy_bot snapshot module.
+
+Snapshots of the local database: the events, with their links, tags,
+images and posting history, are streamed to or from a JSON Lines file, one
+event per line. The events can also be exported to CSV to analyze them.
+
+The snapshots can be imported to bring up a new database without fetching
+the events and their images again.
+
+The files ending with `.gz` are compressed with gzip and the files ending
+with `.zst` with zstd, that requires Python 3.14 or `zstandard` (the `zstd`
+extra).
+"""
+
+import base64
+import contextlib
+import csv
+import datetime
+import gzip
+import io
+import itertools
+import json
+import sys
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from typing import IO, Any, cast
+
+import sqlalchemy as sa
+import sqlalchemy.orm as saorm
+
+try:
+    from compression import zstd
+except ImportError:  # pragma: no cover
+    zstd = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None  # type: ignore[assignment]
+
+from apc_lemmy_bot.database import (
+    Base,
+    Database,
+    Events,
+    EventsExtended,
+    EventsPosted,
+    Images,
+    Links,
+    Tags,
+    large_binary_to_bytes,
+)
+from apc_lemmy_bot.event import json_line
+from apc_lemmy_bot.resilient_uuid import UUID
+
+#: The formats of the snapshots.
+SNAPSHOT_FORMATS: tuple[str, ...] = ("jsonl", "csv")
+
+#: The fields of the records of the snapshots, in order.
+RECORD_FIELDS: tuple[str, ...] = (
+    "id",
+    "title",
+    "slugTitle",
+    "otd",
+    "description",
+    "NSFW",
+    "date",
+    "month",
+    "day",
+    "langcode",
+    "links",
+    "tags",
+    "images",
+    "extended",
+    "posted",
+)
+
+_EXTENDED_FIELDS: tuple[str, ...] = (
+    "base_event_url",
+    "event_url",
+    "base_event_img_url",
+    "img_url",
+    "first_stored_date",
+    "first_stored_timestamp",
+    "stored_date",
+    "stored_timestamp",
+    "apc_version",
+)
+
+_loads = json.loads if orjson is None else orjson.loads
+
+_GZIP_MAGIC: bytes = b"\x1f\x8b"
+_ZSTD_MAGIC: bytes = b"\x28\xb5\x2f\xfd"
+
+
+class SnapshotError(Exception):
+    """Exception raised for errors exporting or importing snapshots."""
+
+
+@dataclass
+class ImportStats:
+    """The result of importing a snapshot."""
+
+    events: int = 0
+    rows: int = 0
+    skipped: int = 0
+
+
+def _zstd_open(file: IO[bytes], mode: str) -> IO[bytes]:
+    """Open a zstd stream over `file`."""
+    if zstd is not None:
+        return cast("IO[bytes]", zstd.ZstdFile(file, mode))
+    if zstandard is None:
+        msg = "zstd compression requires Python 3.14 or the zstd extra"
+        raise SnapshotError(msg)
+    if mode == "wb":
+        return cast(
+            "IO[bytes]",
+            zstandard.ZstdCompressor().stream_writer(file, closefd=False),
+        )
+    return cast(
+        "IO[bytes]",
+        zstandard.ZstdDecompressor().stream_reader(file, closefd=False),
+    )
+
+
+@contextlib.contextmanager
+def open_snapshot(path: str, mode: str = "rb") -> Iterator[IO[bytes]]:
+    """
+    Open a snapshot file, compressed or not.
+
+    When it is written, the compression is given by the suffix of `path`
+    (`.gz` or `.zst`). When it is read, it is detected by its content.
+
+    Parameters
+    ----------
+    path : str
+        The path of the file, "-" for the standard input/output.
+    mode : str, optional
+        "rb" or "wb". The default is "rb".
+
+    Raises
+    ------
+    SnapshotError
+        If the compression is not available.
+
+    Yields
+    ------
+    IO[bytes]
+        The uncompressed binary stream.
+
+    """
+    with contextlib.ExitStack() as stack:
+        if path == "-":
+            std = sys.stdout if mode == "wb" else sys.stdin
+            raw: IO[bytes] = std.buffer
+        elif mode == "wb":
+            # Before the file is created:
+            if path.endswith(".zst") and zstd is None and zstandard is None:
+                msg = "zstd compression requires Python 3.14 or the zstd extra"
+                raise SnapshotError(msg)
+            raw = stack.enter_context(open(path, mode))  # noqa: PTH123
+        else:
+            raw = stack.enter_context(open(path, mode))  # noqa: PTH123
+
+        if mode == "wb":
+            compression = path.rsplit(".", 1)[-1] if path != "-" else ""
+        else:
+            # The standard input and the files opened in binary mode are
+            # buffered, so the magic bytes can be read without consuming them:
+            magic = raw.peek(4)[:4]  # type: ignore[attr-defined]
+            compression = (
+                "gz"
+                if magic.startswith(_GZIP_MAGIC)
+                else "zst"
+                if magic.startswith(_ZSTD_MAGIC)
+                else ""
+            )
+
+        match compression:
+            case "gz":
+                yield stack.enter_context(
+                    gzip.GzipFile(fileobj=raw, mode=mode),  # type: ignore[arg-type]
+                )
+            case "zst":
+                yield stack.enter_context(_zstd_open(raw, mode))
+            case _:
+                yield raw
+                if mode == "wb":
+                    raw.flush()
+
+
+def _month_day(value: datetime.date | tuple[int, int]) -> int:
+    """Return a sortable MMDD integer of a date or a (month, day)."""
+    if isinstance(value, datetime.date):
+        return value.month * 100 + value.day
+    return value[0] * 100 + value[1]
+
+
+def _record(view: Events, images: bool) -> dict[str, Any]:
+    """Return the record of an event view/row."""
+    extended = view.extended
+    return {
+        "id": str(view.id_uuid),
+        "title": view.title,
+        "slugTitle": view.slugTitle,
+        "otd": view.otd,
+        "description": view.description,
+        "NSFW": view.NSFW,
+        "date": view.date,
+        "month": view.month,
+        "day": view.day,
+        "langcode": view.langcode,
+        "links": [x.link for x in view.links],
+        "tags": [x.tag for x in view.tags],
+        "images": [
+            {
+                "imgSrc": x.imgSrc,
+                "imgAltText": x.imgAltText,
+                "img": (
+                    base64.b64encode(large_binary_to_bytes(x.img)).decode()
+                    if images and x.img
+                    else None
+                ),
+            }
+            for x in view.images
+        ],
+        "extended": (
+            {field: getattr(extended, field) for field in _EXTENDED_FIELDS}
+            if extended is not None
+            else None
+        ),
+        "posted": [
+            {"url": x.url, "date": x.date, "timestamp": x.timestamp}
+            for x in view.posted
+        ],
+    }
+
+
+def iter_records(
+    database: Database,
+    since: tuple[int, int] | None = None,
+    until: tuple[int, int] | None = None,
+    images: bool = False,
+    batch_size: int = 500,
+) -> Iterator[dict[str, Any]]:
+    """
+    Stream the records of the events of the database, in calendar order.
+
+    The events are fetched in batches of `batch_size` rows, with a server
+    side cursor when the database supports it, and their links, tags,
+    images and posting history are loaded once per batch. So the memory
+    doesn't depend on the size of the database.
+
+    Parameters
+    ----------
+    database : Database
+        The local database.
+    since : Optional[tuple[int, int]], optional
+        The first (month, day) of the calendar. The default is None.
+    until : Optional[tuple[int, int]], optional
+        The last (month, day) of the calendar, it can be before `since` to
+        export a range across the new year. The default is None.
+    images : bool, optional
+        Include the images, encoded in base64. The default is False.
+    batch_size : int, optional
+        The rows fetched at once. The default is 500.
+
+    Yields
+    ------
+    dict[str, Any]
+        The records, with the `RECORD_FIELDS` keys.
+
+    """
+    month_day = Events.month * 100 + Events.day
+    stmt = (
+        sa.select(Events)
+        .options(
+            saorm.selectinload(Events.links),
+            saorm.selectinload(Events.tags),
+            saorm.selectinload(Events.extended),
+            saorm.selectinload(Events.posted),
+            saorm.selectinload(Events.images)
+            if images
+            else saorm.selectinload(Events.images).defer(Images.img),
+        )
+        .order_by(Events.month, Events.day, Events.id_int)
+        .execution_options(yield_per=batch_size)
+    )
+    if since is not None and until is not None and since > until:
+        stmt = stmt.where(
+            sa.or_(
+                month_day >= _month_day(since),
+                month_day <= _month_day(until),
+            ),
+        )
+    else:
+        if since is not None:
+            stmt = stmt.where(month_day >= _month_day(since))
+        if until is not None:
+            stmt = stmt.where(month_day <= _month_day(until))
+
+    with saorm.sessionmaker(database.engine)() as session:
+        for view in session.scalars(stmt):
+            yield _record(view, images)
+
+
+def _csv_cell(value: Any) -> str:  # noqa: ANN401
+    """Return the CSV cell of a value of a record."""
+    match value:
+        case None:
+            return ""
+        case str():
+            return value
+        case datetime.date():
+            return value.isoformat()
+        case _:
+            return json_line(value)
+
+
+def write_records(
+    records: Iterable[dict[str, Any]],
+    stream: IO[bytes],
+    output_format: str = "jsonl",
+) -> int:
+    """
+    Write records to a binary stream.
+
+    Parameters
+    ----------
+    records : Iterable[dict[str, Any]]
+        The records.
+    stream : IO[bytes]
+        The (uncompressed) stream.
+    output_format : str, optional
+        "jsonl" or "csv". In CSV the lists and dicts are JSON encoded. The
+        default is "jsonl".
+
+    Raises
+    ------
+    SnapshotError
+        If the format is unknown.
+
+    Returns
+    -------
+    int
+        The number of records written.
+
+    """
+    if output_format not in SNAPSHOT_FORMATS:
+        msg = f"Unknown snapshot format '{output_format}'"
+        raise SnapshotError(msg)
+
+    text = io.TextIOWrapper(stream, encoding="utf-8", newline="")
+    count = 0
+    try:
+        if output_format == "csv":
+            writer = csv.writer(text)
+            writer.writerow(RECORD_FIELDS)
+            for count, record in enumerate(records, start=1):  # noqa: B007
+                writer.writerow(
+                    [_csv_cell(record[field]) for field in RECORD_FIELDS],
+                )
+        else:
+            for count, record in enumerate(records, start=1):  # noqa: B007
+                text.write(json_line(record))
+                text.write("\n")
+        text.flush()
+    finally:
+        text.detach()
+    return count
+
+
+def export_snapshot(
+    database: Database,
+    path: str,
+    output_format: str = "jsonl",
+    since: tuple[int, int] | None = None,
+    until: tuple[int, int] | None = None,
+    images: bool = False,
+    batch_size: int = 500,
+) -> int:
+    """
+    Export the events of the database to a snapshot file.
+
+    See `iter_records` and `write_records`.
+
+    Parameters
+    ----------
+    database : Database
+        The local database.
+    path : str
+        The file, "-" for the standard output. The `.gz` and `.zst`
+        suffixes compress it.
+    output_format : str, optional
+        "jsonl" or "csv". The default is "jsonl".
+    since, until : Optional[tuple[int, int]], optional
+        The (month, day) range of the calendar. The default is None.
+    images : bool, optional
+        Include the images. The default is False.
+    batch_size : int, optional
+        The rows fetched at once. The default is 500.
+
+    Returns
+    -------
+    int
+        The number of events exported.
+
+    """
+    with open_snapshot(path, "wb") as stream:
+        return write_records(
+            iter_records(database, since, until, images, batch_size),
+            stream,
+            output_format,
+        )
+
+
+def read_records(stream: IO[bytes]) -> Iterator[dict[str, Any]]:
+    """
+    Stream the records of a JSON Lines snapshot.
+
+    The dates and timestamps are decoded, so the records are the same that
+    `iter_records` returns.
+
+    Parameters
+    ----------
+    stream : IO[bytes]
+        The (uncompressed) stream.
+
+    Raises
+    ------
+    SnapshotError
+        If a line is not a valid record.
+
+    Yields
+    ------
+    dict[str, Any]
+        The records.
+
+    """
+    for line_num, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield _decode_record(_loads(line))
+        except (ValueError, KeyError, TypeError) as err:
+            msg = f"Line {line_num}: not a valid record: {err}"
+            raise SnapshotError(msg) from err
+
+
+def _decode_record(record: dict[str, Any]) -> dict[str, Any]:
+    """Decode the dates and timestamps of a record."""
+    record["date"] = datetime.date.fromisoformat(record["date"])
+    if (extended := record["extended"]) is not None:
+        for field in ("first_stored_date", "stored_date"):
+            extended[field] = _date(extended[field])
+        for field in ("first_stored_timestamp", "stored_timestamp"):
+            extended[field] = _timestamp(extended[field])
+    for posted in record["posted"]:
+        posted["date"] = _date(posted["date"])
+        posted["timestamp"] = _timestamp(posted["timestamp"])
+    return record
+
+
+def _date(value: str | None) -> datetime.date | None:
+    """Decode a date of a record."""
+    return datetime.date.fromisoformat(value) if value else None
+
+
+def _timestamp(value: str | None) -> datetime.datetime | None:
+    """Decode a timestamp of a record."""
+    return datetime.datetime.fromisoformat(value) if value else None
+
+
+def _batched(
+    records: Iterable[dict[str, Any]],
+    batch_size: int,
+) -> Iterator[list[dict[str, Any]]]:
+    """Group the records in lists of `batch_size`."""
+    iterator = iter(records)
+    while batch := list(itertools.islice(iterator, batch_size)):
+        yield batch
+
+
+def _table(model: type[Base]) -> sa.Table:
+    """Return the table of a model, typed as `sa.Table`."""
+    return cast("sa.Table", model.__table__)
+
+
+def _add_rows(
+    rows: dict[sa.Table, list[dict[str, Any]]],
+    record: dict[str, Any],
+    id_int: int,
+    id_uuid: UUID,
+) -> None:
+    """Add the rows of the tables of an event record."""
+    key = {"event_id_int": id_int, "event_id_uuid": id_uuid}
+    rows[_table(Events)].append(
+        {
+            "id_int": id_int,
+            "id_uuid": id_uuid,
+            "slugTitle": record["slugTitle"],
+            "date": record["date"],
+            "month": record["month"],
+            "day": record["day"],
+            "langcode": record["langcode"],
+            "title": record["title"],
+            "otd": record["otd"],
+            "description": record["description"],
+            "NSFW": record["NSFW"],
+        },
+    )
+    rows[_table(Links)].extend({**key, "link": x} for x in record["links"])
+    rows[_table(Tags)].extend({**key, "tag": x} for x in record["tags"])
+    rows[_table(Images)].extend(
+        {
+            **key,
+            "img": base64.b64decode(x["img"]) if x["img"] else None,
+            "imgSrc": x["imgSrc"],
+            "imgAltText": x["imgAltText"],
+        }
+        for x in record["images"]
+    )
+    if record["extended"] is not None:
+        rows[_table(EventsExtended)].append({**key, **record["extended"]})
+    rows[_table(EventsPosted)].extend({**key, **x} for x in record["posted"])
+
+
+def import_snapshot(
+    database: Database,
+    path: str,
+    batch_size: int = 1000,
+) -> ImportStats:
+    """
+    Import a JSON Lines snapshot to the database.
+
+    The snapshot is read as a stream and its rows are inserted in batches,
+    with one `executemany` per table, in a single transaction. When the
+    database is empty, the non unique indexes of the events are dropped
+    while the rows are inserted and created again at the end, also when
+    the import fails, which is faster than maintaining them row by row.
+
+    The events already stored, by their id, are skipped.
+
+    Parameters
+    ----------
+    database : Database
+        The local database.
+    path : str
+        The file, "-" for the standard input. It can be compressed with gzip
+        or zstd.
+    batch_size : int, optional
+        The events inserted at once. The default is 1000.
+
+    Raises
+    ------
+    SnapshotError
+        If the snapshot is not valid or it cannot be inserted.
+
+    Returns
+    -------
+    ImportStats
+        The events imported, the rows inserted in all the tables and the
+        events skipped.
+
+    """
+    tables = [
+        _table(model)
+        for model in (
+            Events,
+            Links,
+            Tags,
+            Images,
+            EventsExtended,
+            EventsPosted,
+        )
+    ]
+    stats = ImportStats()
+    indexes: list[sa.Index] = []
+    try:
+        with open_snapshot(path) as stream, database.engine.begin() as conn:
+            last_id = conn.scalar(sa.select(sa.func.max(Events.id_int)))
+            empty = last_id is None
+            id_int = last_id or 0
+
+            if empty:
+                indexes = [x for x in _table(Events).indexes if not x.unique]
+            for index in indexes:
+                index.drop(conn)
+
+            for batch in _batched(read_records(stream), batch_size):
+                uuids = [UUID(record["id"]) for record in batch]
+                stored = (
+                    set()
+                    if empty
+                    else set(
+                        conn.scalars(
+                            sa.select(Events.id_uuid).where(
+                                Events.id_uuid.in_(uuids),
+                            ),
+                        ),
+                    )
+                )
+                rows: dict[sa.Table, list[dict[str, Any]]] = {
+                    table: [] for table in tables
+                }
+                for record, id_uuid in zip(batch, uuids, strict=True):
+                    if id_uuid in stored:
+                        stats.skipped += 1
+                        continue
+                    id_int += 1
+                    _add_rows(rows, record, id_int, id_uuid)
+                    stats.events += 1
+
+                for table in tables:
+                    if rows[table]:
+                        conn.execute(sa.insert(table), rows[table])
+                        stats.rows += len(rows[table])
+    except KeyError as err:
+        msg = f"Not a valid record, without {err}"
+        raise SnapshotError(msg) from err
+    except sa.exc.IntegrityError as err:
+        msg = f"The snapshot cannot be imported: {err.orig}"
+        raise SnapshotError(msg) from err
+    finally:
+        # DDL is not transactional in every database (MySQL commits it), so
+        # the indexes are created again even if the import was rolled back.
+        if indexes:
+            with database.engine.begin() as conn:
+                for index in indexes:
+                    index.create(conn, checkfirst=True)
+    return stats
@@ -0,0 +1,326 @@
+#    Copyright (C) 2025 Carles Muñoz Gorriz <carlesmu@internautas.org>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as
+#    published by the Free Software Foundation, either version 3 of the
+#    License, or (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+apc_lemmy_bot source module.
+
+The sources of the events: *Supabase*, the local database or a directory
+(a local mirror) of JSON or JSON Lines files. They share the `EventSource`
+interface, so the commands can get the events from any of them.
+
+.. versionadded:: 0.8.0
+"""
+
+import datetime
+import json
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any, Protocol
+
+import sqlalchemy as sa
+import sqlalchemy.orm as saorm
+
+from apc_lemmy_bot import apc_lb_conf
+from apc_lemmy_bot.database import Database, Events, Images
+from apc_lemmy_bot.event import Event, get_dated_events
+
+#: The named sources, the other sources are directories.
+SOURCES: tuple[str, ...] = ("SUPABASE", "DATABASE")
+
+
+class SourceError(Exception):
+    """Exception raised for errors reading the events of a source."""
+
+
+class EventSource(Protocol):
+    """
+    A source of events.
+
+    The events of a date are the events of its day and month in any year.
+    """
+
+    def fetch(self, date: datetime.date) -> Iterator[Event]:
+        """Stream the events of a date."""
+
+    def fetch_range(
+        self,
+        start: datetime.date,
+        end: datetime.date,
+    ) -> Iterator[Event]:
+        """
+        Stream the events of the dates from `start` to `end`, both included.
+
+        Parameters
+        ----------
+        start : datetime.date
+            The first date.
+        end : datetime.date
+            The last date.
+
+        Yields
+        ------
+        Event
+            The events, date by date.
+
+        """
+        for days in range((end - start).days + 1):
+            yield from self.fetch(start + datetime.timedelta(days=days))
+
+
+class SupabaseSource(EventSource):
+    """The events of a *Supabase* database, see `get_dated_events`."""
+
+    def __init__(
+        self,
+        url: str | None = apc_lb_conf.supabase.url,
+        key: str | None = apc_lb_conf.supabase.key,
+        base_event_url: str | None = apc_lb_conf.supabase.base_event_url,
+        base_event_img_url: str | None = (
+            apc_lb_conf.supabase.base_event_img_url
+        ),
+        force_langcode: str | None = None,
+    ) -> None:
+        """
+        Initialize a SupabaseSource object.
+
+        Parameters
+        ----------
+        url : Optional[str], optional
+            The URL of the database. The default is apc_lb_conf.supabase.url.
+        key : Optional[str], optional
+            The access key to the database. The default is
+            apc_lb_conf.supabase.key.
+        base_event_url : Optional[str], optional
+            The base/common URL where the event can be shown. The default is
+            apc_lb_conf.supabase.base_event_url.
+        base_event_img_url : Optional[str], optional
+            The base/common URL where the event image can be shown. The
+            default is apc_lb_conf.supabase.base_event_img_url.
+        force_langcode : Optional[str], optional
+            The ISO 639-2 `langcode` in which the event has been written. The
+            default is None.
+
+        """
+        self.url = url
+        self.key = key
+        self.base_event_url = base_event_url
+        self.base_event_img_url = base_event_img_url
+        self.force_langcode = force_langcode
+
+    def fetch(self, date: datetime.date) -> Iterator[Event]:
+        """Stream the events of a date."""
+        yield from get_dated_events(
+            date=date,
+            url=self.url,
+            key=self.key,
+            base_event_url=self.base_event_url,
+            base_event_img_url=self.base_event_img_url,
+            force_langcode=self.force_langcode,
+        )
+
+
+class DatabaseSource(EventSource):
+    """The events of the local database."""
+
+    def __init__(
+        self,
+        database: Database,
+        batch_size: int = 100,
+    ) -> None:
+        """
+        Initialize a DatabaseSource object.
+
+        Parameters
+        ----------
+        database : Database
+            The local database.
+        batch_size : int, optional
+            The rows fetched from the database at once. The default is 100.
+
+        """
+        self.database = database
+        self.batch_size = batch_size
+
+    def fetch(self, date: datetime.date) -> Iterator[Event]:
+        """Stream the events of a date."""
+        stmt = (
+            sa.select(Events)
+            .options(
+                saorm.selectinload(Events.links),
+                saorm.selectinload(Events.tags),
+                saorm.selectinload(Events.extended),
+                saorm.selectinload(Events.images).defer(Images.img),
+            )
+            .where(Events.month == date.month)
+            .where(Events.day == date.day)
+            .order_by(Events.id_int)
+            .execution_options(yield_per=self.batch_size)
+        )
+        # pylint: disable=W0212  # protected-access
+        hydrate = Database._get_event_from_view  # noqa: SLF001
+        with saorm.sessionmaker(self.database.engine)() as session:
+            for view in session.scalars(stmt):
+                yield hydrate(view)
+
+
+class DirectorySource(EventSource):
+    """
+    The events of a directory of JSON or JSON Lines files.
+
+    The `.json` files have an event or a list of events, and the `.jsonl`
+    files an event per line, with the fields of the *Supabase* rows, like the
+    `json` and `jsonl` formats of the `show` command. The files are read
+    once, the first time the events are fetched.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        base_event_url: str | None = apc_lb_conf.supabase.base_event_url,
+        base_event_img_url: str | None = (
+            apc_lb_conf.supabase.base_event_img_url
+        ),
+        force_langcode: str | None = None,
+    ) -> None:
+        """
+        Initialize a DirectorySource object.
+
+        Parameters
+        ----------
+        path : str | Path
+            The directory.
+        base_event_url : Optional[str], optional
+            The base/common URL where the event can be shown. The default is
+            apc_lb_conf.supabase.base_event_url.
+        base_event_img_url : Optional[str], optional
+            The base/common URL where the event image can be shown. The
+            default is apc_lb_conf.supabase.base_event_img_url.
+        force_langcode : Optional[str], optional
+            The ISO 639-2 `langcode` in which the event has been written. The
+            default is None.
+
+        """
+        self.path = Path(path)
+        self.base_event_url = base_event_url
+        self.base_event_img_url = base_event_img_url
+        self.force_langcode = force_langcode
+        self._rows: dict[tuple[int, int], list[dict[str, Any]]] | None = None
+
+    def _read(self) -> dict[tuple[int, int], list[dict[str, Any]]]:
+        """Read the rows of the files, by their month and day."""
+        if self._rows is not None:
+            return self._rows
+        if not self.path.is_dir():
+            msg = f"'{self.path}' is not a directory"
+            raise SourceError(msg)
+
+        rows: dict[tuple[int, int], list[dict[str, Any]]] = {}
+        for file in sorted(self.path.iterdir()):
+            try:
+                with file.open(encoding="utf-8") as stream:
+                    match file.suffix:
+                        case ".json":
+                            data = json.load(stream)
+                            file_rows = (
+                                data if isinstance(data, list) else [data]
+                            )
+                        case ".jsonl":
+                            file_rows = [
+                                json.loads(line)
+                                for line in stream
+                                if line.strip()
+                            ]
+                        case _:
+                            continue
+                for row in file_rows:
+                    key = (int(row["month"]), int(row["day"]))
+                    rows.setdefault(key, []).append(row)
+            except (ValueError, KeyError, TypeError) as err:
+                msg = f"'{file}' has not valid events: {err}"
+                raise SourceError(msg) from err
+        self._rows = rows
+        return rows
+
+    def fetch(self, date: datetime.date) -> Iterator[Event]:
+        """Stream the events of a date."""
+        for row in self._read().get((date.month, date.day), []):
+            yield Event(
+                row,
+                self.base_event_url,
+                self.base_event_img_url,
+                self.force_langcode,
+            )
+
+
+def get_source(
+    name: str,
+    database: Database | None = None,
+    url: str | None = apc_lb_conf.supabase.url,
+    key: str | None = apc_lb_conf.supabase.key,
+    base_event_url: str | None = apc_lb_conf.supabase.base_event_url,
+    base_event_img_url: str | None = apc_lb_conf.supabase.base_event_img_url,
+    force_langcode: str | None = None,
+) -> EventSource:
+    """
+    Return the source of events of a name.
+
+    Parameters
+    ----------
+    name : str
+        "SUPABASE", "DATABASE" or the path of a directory.
+    database : Optional[Database], optional
+        The local database, required by "DATABASE". The default is None.
+    url, key : Optional[str], optional
+        The URL and the access key of the Supabase database. The default is
+        the configuration.
+    base_event_url, base_event_img_url : Optional[str], optional
+        The base URLs of the events and their images. The default is the
+        configuration.
+    force_langcode : Optional[str], optional
+        The ISO 639-2 `langcode` in which the events have been written, the
+        events of the local database have their stored one. The default is
+        None.
+
+    Raises
+    ------
+    SourceError
+        If the database is required and it's not given.
+
+    Returns
+    -------
+    EventSource
+        The source.
+
+    """
+    match name:
+        case "SUPABASE":
+            return SupabaseSource(
+                url,
+                key,
+                base_event_url,
+                base_event_img_url,
+                force_langcode,
+            )
+        case "DATABASE":
+            if database is None:
+                msg = "The DATABASE source requires a database"
+                raise SourceError(msg)
+            return DatabaseSource(database)
+        case _:
+            return DirectorySource(
+                name,
+                base_event_url,
+                base_event_img_url,
+                force_langcode,
+            )
@@ -0,0 +1,199 @@
+#    Copyright (C) 2025 Carles Muñoz Gorriz <carlesmu@internautas.org>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as
+#    published by the Free Software Foundation, either version 3 of the
+#    License, or (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+apc_lemmy_bot transport module.
+
+A pooled HTTP session shared by the Lemmy client and the image downloads, so
+the connections (and their TLS sessions) to a host are kept alive and reused
+during a run.
+"""
+
+import threading
+from typing import Any
+
+import requests
+import requests.adapters
+from pythorhead import requestor as pythorhead_requestor
+
+from apc_lemmy_bot import apc_lb_conf
+
+_session: requests.Session | None = None
+_session_lock: threading.Lock = threading.Lock()
+# The last failed response of each thread:
+_local: threading.local = threading.local()
+
+
+def get_session() -> requests.Session:
+    """
+    Get the shared HTTP session, creating it the first time.
+
+    The pool is configured with `apc_lb_conf.http`.
+
+    Returns
+    -------
+    requests.Session
+        The shared session.
+
+    """
+    global _session  # noqa: PLW0603  # pylint: disable=W0603
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(
+                pool_connections=apc_lb_conf.http.pool_connections,
+                pool_maxsize=apc_lb_conf.http.pool_maxsize,
+            )
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+        return _session
+
+
+def close() -> None:
+    """Close the shared HTTP session and its connections."""
+    global _session  # noqa: PLW0603  # pylint: disable=W0603
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+def request(method: str, url: str, **kwargs: Any) -> requests.Response:  # noqa: ANN401
+    """
+    Send a request with the shared HTTP session.
+
+    Parameters
+    ----------
+    method : str
+        The HTTP method (e.g.: `GET`).
+    url : str
+        The URL.
+    **kwargs : Any
+        Other `requests` arguments. The default timeout is
+        `apc_lb_conf.http.timeout`.
+
+    Returns
+    -------
+    requests.Response
+        The response.
+
+    """
+    kwargs.setdefault("timeout", apc_lb_conf.http.timeout)
+    response = get_session().request(method, url, **kwargs)
+    _local.error_response = None if response.ok else response
+    return response
+
+
+def last_error_response() -> requests.Response | None:
+    """
+    Get the response of the last request of this thread, if it has failed.
+
+    pythorhead raises a bare `Exception` with only the text of a failed
+    response, its status and headers (e.g.: `Retry-After`) are kept here.
+
+    Returns
+    -------
+    Optional[requests.Response]
+        The response, or None if the last request has not failed (HTTP 4xx or
+        5xx).
+
+    """
+    response: requests.Response | None = getattr(
+        _local,
+        "error_response",
+        None,
+    )
+    return response
+
+
+class _PythorheadRequests:
+    """The `requests` module seen by pythorhead, using the shared session."""
+
+    @staticmethod
+    def get(url: str, **kwargs: Any) -> requests.Response:  # noqa: ANN401
+        """Send a GET request."""
+        return request("GET", url, **kwargs)
+
+    @staticmethod
+    def post(url: str, **kwargs: Any) -> requests.Response:  # noqa: ANN401
+        """Send a POST request."""
+        return request("POST", url, **kwargs)
+
+    @staticmethod
+    def put(url: str, **kwargs: Any) -> requests.Response:  # noqa: ANN401
+        """Send a PUT request."""
+        return request("PUT", url, **kwargs)
+
+    def __getattr__(self, name: str) -> Any:  # noqa: ANN401
+        """Return the other attributes of the `requests` module."""
+        return getattr(requests, name)
+
+
+# The `requests` module and the `REQUEST_MAP` replaced in pythorhead:
+_pythorhead_originals: tuple[Any, dict[Any, Any]] | None = None
+
+
+def use_in_pythorhead() -> None:
+    """
+    Send the requests of pythorhead with the shared HTTP session.
+
+    pythorhead calls `requests.get`, `requests.post` and `requests.put`
+    (directly for the nodeinfo and through its `REQUEST_MAP` for the API),
+    opening a new connection for each request. They are replaced, for all
+    the pythorhead users of the process, until `restore_pythorhead` is
+    called.
+
+    Returns
+    -------
+    None
+
+    """
+    global _pythorhead_originals  # noqa: PLW0603  # pylint: disable=W0603
+    with _session_lock:
+        if _pythorhead_originals is not None:  # Already used
+            return
+        _pythorhead_originals = (
+            pythorhead_requestor.requests,
+            dict(pythorhead_requestor.REQUEST_MAP),
+        )
+        shim = _PythorheadRequests()
+        pythorhead_requestor.requests = shim  # type: ignore[assignment]
+        pythorhead_requestor.REQUEST_MAP.update(
+            {
+                pythorhead_requestor.Request.GET: shim.get,
+                pythorhead_requestor.Request.POST: shim.post,
+                pythorhead_requestor.Request.PUT: shim.put,
+            },
+        )
+
+
+def restore_pythorhead() -> None:
+    """
+    Undo `use_in_pythorhead`, pythorhead uses `requests` again.
+
+    Returns
+    -------
+    None
+
+    """
+    global _pythorhead_originals  # noqa: PLW0603  # pylint: disable=W0603
+    with _session_lock:
+        if _pythorhead_originals is None:
+            return
+        pythorhead_requestor.requests, request_map = _pythorhead_originals
+        pythorhead_requestor.REQUEST_MAP.clear()
+        pythorhead_requestor.REQUEST_MAP.update(request_map)
+        _pythorhead_originals = None
@@ -0,0 +1,93 @@
+#    Copyright (C) 2025 Carles Muñoz Gorriz <carlesmu@internautas.org>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as
+#    published by the Free Software Foundation, either version 3 of the
+#    License, or (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Fixtures of the pytest-benchmark suite."""
+
+import itertools
+from typing import Any
+
+import pytest
+
+from apc_lemmy_bot import LEMMY_MAX_TITLE_LENGTH
+from apc_lemmy_bot.event import Event
+from tests.fakes.corpus import generate_rows
+
+BASE_EVENT_URL: str = "https://example.org/events/"
+BASE_EVENT_IMG_URL: str = "https://example.org/images/"
+
+
+def _worst_row() -> dict[str, Any]:
+    """Return a row that hits the slow paths of the Event methods."""
+    row = next(generate_rows(1, seed=1, image_ratio=1.0))
+    # Every ". " is preceded by an abbreviation, so nice_title splits all of
+    # them before returning the original title:
+    abbreviations = itertools.cycle((" Dr", " Mr", " Ms", " Sr", " U.S", " V"))
+    row["title"] = "A strike"
+    row["otd"] = "".join(
+        f"Word{n}{next(abbreviations)}. " for n in range(2000)
+    ).strip()
+    # A very long description with the characters replaced by
+    # nice_description and a quotation at the end:
+    paragraph = (
+        "The *general* strike of the `dockers` and the textile_workers. "
+    )
+    row["description"] = "\n\n".join(
+        [paragraph * 20] * 100 + ['"Workers of the world, unite!"', "- Marx"],
+    )
+    row["tags"] = [f"tag number {n}" for n in range(500)]
+    row["links"] = [f"https://example.org/{n}" for n in range(500)]
+    return row
+
+
+ROWS: dict[str, dict[str, Any]] = {
+    "typical": next(generate_rows(1, seed=0, image_ratio=1.0)),
+    "worst": _worst_row(),
+}
+
+
+@pytest.fixture(params=list(ROWS))
+def row(request: pytest.FixtureRequest) -> dict[str, Any]:
+    """Return a supabase row of an event."""
+    return ROWS[request.param]
+
+
+@pytest.fixture
+def event(row: dict[str, Any]) -> Event:
+    """Return an event."""
+    return Event(row, BASE_EVENT_URL, BASE_EVENT_IMG_URL, row["langcode"])
+
+
+@pytest.fixture
+def base_urls() -> tuple[str, str]:
+    """Return the base URLs of the events and their images."""
+    return BASE_EVENT_URL, BASE_EVENT_IMG_URL
+
+
+@pytest.fixture
+def max_title_length() -> int:
+    """Return the max length of the Lemmy titles."""
+    return LEMMY_MAX_TITLE_LENGTH
+
+
+@pytest.hookimpl(trylast=True)
+def pytest_configure(config: pytest.Config) -> None:
+    """Don't fail the first run, that has no saved run to compare with."""
+    session = getattr(config, "_benchmarksession", None)
+    if (
+        session is not None
+        and session.compare_fail
+        and not session.compared_mapping
+    ):
+        session.compare_fail = []
@@ -0,0 +1,286 @@
+#    Copyright (C) 2025 Carles Muñoz Gorriz <carlesmu@internautas.org>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as
+#    published by the Free Software Foundation, either version 3 of the
+#    License, or (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+benchmarks/load_test.py harness.
+
+It runs the `db SUPABASE DATABASE` → `db DATABASE LEMMY` pipeline, without
+delays, against local fakes of Supabase and Lemmy for a number of days, events
+per day and communities. It reports the throughput, the p50/p95/p99 latency
+of each stage, the database queries and the peak RSS.
+
+Run it with, by example::
+
+    python -m benchmarks.load_test --days 30 --events-per-day 50 --communities 3
+"""
+
+import argparse
+import datetime
+import json
+import resource
+import statistics
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+import sqlalchemy as sa
+from typer.testing import CliRunner
+
+from apc_lemmy_bot.cli.__main__ import app
+from tests.fakes import FakeLemmy, FakeSupabase
+from tests.fakes.corpus import generate_images, generate_rows
+
+
+class QueryCounter:
+    """Count the SQL statements executed by all the SQLAlchemy engines."""
+
+    def __init__(self) -> None:
+        """Initialize a QueryCounter object."""
+        self.count: int = 0
+        sa.event.listen(
+            sa.engine.Engine,
+            "before_cursor_execute",
+            self._count,
+        )
+
+    def _count(self, *_: object) -> None:
+        self.count += 1
+
+
+def percentiles(samples: list[float]) -> dict[str, float]:
+    """Return the p50, p95 and p99 of some samples."""
+    if not samples:
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0}
+    if len(samples) == 1:
+        return dict.fromkeys(("p50", "p95", "p99"), samples[0])
+    cuts = statistics.quantiles(samples, n=100, method="inclusive")
+    return {"p50": cuts[49], "p95": cuts[94], "p99": cuts[98]}
+
+
+def peak_rss_mb() -> float:
+    """Return the peak resident set size of the process in MiB."""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB and macOS bytes:
+    return rss / 1024 / (1024 if sys.platform == "darwin" else 1)
+
+
+class Stage:
+    """The measures of a stage of the pipeline."""
+
+    def __init__(self, name: str, queries: QueryCounter) -> None:
+        """Initialize a Stage object."""
+        self.name: str = name
+        self.samples: list[float] = []
+        self.items: int = 0
+        self.queries: int = 0
+        self.errors: int = 0
+        self._queries = queries
+
+    def run(self, func: Callable[[], int], items: int) -> None:
+        """Run and measure the stage once."""
+        queries = self._queries.count
+        start = time.perf_counter()
+        exit_code = func()
+        self.samples.append(time.perf_counter() - start)
+        self.queries += self._queries.count - queries
+        self.items += items
+        self.errors += exit_code != 0
+
+    def report(self) -> dict[str, Any]:
+        """Return the measures."""
+        total = sum(self.samples)
+        return {
+            "runs": len(self.samples),
+            "errors": self.errors,
+            "items": self.items,
+            "seconds": total,
+            "items_per_second": self.items / total if total else 0.0,
+            "queries": self.queries,
+            "queries_per_run": (
+                self.queries / len(self.samples) if self.samples else 0.0
+            ),
+            **{
+                f"{name}_ms": value * 1000
+                for name, value in percentiles(self.samples).items()
+            },
+        }
+
+
+def run(args: argparse.Namespace) -> dict[str, Any]:
+    """Run the load test and return its report."""
+    start = datetime.date.fromisoformat(args.start)
+    rows = list(
+        generate_rows(
+            args.days * args.events_per_day,
+            seed=args.seed,
+            dates=[
+                start + datetime.timedelta(days=n) for n in range(args.days)
+            ],
+            image_ratio=args.image_ratio,
+        ),
+    )
+    communities = [f"community{n}" for n in range(args.communities)]
+    runner = CliRunner()
+    queries = QueryCounter()
+    stages = {
+        "ingest": Stage("ingest", queries),
+        "post": Stage("post", queries),
+    }
+
+    with (
+        tempfile.TemporaryDirectory() as tmp,
+        FakeSupabase(
+            {"events": rows},
+            generate_images(rows),
+            latency=args.supabase_latency,
+        ) as supabase,
+        FakeLemmy(
+            communities=communities,
+            latency=args.lemmy_latency,
+            error_rate=args.lemmy_error_rate,
+            seed=args.seed,
+        ) as lemmy,
+    ):
+        database = args.database or f"sqlite:///{Path(tmp) / 'bench.db'}"
+        common = [
+            "--database",
+            database,
+            "--sb-url",
+            supabase.url,
+            "--sb-key",
+            supabase.key,
+            "--ev-url",
+            "https://example.org/events",
+            "--ev-img-url",
+            supabase.storage_url,
+            "--lm-instance",
+            lemmy.url,
+            "--lm-user",
+            "bot",
+            "--lm-password",
+            "password",
+            "--lm-community",
+            communities[0],
+            *(
+                arg
+                for community in communities[1:]
+                for arg in ("--lm-target", f"{lemmy.url},{community}")
+            ),
+            "--lm-rate-limit",
+            "*,0,1",  # Not limited
+            "--format",
+            "none",
+            "--langcode",
+            args.langcode,
+            "--silence",
+        ]
+
+        def _invoke(*argv: str) -> Callable[[], int]:
+            def _run() -> int:
+                result = runner.invoke(app, [*argv, *common])
+                if result.exit_code and args.verbose:
+                    print(
+                        result.output, repr(result.exception), file=sys.stderr
+                    )
+                return result.exit_code
+
+            return _run
+
+        for day in range(args.days):
+            date = f"{start + datetime.timedelta(days=day)}"
+            stages["ingest"].run(
+                _invoke("db", "SUPABASE", "DATABASE", date),
+                args.events_per_day,
+            )
+            stages["post"].run(
+                _invoke("db", "DATABASE", "LEMMY", date),
+                args.communities,
+            )
+
+        return {
+            "config": vars(args),
+            "stages": {name: stage.report() for name, stage in stages.items()},
+            "lemmy": {
+                "posts": len(lemmy.posts),
+                "requests": dict(lemmy.requests),
+                "connections": len(lemmy.connections),
+            },
+            "supabase": {"requests": dict(supabase.requests)},
+            "peak_rss_mb": peak_rss_mb(),
+        }
+
+
+def print_report(report: dict[str, Any]) -> None:
+    """Print a report as a table."""
+    print(
+        f"{'stage':<8} {'runs':>5} {'errors':>6} {'items/s':>9} "
+        f"{'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'queries/run':>12}",
+    )
+    for name, stage in report["stages"].items():
+        print(
+            f"{name:<8} {stage['runs']:>5} {stage['errors']:>6} "
+            f"{stage['items_per_second']:>9.1f} {stage['p50_ms']:>9.1f} "
+            f"{stage['p95_ms']:>9.1f} {stage['p99_ms']:>9.1f} "
+            f"{stage['queries_per_run']:>12.1f}",
+        )
+    print(
+        f"posts: {report['lemmy']['posts']}, "
+        f"lemmy connections: {report['lemmy']['connections']}, "
+        f"peak RSS: {report['peak_rss_mb']:.1f} MiB",
+    )
+
+
+def main() -> None:
+    """Parse the arguments and run the load test."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--events-per-day", type=int, default=20)
+    parser.add_argument("--communities", type=int, default=2)
+    parser.add_argument(
+        "--start",
+        default=f"{datetime.datetime.now(tz=datetime.UTC).date()}",
+        help="First date [YYYY-MM-DD]",
+    )
+    parser.add_argument(
+        "--database",
+        default="",
+        help="Database url, by default a temporary SQLite file",
+    )
+    parser.add_argument("--image-ratio", type=float, default=0.6)
+    parser.add_argument("--supabase-latency", type=float, default=0.0)
+    parser.add_argument("--lemmy-latency", type=float, default=0.0)
+    parser.add_argument("--lemmy-error-rate", type=float, default=0.0)
+    parser.add_argument("--langcode", default="EN")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--json",
+        default="",
+        help="Also write the report to this JSON file",
+    )
+    parser.add_argument("--verbose", "-v", action="store_true")
+    args = parser.parse_args()
+
+    report = run(args)
+    print_report(report)
+    if args.json:
+        with Path(args.json).open("w", encoding="utf-8") as json_file:
+            json.dump(report, json_file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#    Copyright (C) 2025 Carles Muñoz Gorriz <carlesmu@internautas.org>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as
+#    published by the Free Software Foundation, either version 3 of the
+#    License, or (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Micro-benchmarks of the hydration of the events of the local database.
+
+The events of a full day are stored in a temporary SQLite database and
+their views/rows are loaded once, so only the creation of the `Event`
+objects is measured.
+"""
+
+import datetime
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+from pytest_benchmark.fixture import BenchmarkFixture
+
+from apc_lemmy_bot.database import Database, Events
+from apc_lemmy_bot.event import Event
+from tests.fakes.corpus import (
+    generate_images,
+    generate_rows,
+    write_database,
+)
+
+DATE: datetime.date = datetime.date(2024, 5, 1)
+EVENTS_PER_DAY: int = 50
+
+
+@pytest.fixture(scope="module")
+def views(tmp_path_factory: pytest.TempPathFactory) -> Iterator[list[Events]]:
+    """Return the views/rows of the events of a full day."""
+    path = Path(tmp_path_factory.mktemp("database")) / "events.db"
+    database = Database(database_url=f"sqlite:///{path}", echo=False)
+    rows = list(generate_rows(EVENTS_PER_DAY, seed=0, dates=[DATE]))
+    write_database(database, rows, generate_images(rows, 16, 16))
+    yield database.get_views_by_month_day(DATE.month, DATE.day) or []
+    database.engine.dispose()
+
+
+def _event_from_dict(view: Events) -> Event:
+    """Create an event with a dict, like `Database` did before 0.8.0."""
+    image = view.images[0] if view.images else None
+    return Event(
+        {
+            "id": str(view.id_uuid),
+            "title": view.title,
+            "slugTitle": view.slugTitle,
+            "otd": view.otd,
+            "description": view.description,
+            "imgSrc": image.imgSrc if image else None,
+            "imgAltText": image.imgAltText if image else None,
+            "NSFW": view.NSFW,
+            "date": view.date.strftime("%Y-%m-%d"),
+            "links": [x.link for x in view.links],
+            "tags": [x.tag for x in view.tags],
+            "day": view.day,
+            "month": view.month,
+            "langcode": view.langcode,
+        },
+        base_event_url=view.extended.base_event_url,
+        base_event_img_url=view.extended.base_event_img_url,
+    )
+
+
+def test_hydrate_day(benchmark: BenchmarkFixture, views: list[Events]) -> None:
+    """Benchmark the events of a day created by `Database`."""
+    # pylint: disable=W0212  # protected-access
+    hydrate = Database._get_event_from_view  # noqa: SLF001
+    events = benchmark(lambda: [hydrate(view) for view in views])
+    assert len(events) == EVENTS_PER_DAY
+    assert events == [_event_from_dict(view) for view in views]
+
+
+def test_hydrate_day_from_dict(
+    benchmark: BenchmarkFixture,
+    views: list[Events],
+) -> None:
+    """Benchmark the events of a day created from dicts, as a baseline."""
+    events = benchmark(lambda: [_event_from_dict(view) for view in views])
+    assert len(events) == EVENTS_PER_DAY
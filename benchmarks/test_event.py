@@ -0,0 +1,181 @@
+#    Copyright (C) 2025 Carles Muñoz Gorriz <carlesmu@internautas.org>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as
+#    published by the Free Software Foundation, either version 3 of the
+#    License, or (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Micro-benchmarks of the Event class.
+
+Run them with ``task bench``: the results are saved in `.benchmarks` and
+compared with the previous saved run.
+"""
+
+import copy
+import itertools
+from typing import Any
+
+import pytest
+from pytest_benchmark.fixture import BenchmarkFixture
+
+from apc_lemmy_bot.event import Event
+from tests.fakes.corpus import generate_rows
+
+
+def test_init(
+    benchmark: BenchmarkFixture,
+    row: dict[str, Any],
+    base_urls: tuple[str, str],
+) -> None:
+    """Benchmark Event.__init__."""
+    event = benchmark(Event, row, *base_urls, row["langcode"])
+    assert event.id == row["id"]
+
+
+def test_nice_title(
+    benchmark: BenchmarkFixture,
+    event: Event,
+    max_title_length: int,
+) -> None:
+    """Benchmark Event.nice_title with the Lemmy max length."""
+    title = benchmark(event.nice_title, max_title_length)
+    assert len(title) <= max_title_length
+
+
+def test_nice_title_unlimited(
+    benchmark: BenchmarkFixture,
+    event: Event,
+) -> None:
+    """Benchmark Event.nice_title without max length."""
+    assert benchmark(event.nice_title).startswith(f"{event.title}")
+
+
+@pytest.mark.parametrize("sentences", [100, 1_000, 10_000])
+def test_nice_title_adversarial(
+    benchmark: BenchmarkFixture,
+    base_urls: tuple[str, str],
+    sentences: int,
+) -> None:
+    """
+    Benchmark Event.nice_title with adversarial titles.
+
+    Every dot+space follows an abbreviation and the title ends with "...",
+    so all of them are scanned: the time should grow linearly.
+    """
+    abbreviations = itertools.cycle(("Dr", "Mr", "Ms", "Sr", "U.S", "V"))
+    otd = " ".join(f"Word{n} {next(abbreviations)}." for n in range(sentences))
+    row = next(generate_rows(1, seed=0))
+    event = Event(
+        {**row, "title": "A strike", "otd": f"{otd}.."},
+        *base_urls,
+        row["langcode"],
+    )
+    assert benchmark(event.nice_title) == f"A strike {otd}.."
+
+
+def test_nice_description(benchmark: BenchmarkFixture, event: Event) -> None:
+    """Benchmark Event.nice_description."""
+    assert benchmark(event.nice_description)
+
+
+@pytest.mark.parametrize(
+    ("description", "profile", "expected"),
+    [
+        ("", "default", ""),
+        ("*a* _b_ `c`", "default", "✱a✱ \uff3fb\uff3f 'c'"),
+        ("*a* _b_ `c`", "backslash", r"\*a\* \_b\_ \`c\`"),
+        ("*a* _b_ `c`", "none", "*a* _b_ `c`"),
+        (
+            'Text.\n\n"A quote"\n\n- An author',
+            "default",
+            'Text.\n\n> *"A quote"*\n> \n> `- An author`',
+        ),
+        (
+            '"A quote"\n\n- An_author',
+            "default",
+            '> *"A quote"*\n> \n> `- An\uff3fauthor`',
+        ),
+        # split("\n\n") pairs the newlines from the left:
+        (
+            'Text.\n\n\n"A quote"\n\n- An author',
+            "default",
+            'Text.\n\n\n"A quote"\n\n- An author',
+        ),
+        (
+            'Text.\n\n"A quote"\n\n\n- An author',
+            "default",
+            'Text.\n\n"A quote"\n\n\n- An author',
+        ),
+        (
+            'Text.\n\n\n\n"A quote"\n\n- An author',
+            "default",
+            'Text.\n\n\n\n> *"A quote"*\n> \n> `- An author`',
+        ),
+        (
+            'Text.\n\n"A quote" -\n\n- An author',
+            "default",
+            'Text.\n\n"A quote" -\n\n- An author',
+        ),
+    ],
+)
+def test_nice_description_output(
+    event: Event,
+    description: str,
+    profile: str,
+    expected: str,
+) -> None:
+    """Check the output of Event.nice_description."""
+    event.description = description
+    assert event.nice_description(profile) == expected
+
+
+def test_get_content(benchmark: BenchmarkFixture, event: Event) -> None:
+    """Benchmark the rendering of Event.get_content."""
+
+    def _invalidate() -> None:
+        event.title = event.title  # Setting a field clears the cache
+
+    content = benchmark.pedantic(
+        event.get_content,
+        setup=_invalidate,
+        rounds=2000,
+    )
+    assert content.startswith(f"## {event.title}")
+
+
+def test_get_content_cached(benchmark: BenchmarkFixture, event: Event) -> None:
+    """Benchmark Event.get_content of an already rendered event."""
+    content = event.get_content()
+    assert benchmark(event.get_content) is content
+
+
+def test_json(benchmark: BenchmarkFixture, event: Event) -> None:
+    """Benchmark Event.json."""
+    assert f"{event.id}" in benchmark(event.json)
+
+
+def test_json_line(benchmark: BenchmarkFixture, event: Event) -> None:
+    """Benchmark Event.json_line."""
+    line = benchmark(event.json_line)
+    assert "\n" not in line
+    assert f"{event.id}" in line
+
+
+def test_eq(benchmark: BenchmarkFixture, event: Event) -> None:
+    """Benchmark Event.__eq__ of equal events."""
+    other = copy.deepcopy(event)
+    assert benchmark(event.__eq__, other)
+
+
+def test_hash(benchmark: BenchmarkFixture, event: Event) -> None:
+    """Benchmark Event.__hash__."""
+    assert benchmark(hash, event) == hash(event)
@@ -0,0 +1,88 @@
+#    Copyright (C) 2025 Carles Muñoz Gorriz <carlesmu@internautas.org>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as
+#    published by the Free Software Foundation, either version 3 of the
+#    License, or (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+Benchmarks of the snapshots of the local database.
+
+A snapshot of a corpus is exported once and imported to a new SQLite
+database in each round.
+"""
+
+import gzip
+import itertools
+from pathlib import Path
+
+import pytest
+from pytest_benchmark.fixture import BenchmarkFixture
+
+from apc_lemmy_bot.database import Database
+from apc_lemmy_bot.snapshot import export_snapshot, import_snapshot
+from tests.fakes.corpus import (
+    generate_images,
+    generate_rows,
+    write_database,
+)
+
+EVENTS: int = 200
+
+
+@pytest.fixture(scope="module")
+def snapshot(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    """Return a gzip snapshot, with images, of a corpus."""
+    tmp_path = Path(tmp_path_factory.mktemp("snapshot"))
+    database = Database(
+        database_url=f"sqlite:///{tmp_path / 'events.db'}",
+        echo=False,
+    )
+    rows = list(generate_rows(EVENTS, seed=0))
+    write_database(database, rows, generate_images(rows, 16, 16))
+    path = tmp_path / "events.jsonl.gz"
+    assert export_snapshot(database, str(path), images=True) == EVENTS
+    database.engine.dispose()
+    return path
+
+
+def test_import_snapshot(
+    benchmark: BenchmarkFixture,
+    snapshot: Path,
+    tmp_path: Path,
+) -> None:
+    """Benchmark the import of a snapshot to an empty database."""
+    counter = itertools.count()
+
+    def _database() -> tuple[tuple[Database, str], dict[str, int]]:
+        database = Database(
+            database_url=f"sqlite:///{tmp_path / f'{next(counter)}.db'}",
+            echo=False,
+        )
+        return (database, str(snapshot)), {}
+
+    stats = benchmark.pedantic(import_snapshot, setup=_database, rounds=10)
+    assert stats.events == EVENTS
+    assert stats.skipped == 0
+
+
+def test_snapshot_round_trip(snapshot: Path, tmp_path: Path) -> None:
+    """Check that an imported snapshot is exported again without changes."""
+    database = Database(
+        database_url=f"sqlite:///{tmp_path / 'events.db'}",
+        echo=False,
+    )
+    assert import_snapshot(database, str(snapshot)).events == EVENTS
+    assert import_snapshot(database, str(snapshot)).skipped == EVENTS
+    path = tmp_path / "events.jsonl.gz"
+    assert export_snapshot(database, str(path), images=True) == EVENTS
+    database.engine.dispose()
+    with gzip.open(snapshot) as expected, gzip.open(path) as result:
+        assert result.read() == expected.read()
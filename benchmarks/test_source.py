@@ -0,0 +1,86 @@
+#    Copyright (C) 2025 Carles Muñoz Gorriz <carlesmu@internautas.org>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as
+#    published by the Free Software Foundation, either version 3 of the
+#    License, or (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+Benchmarks of the sources of events.
+
+The events of a full day are stored in a temporary SQLite database and in a
+JSON Lines mirror, so the sources can be compared.
+"""
+
+import datetime
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+from pytest_benchmark.fixture import BenchmarkFixture
+
+from apc_lemmy_bot.database import Database
+from apc_lemmy_bot.source import DatabaseSource, DirectorySource, EventSource
+from tests.fakes.corpus import (
+    generate_images,
+    generate_rows,
+    write_database,
+)
+
+DATE: datetime.date = datetime.date(2024, 5, 1)
+EVENTS_PER_DAY: int = 50
+
+
+@pytest.fixture(scope="module")
+def sources(
+    tmp_path_factory: pytest.TempPathFactory,
+) -> Iterator[dict[str, EventSource]]:
+    """Return the database and directory sources of the events of a day."""
+    tmp_path = Path(tmp_path_factory.mktemp("source"))
+    database = Database(
+        database_url=f"sqlite:///{tmp_path / 'events.db'}",
+        echo=False,
+    )
+    rows = list(generate_rows(EVENTS_PER_DAY, seed=0, dates=[DATE]))
+    write_database(database, rows, generate_images(rows, 16, 16))
+
+    mirror = tmp_path / "mirror"
+    mirror.mkdir()
+    database_source = DatabaseSource(database)
+    with (mirror / "events.jsonl").open("w", encoding="utf-8") as stream:
+        stream.writelines(
+            f"{event.json_line()}\n" for event in database_source.fetch(DATE)
+        )
+
+    yield {"database": database_source, "directory": DirectorySource(mirror)}
+    database.engine.dispose()
+
+
+@pytest.mark.parametrize("name", ["database", "directory"])
+def test_fetch(
+    benchmark: BenchmarkFixture,
+    sources: dict[str, EventSource],
+    name: str,
+) -> None:
+    """Benchmark the events of a day fetched from a source."""
+    events = benchmark(lambda: list(sources[name].fetch(DATE)))
+    assert len(events) == EVENTS_PER_DAY
+    assert events == list(sources["database"].fetch(DATE))
+
+
+def test_fetch_range(sources: dict[str, EventSource]) -> None:
+    """Check that the range of dates has the events of each day."""
+    events = list(
+        sources["directory"].fetch_range(
+            DATE - datetime.timedelta(days=1),
+            DATE + datetime.timedelta(days=1),
+        ),
+    )
+    assert events == list(sources["database"].fetch(DATE))
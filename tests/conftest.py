@@ -0,0 +1,71 @@
+#    Copyright (C) 2025 Carles Muñoz Gorriz <carlesmu@internautas.org>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as
+#    published by the Free Software Foundation, either version 3 of the
+#    License, or (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Fixtures of the tests."""
+
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from apc_lemmy_bot import apc_lb_conf, lemmy, transport
+from apc_lemmy_bot.event import Event
+from tests.fakes import FakeLemmy
+from tests.fakes.corpus import generate_rows
+
+BASE_EVENT_URL: str = "https://example.org/events/"
+BASE_EVENT_IMG_URL: str = "https://example.org/images/"
+
+
+@pytest.fixture(autouse=True)
+def lemmy_conf(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Isolate the Lemmy sessions, rate limits and caches of each test."""
+    monkeypatch.setattr(
+        apc_lb_conf.lemmy,
+        "rate_limit_file",
+        str(tmp_path / "rate.sqlite"),
+    )
+    monkeypatch.setattr(apc_lb_conf.lemmy, "rate", 1000.0)
+    monkeypatch.setattr(apc_lb_conf.lemmy, "burst", 1000)
+    monkeypatch.setattr(apc_lb_conf.lemmy, "token_cache", "")
+    monkeypatch.setattr(lemmy, "_sessions", {})
+    monkeypatch.setattr(lemmy, "community_cache", lemmy.CommunityCache())
+
+
+@pytest.fixture(autouse=True)
+def pythorhead_transport() -> Iterator[None]:
+    """Send the requests of pythorhead with the shared HTTP session."""
+    transport.use_in_pythorhead()
+    yield
+    transport.restore_pythorhead()
+
+
+@pytest.fixture
+def fake_lemmy() -> Iterator[FakeLemmy]:
+    """Return a running fake Lemmy instance."""
+    with FakeLemmy() as fake:
+        yield fake
+
+
+@pytest.fixture
+def row() -> dict[str, Any]:
+    """Return a supabase row of an event without image."""
+    return next(generate_rows(1, seed=0, image_ratio=0.0))
+
+
+@pytest.fixture
+def event(row: dict[str, Any]) -> Event:
+    """Return an event."""
+    return Event(row, BASE_EVENT_URL, BASE_EVENT_IMG_URL, row["langcode"])
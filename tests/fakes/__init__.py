@@ -0,0 +1,26 @@
+#    Copyright (C) 2025 Carles Muñoz Gorriz <carlesmu@internautas.org>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as
+#    published by the Free Software Foundation, either version 3 of the
+#    License, or (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+tests fakes package.
+
+Local stand-ins of the services used by the bot, to exercise it offline in
+integration tests and benchmarks.
+"""
+
+from .lemmy import FakeLemmy
+from .supabase import FakeSupabase
+
+__all__: list[str] = ["FakeLemmy", "FakeSupabase"]
@@ -0,0 +1,434 @@
+#    Copyright (C) 2025 Carles Muñoz Gorriz <carlesmu@internautas.org>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as
+#    published by the Free Software Foundation, either version 3 of the
+#    License, or (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+tests fakes corpus module.
+
+A generator of synthetic events, with realistic title, description and image
+sizes, tags, links, dated images and several language codes. The events can be
+written to a `Database` or to JSON fixtures for `FakeSupabase`, to measure how
+the bot scales with 10k, 100k or 1M events.
+
+Run it with, by example::
+
+    python -m tests.fakes.corpus --events 100000 --json events.json
+"""
+
+import argparse
+import calendar
+import datetime
+import json
+import random
+import struct
+import uuid
+import zlib
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from typing import Any
+
+from apc_lemmy_bot.database import Database
+from apc_lemmy_bot.event import Event
+from tests.fakes.supabase import FakeSupabase
+
+LANGCODES: tuple[str, ...] = ("EN", "ES", "CA", "FR", "IT", "DE")
+
+_WORDS: tuple[str, ...] = (
+    "strike", "workers", "union", "general", "march", "police", "factory",
+    "miners", "railway", "assembly", "women", "peasants", "revolution",
+    "commune", "congress", "massacre", "rights", "eight", "hour", "day",
+    "textile", "dockers", "council", "federation", "solidarity", "wages",
+    "bread", "land", "freedom", "prison", "trial", "protest", "occupation",
+    "cooperative", "newspaper", "printers", "teachers", "students", "farm",
+    "harbour", "steel", "coal", "cotton", "garment", "anarchist", "socialist",
+    "syndicalist", "boycott", "picket", "lockout", "uprising", "independence",
+)  # fmt: skip
+
+# Words followed by a dot that are not the end of a sentence:
+_ABBREVIATIONS: tuple[str, ...] = ("Dr.", "Mr.", "Ms.", "U.S.", "Eugene V.")
+
+_DOMAINS: tuple[str, ...] = (
+    "en.wikipedia.org",
+    "libcom.org",
+    "www.marxists.org",
+    "archive.org",
+    "www.iww.org",
+)
+
+
+def _sentence(rnd: random.Random, min_words: int, max_words: int) -> str:
+    words = rnd.choices(_WORDS, k=rnd.randint(min_words, max_words))
+    if rnd.random() < 0.2:  # noqa: PLR2004
+        words.insert(rnd.randrange(len(words)), rnd.choice(_ABBREVIATIONS))
+    return " ".join(words).capitalize() + "."
+
+
+def _text(rnd: random.Random, min_chars: int, max_chars: int) -> str:
+    length = rnd.randint(min_chars, max_chars)
+    text = ""
+    while len(text) < length:
+        text += _sentence(rnd, 6, 25) + " "
+    return text.strip()
+
+
+def _description(rnd: random.Random) -> str:
+    paragraphs = [_text(rnd, 200, 900) for _ in range(rnd.randint(1, 5))]
+    if rnd.random() < 0.3:  # noqa: PLR2004
+        # A quotation at the end, like the ones improved by nice_description:
+        paragraphs.append(f'"{_sentence(rnd, 8, 30)}"')
+        paragraphs.append(f"- {' '.join(rnd.choices(_WORDS, k=2)).title()}")
+    description = "\n\n".join(paragraphs)
+    if rnd.random() < 0.1:  # noqa: PLR2004
+        description = description.replace(" union ", " *union* ")
+    return description
+
+
+def png(width: int, height: int, seed: int = 0) -> bytes:
+    """
+    Return a PNG image with some noise, made without Pillow.
+
+    Parameters
+    ----------
+    width : int
+        The width in pixels.
+    height : int
+        The height in pixels.
+    seed : int, optional
+        The seed of the noise. The default is 0.
+
+    Returns
+    -------
+    bytes
+        The PNG file.
+
+    """
+    rnd = random.Random(seed)
+    base = [rnd.randrange(256) for _ in range(3)]
+    gradient = bytes(
+        (base[channel] + x) % 256 for x in range(width) for channel in range(3)
+    )
+    # A gradient with some rows of noise, so it's not too compressible:
+    rows = b"".join(
+        b"\x00"
+        + (
+            rnd.randbytes(width * 3)
+            if y % 8 == 0
+            else gradient.translate(bytes((i + y) % 256 for i in range(256)))
+        )
+        for y in range(height)
+    )
+
+    def _chunk(kind: bytes, data: bytes) -> bytes:
+        return (
+            struct.pack(">I", len(data))
+            + kind
+            + data
+            + struct.pack(">I", zlib.crc32(kind + data))
+        )
+
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + _chunk(
+            b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+        )
+        + _chunk(b"IDAT", zlib.compress(rows))
+        + _chunk(b"IEND", b"")
+    )
+
+
+def generate_rows(  # pylint: disable=R0913,R0914  # Too many arguments/locals
+    count: int,
+    *,
+    seed: int = 0,
+    dates: list[datetime.date] | None = None,
+    langcodes: tuple[str, ...] = LANGCODES,
+    image_ratio: float = 0.6,
+    nsfw_ratio: float = 0.02,
+) -> Iterator[dict[str, Any]]:
+    """
+    Generate the rows of synthetic events, like the ones of Supabase.
+
+    Parameters
+    ----------
+    count : int
+        The number of events.
+    seed : int, optional
+        The seed of the generator, the same seed generates the same events.
+        The default is 0.
+    dates : Optional[list[datetime.date]], optional
+        The days (only month and day are used) of the events, spread evenly.
+        The default is all the days of a leap year.
+    langcodes : tuple[str, ...], optional
+        The language codes of the events. The default is `LANGCODES`.
+    image_ratio : float, optional
+        The ratio of events with image. The default is 0.6.
+    nsfw_ratio : float, optional
+        The ratio of events with NSFW images. The default is 0.02.
+
+    Yields
+    ------
+    dict[str, Any]
+        The row of an event. The events with image have an `imgSrc` with its
+        date, like `1936/07/19/<slug>.png`.
+
+    """
+    rnd = random.Random(seed)
+    if not dates:
+        first = datetime.date(2024, 1, 1)
+        dates = [first + datetime.timedelta(days=day) for day in range(366)]
+
+    for n in range(count):
+        date = dates[n % len(dates)]
+        year = rnd.randint(1750, 2020)
+        while (date.month, date.day) == (2, 29) and not calendar.isleap(year):
+            year -= 1
+        title = _sentence(rnd, 3, 14).removesuffix(".")[:120]
+        slug = "-".join(title.lower().replace(".", "").split())[:80]
+        slug = f"{slug}-{n}"
+        image = rnd.random() < image_ratio
+        yield {
+            "id": str(uuid.UUID(int=rnd.getrandbits(128), version=4)),
+            "title": title,
+            "slugTitle": slug,
+            "otd": _text(rnd, 80, 400),
+            "description": _description(rnd),
+            "imgAltText": _sentence(rnd, 4, 20) if image else None,
+            "NSFW": image and rnd.random() < nsfw_ratio,
+            "imgSrc": (
+                f"{year}/{date.month:02}/{date.day:02}/{slug}.png"
+                if image
+                else None
+            ),
+            "date": f"{year:04}-{date.month:02}-{date.day:02}",
+            "links": [
+                f"https://{rnd.choice(_DOMAINS)}/{rnd.getrandbits(40):x}"
+                for _ in range(rnd.randint(0, 5))
+            ],
+            "tags": rnd.sample(_WORDS, k=rnd.randint(0, 8)),
+            "day": date.day,
+            "month": date.month,
+            "langcode": rnd.choice(langcodes),
+        }
+
+
+def generate_images(
+    rows: Iterable[dict[str, Any]],
+    width: int = 320,
+    height: int = 240,
+) -> dict[str, bytes]:
+    """
+    Return a PNG image for each row with `imgSrc`.
+
+    Parameters
+    ----------
+    rows : Iterable[dict[str, Any]]
+        The rows of the events.
+    width : int, optional
+        The width of the images. The default is 320.
+    height : int, optional
+        The height of the images. The default is 240.
+
+    Returns
+    -------
+    dict[str, bytes]
+        The images by their `imgSrc`.
+
+    """
+    return {
+        row["imgSrc"]: png(width, height, seed=n)
+        for n, row in enumerate(rows)
+        if row.get("imgSrc")
+    }
+
+
+def generate_events(
+    count: int,
+    base_event_url: str = "https://example.org/events/",
+    base_event_img_url: str = "https://example.org/images/",
+    **kwargs: Any,  # noqa: ANN401
+) -> Iterator[Event]:
+    """
+    Generate synthetic events.
+
+    Parameters
+    ----------
+    count : int
+        The number of events.
+    base_event_url : str, optional
+        The base URL of the events. The default is
+        "https://example.org/events/".
+    base_event_img_url : str, optional
+        The base URL of the images. The default is
+        "https://example.org/images/".
+    **kwargs : Any
+        Other `generate_rows` arguments.
+
+    Yields
+    ------
+    Event
+        An event.
+
+    """
+    for row in generate_rows(count, **kwargs):
+        yield Event(row, base_event_url, base_event_img_url, row["langcode"])
+
+
+def write_json(path: str | Path, rows: Iterable[dict[str, Any]]) -> int:
+    """
+    Write the rows of the events to a JSON fixture.
+
+    Parameters
+    ----------
+    path : str | Path
+        The JSON file.
+    rows : Iterable[dict[str, Any]]
+        The rows.
+
+    Returns
+    -------
+    int
+        The number of rows written.
+
+    """
+    count = 0
+    with Path(path).open("w", encoding="utf-8") as fixture:
+        fixture.write("[")
+        for count, row in enumerate(rows, start=1):
+            fixture.write(",\n" if count > 1 else "\n")
+            json.dump(row, fixture, ensure_ascii=False)
+        fixture.write("\n]\n")
+    return count
+
+
+def write_images(directory: str | Path, images: dict[str, bytes]) -> None:
+    """
+    Write the images to a directory, keeping their dated paths.
+
+    Parameters
+    ----------
+    directory : str | Path
+        The directory.
+    images : dict[str, bytes]
+        The images by their `imgSrc`.
+
+    Returns
+    -------
+    None
+
+    """
+    for img_src, image in images.items():
+        path = Path(directory) / img_src
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(image)
+
+
+def write_database(
+    database: Database,
+    rows: Iterable[dict[str, Any]],
+    images: dict[str, bytes] | None = None,
+    base_event_url: str = "https://example.org/events/",
+) -> int:
+    """
+    Store the events in a database with `Database.add_event`.
+
+    The images are served by a `FakeSupabase` while they are stored.
+
+    Parameters
+    ----------
+    database : Database
+        The database.
+    rows : Iterable[dict[str, Any]]
+        The rows of the events.
+    images : Optional[dict[str, bytes]], optional
+        The images by their `imgSrc`. The default is None (the events are
+        stored without image).
+    base_event_url : str, optional
+        The base URL of the events. The default is
+        "https://example.org/events/".
+
+    Returns
+    -------
+    int
+        The number of events stored.
+
+    """
+    count = 0
+    with FakeSupabase(files=images or {}) as storage:
+        for count, row in enumerate(rows, start=1):  # noqa: B007
+            if not images:
+                row = {**row, "imgSrc": None}  # noqa: PLW2901
+            database.add_event(
+                Event(
+                    row,
+                    base_event_url,
+                    storage.storage_url,
+                    row.get("langcode"),
+                ),
+            )
+    return count
+
+
+def main() -> None:
+    """Parse the arguments and generate a corpus."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--events", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--langcodes",
+        default=",".join(LANGCODES),
+        help="Comma separated language codes",
+    )
+    parser.add_argument("--image-ratio", type=float, default=0.6)
+    parser.add_argument("--json", default="", help="JSON fixture to write")
+    parser.add_argument(
+        "--images-dir",
+        default="",
+        help="Directory where the images are written",
+    )
+    parser.add_argument(
+        "--database",
+        default="",
+        help="Database url where the events are stored",
+    )
+    args = parser.parse_args()
+
+    def _rows() -> Iterator[dict[str, Any]]:
+        return generate_rows(
+            args.events,
+            seed=args.seed,
+            langcodes=tuple(args.langcodes.split(",")),
+            image_ratio=args.image_ratio,
+        )
+
+    images = (
+        generate_images(_rows()) if args.images_dir or args.database else {}
+    )
+    if args.json:
+        print(
+            f"{write_json(args.json, _rows())} events written to {args.json}"
+        )
+    if args.images_dir:
+        write_images(args.images_dir, images)
+        print(f"{len(images)} images written to {args.images_dir}")
+    if args.database:
+        count = write_database(
+            Database(database_url=args.database, echo=False),
+            _rows(),
+            images,
+        )
+        print(f"{count} events stored in {args.database}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,613 @@
+#    Copyright (C) 2025 Carles Muñoz Gorriz <carlesmu@internautas.org>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as
+#    published by the Free Software Foundation, either version 3 of the
+#    License, or (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+tests fakes lemmy module.
+
+An in-process fake of the HTTP API of a Lemmy instance. It covers what the bot
+uses: nodeinfo, login, the site of the logged user, resolve a community, create
+and list posts and the pict-rs image upload. The latency, the errors and the rate limit can be
+configured.
+
+Examples
+--------
+>>> with FakeLemmy(communities=["test"]) as fake:
+...     lemmy = login(fake.url, "bot", "password")
+
+"""
+
+import base64
+import collections
+import email.parser
+import email.policy
+import http.server
+import json
+import random
+import secrets
+import threading
+import time
+import urllib.parse
+from typing import Any, Self
+
+LEMMY_VERSION: str = "0.19.5"
+
+
+def _jwt(sub: int, exp: float) -> str:
+    """Return a (not signed) JWT like the Lemmy ones."""
+
+    def _b64(data: dict[str, Any]) -> str:
+        return (
+            base64.urlsafe_b64encode(json.dumps(data).encode())
+            .decode()
+            .rstrip("=")
+        )
+
+    return ".".join(
+        (
+            _b64({"typ": "JWT", "alg": "HS256"}),
+            _b64(
+                {
+                    "sub": f"{sub}",
+                    "iss": "fake",
+                    "iat": int(time.time()),
+                    "exp": int(exp),
+                    "nonce": secrets.token_hex(8),
+                }
+            ),
+            secrets.token_urlsafe(16),
+        ),
+    )
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    """The HTTP handler of a FakeLemmy server."""
+
+    protocol_version = "HTTP/1.1"  # keep-alive
+    server: "_Server"
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002, ANN401
+        """Don't log the requests."""
+
+    def _send(
+        self,
+        status: int,
+        body: bytes | dict[str, Any],
+        content_type: str = "application/json",
+        headers: dict[str, str] | None = None,
+    ) -> None:
+        data = json.dumps(body).encode() if isinstance(body, dict) else body
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", f"{len(data)}")
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(data)
+
+    def _error(
+        self,
+        status: int,
+        error: str,
+        headers: dict[str, str] | None = None,
+    ) -> None:
+        if status >= 500:  # noqa: PLR2004
+            # Like the errors of the reverse proxy in front of Lemmy:
+            self._send(
+                status,
+                f"<html><body><h1>{status} {error}</h1></body></html>".encode(),
+                content_type="text/html",
+                headers=headers,
+            )
+            return
+        self._send(status, {"error": error}, headers=headers)
+
+    def _body(self) -> bytes:
+        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+    def _token(self) -> str | None:
+        auth = self.headers.get("Authorization", "")
+        if auth.startswith("Bearer "):
+            return auth.removeprefix("Bearer ")
+        for cookie in self.headers.get("Cookie", "").split(";"):
+            name, _, value = cookie.strip().partition("=")
+            if name == "jwt":
+                return value
+        return None
+
+    def _dispatch(self) -> None:
+        fake: FakeLemmy = self.server.fake
+        url = urllib.parse.urlsplit(self.path)
+        params = dict(urllib.parse.parse_qsl(url.query))
+        route = f"{self.command} {url.path}"
+        if url.path.startswith("/pictrs/image/delete/"):
+            route = f"{self.command} /pictrs/image/delete"
+        elif url.path.startswith("/pictrs/image/"):
+            route = f"{self.command} /pictrs/image/file"
+        body = self._body() if self.command in {"POST", "PUT"} else b""
+
+        fake.record(route, self.client_address)
+        if fake.latency:
+            time.sleep(fake.latency)
+        if (wait := fake.take_token()) > 0:
+            self._error(
+                429,
+                "rate_limit_error",
+                headers={"Retry-After": f"{max(1, round(wait))}"},
+            )
+            return
+        if (injected := fake.injected_error(route)) is not None:
+            self._error(*injected)
+            return
+
+        handler = {
+            "GET /nodeinfo/2.0.json": self._nodeinfo,
+            "POST /api/v3/user/login": self._login,
+            "GET /api/v3/site": self._site,
+            "GET /api/v3/community": self._community,
+            "GET /api/v3/search": self._search,
+            "GET /api/v3/resolve_object": self._resolve_object,
+            "POST /api/v3/post": self._create_post,
+            "GET /api/v3/post/list": self._list_posts,
+            "POST /pictrs/image": self._upload,
+            "GET /pictrs/image/file": self._image,
+            "HEAD /pictrs/image/file": self._image,
+            "GET /pictrs/image/delete": self._delete_image,
+        }.get(route)
+        if handler is None:
+            self._error(404, "not_found")
+            return
+        handler(url.path, params, body)
+
+    do_GET = _dispatch  # noqa: N815
+    do_HEAD = _dispatch  # noqa: N815
+    do_POST = _dispatch  # noqa: N815
+    do_PUT = _dispatch  # noqa: N815
+
+    # The endpoints:
+
+    def _nodeinfo(self, *_: Any) -> None:  # noqa: ANN401
+        self._send(
+            200,
+            {
+                "version": "2.0",
+                "software": {"name": "lemmy", "version": LEMMY_VERSION},
+                "protocols": ["activitypub"],
+                "openRegistrations": False,
+            },
+        )
+
+    def _login(self, _: str, __: dict[str, str], body: bytes) -> None:
+        data = json.loads(body or b"{}")
+        token = self.server.fake.login(
+            data.get("username_or_email", ""),
+            data.get("password", ""),
+        )
+        if token is None:
+            self._error(400, "incorrect_login")
+            return
+        self._send(200, {"jwt": token, "registration_created": False})
+
+    def _site(self, *_: Any) -> None:  # noqa: ANN401
+        user = self.server.fake.user_of(self._token())
+        site: dict[str, Any] = {
+            "site_view": {"site": {"id": 1, "name": "Fake Lemmy"}},
+            "version": LEMMY_VERSION,
+        }
+        if user is not None:
+            site["my_user"] = {
+                "local_user_view": {
+                    "person": {
+                        "id": list(self.server.fake.users).index(user) + 1,
+                        "name": user,
+                    },
+                },
+            }
+        self._send(200, site)
+
+    def _community(self, _: str, params: dict[str, str], __: bytes) -> None:
+        fake: FakeLemmy = self.server.fake
+        view = fake.community_view(params.get("name"), params.get("id"))
+        if view is None:
+            self._error(404, "couldnt_find_community")
+            return
+        self._send(200, {"community_view": view})
+
+    def _search(self, _: str, params: dict[str, str], __: bytes) -> None:
+        view = self.server.fake.community_view(params.get("q"))
+        self._send(
+            200,
+            {
+                "type_": "Communities",
+                "comments": [],
+                "posts": [],
+                "communities": [view] if view else [],
+                "users": [],
+            },
+        )
+
+    def _resolve_object(
+        self, _: str, params: dict[str, str], __: bytes
+    ) -> None:
+        view = self.server.fake.community_view(params.get("q"))
+        if view is None:
+            self._error(404, "couldnt_find_object")
+            return
+        self._send(200, {"community": view})
+
+    def _create_post(self, _: str, __: dict[str, str], body: bytes) -> None:
+        fake: FakeLemmy = self.server.fake
+        user = fake.user_of(self._token())
+        if user is None:
+            self._error(401, "not_logged_in")
+            return
+        data = json.loads(body or b"{}")
+        post_view = fake.create_post(user, data)
+        if post_view is None:
+            self._error(404, "couldnt_find_community")
+            return
+        self._send(200, {"post_view": post_view})
+
+    def _list_posts(self, _: str, params: dict[str, str], __: bytes) -> None:
+        fake: FakeLemmy = self.server.fake
+        posts = [
+            post_view
+            for post_view in reversed(fake.posts)
+            if "community_id" not in params
+            or post_view["post"]["community_id"] == int(params["community_id"])
+        ]
+        self._send(200, {"posts": posts[: int(params.get("limit", 10))]})
+
+    def _upload(self, _: str, __: dict[str, str], body: bytes) -> None:
+        fake: FakeLemmy = self.server.fake
+        if fake.user_of(self._token()) is None:
+            self._error(401, "not_logged_in")
+            return
+        message = email.parser.BytesParser(
+            policy=email.policy.HTTP
+        ).parsebytes(
+            b"Content-Type: "
+            + self.headers.get("Content-Type", "").encode()
+            + b"\r\n\r\n"
+            + body,
+        )
+        files = []
+        for part in message.iter_parts():  # type: ignore[attr-defined]
+            name = part.get_filename() or "image"
+            payload = part.get_payload(decode=True)
+            files.append(
+                fake.store_image(
+                    name,
+                    payload if isinstance(payload, bytes) else b"",
+                ),
+            )
+        self._send(200, {"msg": "ok", "files": files})
+
+    def _image(self, path: str, *_: Any) -> None:  # noqa: ANN401
+        image = self.server.fake.images.get(path.rsplit("/", 1)[-1])
+        if image is None:
+            self._error(404, "not_found")
+            return
+        self._send(200, image, content_type="application/octet-stream")
+
+    def _delete_image(self, path: str, *_: Any) -> None:  # noqa: ANN401
+        token, file = path.split("/")[-2:]
+        if not self.server.fake.delete_image(file, token):
+            self._error(404, "not_found")
+            return
+        self._send(204, b"")
+
+
+class _Server(http.server.ThreadingHTTPServer):
+    """The HTTP server of a FakeLemmy."""
+
+    daemon_threads = True
+    fake: "FakeLemmy"
+
+
+class FakeLemmy:  # pylint: disable=R0902  # Too many instance attributes
+    """
+    An in-process fake Lemmy instance.
+
+    It's started in a thread with `start` (or using it as a context manager)
+    and it keeps, in memory, the posts and the images sent to it.
+    """
+
+    def __init__(  # pylint: disable=R0913  # Too many arguments
+        self,
+        communities: list[str] | None = None,
+        users: dict[str, str] | None = None,
+        *,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        rate: float = 0.0,
+        burst: int = 10,
+        token_ttl: int = 3600,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        seed: int | None = None,
+    ) -> None:
+        """
+        Initialize a FakeLemmy object.
+
+        Parameters
+        ----------
+        communities : Optional[list[str]], optional
+            The names of the communities. The default is ["test"].
+        users : Optional[dict[str, str]], optional
+            The users and their passwords. They can login with their name or
+            with their email, `<name>@example.org`. The default is
+            {"bot": "password"}.
+        latency : float, optional
+            Seconds added to each response. The default is 0.0.
+        error_rate : float, optional
+            Probability of a random `500` error in any request. The default is
+            0.0.
+        rate : float, optional
+            Requests per second allowed, 0 to not limit them. The requests
+            over the limit get a `429 rate_limit_error`. The default is 0.0.
+        burst : int, optional
+            Requests allowed at once with a rate limit. The default is 10.
+        token_ttl : int, optional
+            Seconds the login tokens are valid. The default is 3600.
+        host : str, optional
+            The address where it listens. The default is "127.0.0.1".
+        port : int, optional
+            The port where it listens, 0 for any free port. The default is 0.
+        seed : Optional[int], optional
+            The seed of the random errors. The default is None.
+
+        """
+        self.users: dict[str, str] = (
+            users if users is not None else {"bot": "password"}
+        )
+        self.communities: dict[str, int] = {
+            name: n
+            for n, name in enumerate(
+                communities if communities is not None else ["test"],
+                start=1,
+            )
+        }
+        self.latency: float = latency
+        self.error_rate: float = error_rate
+        self.rate: float = rate
+        self.burst: int = burst
+        self.token_ttl: int = token_ttl
+        self.posts: list[dict[str, Any]] = []
+        self.images: dict[str, bytes] = {}
+        self.requests: collections.Counter[str] = collections.Counter()
+        self.connections: set[tuple[str, int]] = set()
+
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._tokens: dict[str, tuple[str, float]] = {}
+        self._delete_tokens: dict[str, str] = {}
+        self._errors: dict[
+            str,
+            collections.deque[tuple[int, str, dict[str, str] | None]],
+        ] = {}
+        self._bucket: tuple[float, float] = (float(burst), time.monotonic())
+        self._server = _Server((host, port), _Handler)
+        self._server.fake = self
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        """The base URL of the instance."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host!s}:{port}"
+
+    @property
+    def domain(self) -> str:
+        """The domain of the instance, used in the community names."""
+        return urllib.parse.urlsplit(self.url).netloc
+
+    def start(self) -> Self:
+        """Start serving in a thread."""
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._server.serve_forever,
+                name="FakeLemmy",
+                daemon=True,
+            )
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop serving."""
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+
+    def __enter__(self) -> Self:
+        """Start serving."""
+        return self.start()
+
+    def __exit__(self, *_: object) -> None:
+        """Stop serving."""
+        self.stop()
+
+    def fail_next(
+        self,
+        route: str,
+        status: int = 500,
+        error: str = "internal_server_error",
+        times: int = 1,
+        headers: dict[str, str] | None = None,
+    ) -> None:
+        """
+        Make the next requests to a route fail.
+
+        Parameters
+        ----------
+        route : str
+            The method and the path (e.g.: `POST /api/v3/post`).
+        status : int, optional
+            The HTTP status. The default is 500.
+        error : str, optional
+            The Lemmy error. The default is "internal_server_error".
+        times : int, optional
+            How many requests fail. The default is 1.
+        headers : Optional[dict[str, str]], optional
+            The headers of the error (e.g.: `Retry-After`). The default is
+            None.
+
+        Returns
+        -------
+        None
+
+        """
+        with self._lock:
+            self._errors.setdefault(route, collections.deque()).extend(
+                [(status, error, headers)] * times,
+            )
+
+    def revoke_tokens(self) -> None:
+        """Invalidate all the login tokens."""
+        with self._lock:
+            self._tokens.clear()
+
+    # Used by the handler:
+
+    def record(self, route: str, client: tuple[str, int]) -> None:
+        """Count a request and its connection."""
+        with self._lock:
+            self.requests[route] += 1
+            self.connections.add(client)
+
+    def take_token(self) -> float:
+        """Return 0 if the request is under the rate limit or the wait."""
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            tokens, updated = self._bucket
+            now = time.monotonic()
+            tokens = min(
+                float(self.burst), tokens + (now - updated) * self.rate
+            )
+            if tokens < 1:
+                self._bucket = (tokens, now)
+                return (1 - tokens) / self.rate
+            self._bucket = (tokens - 1, now)
+            return 0.0
+
+    def injected_error(
+        self,
+        route: str,
+    ) -> tuple[int, str, dict[str, str] | None] | None:
+        """Return the (status, error, headers) of an injected error, if any."""
+        with self._lock:
+            if self._errors.get(route):
+                return self._errors[route].popleft()
+            if self.error_rate and self._random.random() < self.error_rate:
+                return 500, "internal_server_error", None
+        return None
+
+    def login(self, user: str, password: str) -> str | None:
+        """Return a new token, or None if the password is wrong."""
+        user = user.removesuffix("@example.org")
+        if user not in self.users or self.users[user] != password:
+            return None
+        exp = time.time() + self.token_ttl
+        token = _jwt(list(self.users).index(user) + 1, exp)
+        with self._lock:
+            self._tokens[token] = (user, exp)
+        return token
+
+    def user_of(self, token: str | None) -> str | None:
+        """Return the user of a valid token."""
+        with self._lock:
+            user, exp = self._tokens.get(token or "", ("", 0.0))
+        return user if user and exp > time.time() else None
+
+    def community_view(
+        self,
+        name: str | None = None,
+        community_id: str | int | None = None,
+    ) -> dict[str, Any] | None:
+        """Return the community view of a community, by name or id."""
+        for community, n in self.communities.items():
+            if (
+                name is not None
+                and name in {community, f"{community}@{self.domain}"}
+            ) or (community_id is not None and int(community_id) == n):
+                return {
+                    "community": {
+                        "id": n,
+                        "name": community,
+                        "title": community,
+                        "actor_id": f"{self.url}/c/{community}",
+                        "local": True,
+                    },
+                    "subscribed": "NotSubscribed",
+                    "blocked": False,
+                    "counts": {"community_id": n, "subscribers": 0},
+                }
+        return None
+
+    def create_post(
+        self,
+        user: str,
+        data: dict[str, Any],
+    ) -> dict[str, Any] | None:
+        """Store a post and return its post view."""
+        community = self.community_view(community_id=data.get("community_id"))
+        if community is None:
+            return None
+        with self._lock:
+            post_id = len(self.posts) + 1
+            post_view = {
+                "post": {
+                    "id": post_id,
+                    "name": data.get("name"),
+                    "url": data.get("url"),
+                    "body": data.get("body"),
+                    "nsfw": bool(data.get("nsfw")),
+                    "language_id": data.get("language_id", 0),
+                    "community_id": community["community"]["id"],
+                    "creator_id": list(self.users).index(user) + 1,
+                    "ap_id": f"{self.url}/post/{post_id}",
+                    "local": True,
+                    "published": time.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                },
+                "creator": {
+                    "id": list(self.users).index(user) + 1,
+                    "name": user,
+                },
+                "community": community["community"],
+                "counts": {"post_id": post_id, "comments": 0, "score": 1},
+            }
+            self.posts.append(post_view)
+        return post_view
+
+    def store_image(self, name: str, image: bytes) -> dict[str, str]:
+        """Store an uploaded image and return its pict-rs file."""
+        file = f"{secrets.token_hex(8)}-{name.rsplit('/', 1)[-1]}"
+        delete_token = secrets.token_hex(8)
+        with self._lock:
+            self.images[file] = image
+            self._delete_tokens[file] = delete_token
+        return {"file": file, "delete_token": delete_token}
+
+    def delete_image(self, file: str, delete_token: str) -> bool:
+        """Delete an uploaded image."""
+        with self._lock:
+            if self._delete_tokens.get(file) != delete_token:
+                return False
+            del self._delete_tokens[file]
+            del self.images[file]
+        return True
@@ -0,0 +1,367 @@
+#    Copyright (C) 2025 Carles Muñoz Gorriz <carlesmu@internautas.org>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as
+#    published by the Free Software Foundation, either version 3 of the
+#    License, or (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+tests fakes supabase module.
+
+An in-process fake of the PostgREST API of a Supabase project. It serves
+tables from memory or from JSON fixtures, with the `eq` filters, the `select`
+projection, the `order` and the pagination (`limit`/`offset` or the `Range`
+header) that the bot uses, and public files like the Supabase storage. The
+latency can be configured.
+
+Examples
+--------
+>>> with FakeSupabase.from_fixture("events.json") as fake:
+...     events = get_dated_events(date, url=fake.url, key=fake.key)
+
+"""
+
+import base64
+import collections
+import http.server
+import json
+import threading
+import time
+import urllib.parse
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any, Self
+
+# The operators of the PostgREST filters:
+_OPERATORS: dict[str, Any] = {
+    "eq": lambda value, arg: value == arg,
+    "neq": lambda value, arg: value != arg,
+    "gt": lambda value, arg: value > arg,
+    "gte": lambda value, arg: value >= arg,
+    "lt": lambda value, arg: value < arg,
+    "lte": lambda value, arg: value <= arg,
+    "in": lambda value, arg: value in arg,
+}
+
+
+def _compare(value: Any, arg: str) -> tuple[Any, Any]:  # noqa: ANN401
+    """Return the value and the argument of a filter with the same type."""
+    if isinstance(value, bool) or value is None:
+        return f"{value}".lower(), arg.lower()
+    if isinstance(value, int | float):
+        try:
+            return value, type(value)(arg)
+        except ValueError:
+            pass
+    return f"{value}", arg
+
+
+def _match(row: dict[str, Any], column: str, condition: str) -> bool:
+    """Return if a row matches a filter like `eq.10` or `in.(1,2)`."""
+    operator, _, arg = condition.partition(".")
+    negate = operator == "not"
+    if negate:
+        operator, _, arg = arg.partition(".")
+    if operator not in _OPERATORS:
+        msg = f"Operator '{operator}' not supported"
+        raise ValueError(msg)
+    value = row.get(column)
+    if operator == "in":
+        args = [x.strip().strip('"') for x in arg.strip("()").split(",")]
+        result = any(_OPERATORS["eq"](*_compare(value, item)) for item in args)
+    else:
+        result = _OPERATORS[operator](*_compare(value, arg))
+    return result != negate
+
+
+_STORAGE_PATH: str = "/storage/v1/object/public/"
+
+
+def _order_key(
+    column: str,
+) -> Callable[[dict[str, Any]], tuple[bool, Any]]:
+    """Return the sort key of the rows by a column, nulls last if ascending."""
+
+    def _key(row: dict[str, Any]) -> tuple[bool, Any]:
+        return row.get(column) is None, row.get(column)
+
+    return _key
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    """The HTTP handler of a FakeSupabase server."""
+
+    protocol_version = "HTTP/1.1"  # keep-alive
+    server: "_Server"
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002, ANN401
+        """Don't log the requests."""
+
+    def _send(
+        self,
+        status: int,
+        body: Any,  # noqa: ANN401
+        headers: dict[str, str] | None = None,
+    ) -> None:
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", f"{len(data)}")
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(data)
+
+    def _error(self, status: int, code: str, message: str) -> None:
+        self._send(
+            status,
+            {"code": code, "details": None, "hint": None, "message": message},
+        )
+
+    def _file(self, path: str) -> None:
+        file = self.server.fake.files.get(
+            urllib.parse.unquote(path.removeprefix(_STORAGE_PATH)),
+        )
+        if file is None:
+            self._error(404, "404", "Object not found")
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", f"{len(file)}")
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(file)
+
+    def _select(self) -> None:
+        fake: FakeSupabase = self.server.fake
+        url = urllib.parse.urlsplit(self.path)
+        fake.record(url.path)
+        if fake.latency:
+            time.sleep(fake.latency)
+
+        if url.path.startswith(_STORAGE_PATH):
+            self._file(url.path)
+            return
+
+        table = url.path.removeprefix("/rest/v1/")
+        if not url.path.startswith("/rest/v1/") or table not in fake.tables:
+            self._error(
+                404,
+                "42P01",
+                f'relation "public.{table}" does not exist',
+            )
+            return
+
+        rows = fake.tables[table]
+        select, order = "*", ""
+        offset, limit = 0, None
+        try:
+            for column, condition in urllib.parse.parse_qsl(url.query):
+                match column:
+                    case "select":
+                        select = condition
+                    case "order":
+                        order = condition
+                    case "limit":
+                        limit = int(condition)
+                    case "offset":
+                        offset = int(condition)
+                    case _:
+                        rows = [
+                            row
+                            for row in rows
+                            if _match(row, column, condition)
+                        ]
+        except ValueError as err:
+            self._error(400, "PGRST100", f"{err}")
+            return
+
+        for item in reversed([x for x in order.split(",") if x]):
+            column, _, direction = item.partition(".")
+            rows = sorted(
+                rows,
+                key=_order_key(column),
+                reverse=direction.startswith("desc"),
+            )
+
+        if (range_ := self.headers.get("Range")) is not None:
+            first, _, last = range_.partition("-")
+            offset = int(first)
+            limit = int(last) - offset + 1 if last else None
+        limit = min(
+            limit if limit is not None else fake.max_rows,
+            fake.max_rows,
+        )
+        total = len(rows)
+        rows = rows[offset : offset + limit]
+
+        if select.strip() != "*":
+            columns = [x.strip() for x in select.split(",")]
+            rows = [
+                {column: row.get(column) for column in columns} for row in rows
+            ]
+
+        count = (
+            f"{total}"
+            if "count=exact" in self.headers.get("Prefer", "")
+            else "*"
+        )
+        content_range = (
+            f"{offset}-{offset + len(rows) - 1}/{count}"
+            if rows
+            else f"*/{count}"
+        )
+        self._send(200, rows, headers={"Content-Range": content_range})
+
+    do_GET = _select  # noqa: N815
+    do_HEAD = _select  # noqa: N815
+
+
+class _Server(http.server.ThreadingHTTPServer):
+    """The HTTP server of a FakeSupabase."""
+
+    daemon_threads = True
+    fake: "FakeSupabase"
+
+
+class FakeSupabase:
+    """
+    An in-process fake of the REST API of a Supabase project.
+
+    It's started in a thread with `start` (or using it as a context manager).
+    Only the reads (`GET`) are supported.
+    """
+
+    def __init__(
+        self,
+        tables: dict[str, list[dict[str, Any]]] | None = None,
+        files: dict[str, bytes] | None = None,
+        *,
+        latency: float = 0.0,
+        max_rows: int = 1000,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ) -> None:
+        """
+        Initialize a FakeSupabase object.
+
+        Parameters
+        ----------
+        tables : Optional[dict[str, list[dict[str, Any]]]], optional
+            The rows of each table. The default is an empty `events` table.
+        files : Optional[dict[str, bytes]], optional
+            The public files, by their path, served at `storage_url`. The
+            default is None.
+        latency : float, optional
+            Seconds added to each response. The default is 0.0.
+        max_rows : int, optional
+            Maximum rows returned by a request, like the `max-rows` of
+            PostgREST. The default is 1000.
+        host : str, optional
+            The address where it listens. The default is "127.0.0.1".
+        port : int, optional
+            The port where it listens, 0 for any free port. The default is 0.
+
+        """
+        self.tables: dict[str, list[dict[str, Any]]] = (
+            tables if tables is not None else {"events": []}
+        )
+        self.files: dict[str, bytes] = files if files is not None else {}
+        self.latency: float = latency
+        self.max_rows: int = max_rows
+        self.requests: collections.Counter[str] = collections.Counter()
+
+        self._lock = threading.Lock()
+        self._server = _Server((host, port), _Handler)
+        self._server.fake = self
+        self._thread: threading.Thread | None = None
+
+    @classmethod
+    def from_fixture(
+        cls,
+        path: str | Path,
+        table: str = "events",
+        **kwargs: Any,  # noqa: ANN401
+    ) -> "FakeSupabase":
+        """
+        Create a FakeSupabase with a table loaded from a JSON fixture.
+
+        Parameters
+        ----------
+        path : str | Path
+            The JSON file, with a list of rows.
+        table : str, optional
+            The table name. The default is "events".
+        **kwargs : Any
+            Other `FakeSupabase` arguments.
+
+        Returns
+        -------
+        FakeSupabase
+            The fake, not started.
+
+        """
+        with Path(path).open(encoding="utf-8") as fixture:
+            return cls({table: json.load(fixture)}, **kwargs)
+
+    @property
+    def url(self) -> str:
+        """The URL of the project."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host!s}:{port}"
+
+    @property
+    def storage_url(self) -> str:
+        """The base URL of the public files."""
+        return f"{self.url}{_STORAGE_PATH}"
+
+    @property
+    def key(self) -> str:
+        """An anonymous key accepted by the Supabase client."""
+        payload = base64.urlsafe_b64encode(
+            json.dumps({"role": "anon", "iss": "fake"}).encode(),
+        ).decode()
+        return (
+            f"eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9.{payload.rstrip('=')}.fake"
+        )
+
+    def start(self) -> Self:
+        """Start serving in a thread."""
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._server.serve_forever,
+                name="FakeSupabase",
+                daemon=True,
+            )
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop serving."""
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+
+    def __enter__(self) -> Self:
+        """Start serving."""
+        return self.start()
+
+    def __exit__(self, *_: object) -> None:
+        """Stop serving."""
+        self.stop()
+
+    def record(self, path: str) -> None:
+        """Count a request."""
+        with self._lock:
+            self.requests[path] += 1
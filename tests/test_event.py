@@ -0,0 +1,96 @@
+#    Copyright (C) 2025 Carles Muñoz Gorriz <carlesmu@internautas.org>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as
+#    published by the Free Software Foundation, either version 3 of the
+#    License, or (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Tests of the events, also read from a fake Supabase project."""
+
+import dataclasses
+import datetime
+from typing import Any
+
+import pytest
+import requests
+
+from apc_lemmy_bot import apc_lb_conf
+from apc_lemmy_bot.event import Event, get_dated_events
+from tests.conftest import BASE_EVENT_IMG_URL, BASE_EVENT_URL
+from tests.fakes import FakeSupabase
+from tests.fakes.corpus import generate_rows
+
+DATES: list[datetime.date] = [
+    datetime.date(2024, 5, 1),
+    datetime.date(2024, 5, 2),
+]
+
+
+@pytest.fixture
+def rows(monkeypatch: pytest.MonkeyPatch) -> list[dict[str, Any]]:
+    """Return the rows of two days, keeping the Supabase configuration."""
+    monkeypatch.setattr(
+        apc_lb_conf,
+        "supabase",
+        dataclasses.replace(apc_lb_conf.supabase),
+    )
+    return list(generate_rows(10, seed=0, dates=DATES, image_ratio=0.0))
+
+
+def test_get_dated_events(rows: list[dict[str, Any]]) -> None:
+    """Check that only the events of the day are read."""
+    with FakeSupabase({"events": rows}) as fake:
+        events = get_dated_events(
+            DATES[0],
+            url=fake.url,
+            key=fake.key,
+            base_event_url=BASE_EVENT_URL,
+            base_event_img_url=BASE_EVENT_IMG_URL,
+        )
+
+    assert sorted(f"{x.slugTitle}" for x in events) == sorted(
+        x["slugTitle"]
+        for x in rows
+        if (x["month"], x["day"]) == (DATES[0].month, DATES[0].day)
+    )
+
+
+def test_order(rows: list[dict[str, Any]]) -> None:
+    """Check that the rows are ordered like PostgreSQL does with the nulls."""
+    rows[0]["imgSrc"] = "a.png"
+    rows[1]["imgSrc"] = "b.png"
+    with FakeSupabase({"events": rows}) as fake:
+        response = requests.get(
+            f"{fake.url}/rest/v1/events",
+            params={"select": "id,imgSrc", "order": "imgSrc,id"},
+            timeout=10,
+        )
+
+    response.raise_for_status()
+    selected = response.json()
+    assert [x["imgSrc"] for x in selected[:2]] == ["a.png", "b.png"]
+    assert all(x["imgSrc"] is None for x in selected[2:])
+    assert [x["id"] for x in selected[2:]] == sorted(x["id"] for x in rows[2:])
+
+
+def test_update_lists(event: Event, row: dict[str, Any]) -> None:
+    """Check that setting the links or tags updates the cached content."""
+    other = Event(row, BASE_EVENT_URL, BASE_EVENT_IMG_URL, row["langcode"])
+    assert event.get_content() == other.get_content()
+    assert hash(event) == hash(other)
+
+    event.links = [*event.links, "https://new.example/event"]
+    event.tags = [*event.tags, "new tag"]
+
+    content = event.get_content()
+    assert "[new.example](https://new.example/event)" in content
+    assert "[#newtag](/search?q=%23newtag" in content
+    assert event != other
+    assert event.as_dict()["tags"][-1] == "new tag"
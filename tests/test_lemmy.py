@@ -0,0 +1,192 @@
+#    Copyright (C) 2025 Carles Muñoz Gorriz <carlesmu@internautas.org>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as
+#    published by the Free Software Foundation, either version 3 of the
+#    License, or (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Tests of the Lemmy client against a fake Lemmy instance."""
+
+import pytest
+
+from apc_lemmy_bot import LEMMY_MAX_TITLE_LENGTH
+from apc_lemmy_bot.event import Event
+from apc_lemmy_bot.lemmy import (
+    LemmyError,
+    LemmySession,
+    LemmyTarget,
+    RetryPolicy,
+    create_event_post,
+    create_event_posts,
+    find_event_post,
+    image_exists,
+    upload_img_urls,
+)
+from tests.fakes import FakeLemmy
+
+
+def _session(fake: FakeLemmy) -> LemmySession:
+    """Return a session of the default user of a fake instance."""
+    return LemmySession(fake.url, "bot", "password", token_cache="")
+
+
+def test_create_event_post(fake_lemmy: FakeLemmy, event: Event) -> None:
+    """Check that the post of an event is created in the community."""
+    post = _session(fake_lemmy).call(
+        create_event_post, event, community="test"
+    )
+
+    assert post is not None
+    assert len(fake_lemmy.posts) == 1
+    created = fake_lemmy.posts[0]["post"]
+    assert created["name"] == event.nice_title(LEMMY_MAX_TITLE_LENGTH)
+    assert created["url"] == event.get_event_url()
+    assert post["post_view"]["post"]["ap_id"] == created["ap_id"]
+
+
+def test_create_event_post_unknown_community(
+    fake_lemmy: FakeLemmy,
+    event: Event,
+) -> None:
+    """Check that a missing community is not retried."""
+    with pytest.raises(LemmyError, match="couldnt_find_community"):
+        _session(fake_lemmy).call(
+            create_event_post,
+            event,
+            community="missing",
+            retry_policy=RetryPolicy(retries=1),
+        )
+    assert not fake_lemmy.posts
+
+
+def test_create_event_post_retries(
+    fake_lemmy: FakeLemmy,
+    event: Event,
+) -> None:
+    """Check that a post is retried after server errors."""
+    delays: list[float] = []
+    fake_lemmy.fail_next("POST /api/v3/post", status=502, times=2)
+
+    _session(fake_lemmy).call(
+        create_event_post,
+        event,
+        community="test",
+        retry_policy=RetryPolicy(sleep=delays.append),
+    )
+
+    assert len(delays) == 2  # noqa: PLR2004
+    assert fake_lemmy.requests["POST /api/v3/post"] == 3  # noqa: PLR2004
+    assert len(fake_lemmy.posts) == 1
+
+
+def test_session_login_again(fake_lemmy: FakeLemmy, event: Event) -> None:
+    """Check that the session logs in again when its token is rejected."""
+    session = _session(fake_lemmy)
+    session.login()
+    fake_lemmy.revoke_tokens()
+
+    session.call(create_event_post, event, community="test")
+
+    assert fake_lemmy.requests["POST /api/v3/user/login"] == 2  # noqa: PLR2004
+    assert len(fake_lemmy.posts) == 1
+
+
+def test_session_login_again_unauthorized(
+    fake_lemmy: FakeLemmy,
+    event: Event,
+) -> None:
+    """Check that the session logs in again after any 401 response."""
+    session = _session(fake_lemmy)
+    session.login()
+    fake_lemmy.fail_next("POST /api/v3/post", status=401, error="jwt_expired")
+
+    session.call(create_event_post, event, community="test")
+
+    assert fake_lemmy.requests["POST /api/v3/user/login"] == 2  # noqa: PLR2004
+    assert len(fake_lemmy.posts) == 1
+
+
+def test_create_event_posts_unauthorized(
+    fake_lemmy: FakeLemmy,
+    event: Event,
+) -> None:
+    """Check that posting to several targets logs in again after a 401."""
+    fake_lemmy.fail_next("POST /api/v3/post", status=401, error="jwt_expired")
+
+    results = create_event_posts(
+        event,
+        [LemmyTarget(fake_lemmy.url, "test")],
+        "bot",
+        "password",
+        retry_policy=RetryPolicy(retries=1),
+    )
+
+    assert results[0].error is None
+    assert fake_lemmy.requests["POST /api/v3/user/login"] == 2  # noqa: PLR2004
+    assert len(fake_lemmy.posts) == 1
+
+
+def test_create_event_posts(event: Event) -> None:
+    """Check that an event is posted to the communities of two instances."""
+    with (
+        FakeLemmy(["test", "other"]) as first,
+        FakeLemmy(["test"]) as second,
+    ):
+        targets = [
+            LemmyTarget(first.url, "test"),
+            LemmyTarget(first.url, "other"),
+            LemmyTarget(second.url, "test"),
+            LemmyTarget(second.url, "missing"),
+        ]
+        results = create_event_posts(
+            event,
+            targets,
+            "bot",
+            "password",
+            retry_policy=RetryPolicy(retries=1),
+        )
+
+    assert [x.target for x in results] == targets
+    assert [x.error is None for x in results] == [True, True, True, False]
+    assert isinstance(results[3].error, LemmyError)
+    assert len(first.posts) == 2  # noqa: PLR2004
+    assert len(second.posts) == 1
+    assert results[0].url is not None
+    assert results[0].url.startswith(first.url)
+    assert results[2].url is not None
+    assert results[2].url.startswith(second.url)
+
+
+def test_find_event_post(fake_lemmy: FakeLemmy, event: Event) -> None:
+    """Check that the post created by the bot is found."""
+    session = _session(fake_lemmy)
+    assert session.call(find_event_post, event, community="test") is None
+
+    session.call(create_event_post, event, community="test")
+
+    found = session.call(find_event_post, event, community="test")
+    assert found is not None
+    assert (
+        found["post_view"]["post"]["id"] == fake_lemmy.posts[0]["post"]["id"]
+    )
+
+
+def test_upload_img_urls(fake_lemmy: FakeLemmy) -> None:
+    """Check that an image is uploaded, retrieved and deleted."""
+    lemmy = _session(fake_lemmy).login()
+
+    image_url, delete_url = upload_img_urls(lemmy, b"an image", "image.png")
+
+    assert image_url.startswith(fake_lemmy.url)
+    assert list(fake_lemmy.images.values()) == [b"an image"]
+    assert image_exists(image_url)
+    lemmy.image.delete(delete_url)
+    assert not fake_lemmy.images
+    assert not image_exists(image_url)
@@ -0,0 +1,153 @@
+#    Copyright (C) 2025 Carles Muñoz Gorriz <carlesmu@internautas.org>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as
+#    published by the Free Software Foundation, either version 3 of the
+#    License, or (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Tests of the outbox of the posts."""
+
+import datetime
+from collections.abc import Iterator
+from pathlib import Path
+from uuid import UUID
+
+import pytest
+
+from apc_lemmy_bot import database as db
+from apc_lemmy_bot.cli.db import _enqueue_random_event, _recover_outbox
+from apc_lemmy_bot.event import Event
+from apc_lemmy_bot.lemmy import (
+    LemmySession,
+    LemmyTarget,
+    create_event_post,
+    find_event_post,
+)
+from tests.fakes import FakeLemmy
+from tests.fakes.corpus import generate_rows, write_database
+
+DATES: list[datetime.date] = [
+    datetime.date(2024, 5, 1),
+    datetime.date(2024, 5, 2),
+]
+TARGETS: list[LemmyTarget] = [
+    LemmyTarget("https://lemmy.example", "test"),
+    LemmyTarget("https://lemmy.example", "other"),
+]
+
+
+@pytest.fixture
+def database(tmp_path: Path) -> Iterator[db.Database]:
+    """Return a database with the events of two days."""
+    database = db.Database(
+        database_url=f"sqlite:///{tmp_path / 'events.db'}",
+        echo=False,
+    )
+    write_database(database, generate_rows(6, seed=0, dates=DATES))
+    yield database
+    database.engine.dispose()
+
+
+def _at(date: datetime.date) -> datetime.datetime:
+    """Return the datetime of a date."""
+    return datetime.datetime.combine(
+        date, datetime.time(9), tzinfo=datetime.UTC
+    )
+
+
+def test_claim_outbox_once(database: db.Database) -> None:
+    """Check that the pending posts are only claimed once."""
+    _enqueue_random_event(database, _at(DATES[0]), TARGETS, silence=True)
+
+    claimed = database.claim_outbox()
+
+    assert len(claimed) == len(TARGETS)
+    assert not database.claim_outbox()
+    assert len(database.get_outbox(db.OUTBOX_IN_FLIGHT)) == len(TARGETS)
+
+
+def test_enqueue_with_unfinished_posts(database: db.Database) -> None:
+    """Check that only the unfinished posts of the date stop the selection."""
+    _enqueue_random_event(database, _at(DATES[0]), TARGETS, silence=True)
+    database.claim_outbox()
+
+    # Still in flight, it's resumed instead of selecting other event:
+    _enqueue_random_event(database, _at(DATES[0]), TARGETS, silence=True)
+    assert not database.get_outbox(db.OUTBOX_PENDING)
+
+    # But it doesn't stop the posts of the next day:
+    _enqueue_random_event(database, _at(DATES[1]), TARGETS, silence=True)
+    pending = database.get_outbox(db.OUTBOX_PENDING)
+    assert [job.date for job in pending] == [DATES[1]] * len(TARGETS)
+
+
+def test_complete_outbox_without_url(database: db.Database) -> None:
+    """Check that the posts of an event without URL are all completed."""
+    _enqueue_random_event(database, _at(DATES[0]), TARGETS, silence=True)
+
+    for job in database.claim_outbox():
+        database.complete_outbox(job, None)
+
+    done = database.get_outbox(db.OUTBOX_DONE)
+    assert len(done) == len(TARGETS)
+    assert len({job.url for job in done}) == len(TARGETS)
+
+
+def test_find_event_post_email_login(
+    fake_lemmy: FakeLemmy,
+    event: Event,
+) -> None:
+    """Check that the posts are found when the login is an email."""
+    session = LemmySession(
+        fake_lemmy.url,
+        "bot@example.org",
+        "password",
+        token_cache="",
+    )
+    session.call(create_event_post, event, community="test")
+
+    found = session.call(find_event_post, event, community="test")
+
+    assert found is not None
+    assert found["post_view"]["creator"]["name"] == "bot"
+
+
+def test_recover_outbox(
+    monkeypatch: pytest.MonkeyPatch,
+    database: db.Database,
+) -> None:
+    """Check that the stale posts in flight are recovered."""
+    with FakeLemmy(["test", "other"]) as fake:
+        targets = [LemmyTarget(fake.url, x.community) for x in TARGETS]
+        _enqueue_random_event(database, _at(DATES[0]), targets, silence=True)
+        jobs = database.claim_outbox()
+        # The first one was posted before the interruption:
+        event = database.get_event_by_id(UUID(str(jobs[0].event_id_uuid)))
+        assert event is not None
+        LemmySession(fake.url, "bot", "password", token_cache="").call(
+            create_event_post,
+            event,
+            community=jobs[0].community,
+        )
+
+        monkeypatch.setattr(
+            "apc_lemmy_bot.cli.db.OUTBOX_STALE",
+            datetime.timedelta(0),
+        )
+        _recover_outbox(database, True, "bot", "password")
+
+    assert [job.url for job in database.get_outbox(db.OUTBOX_DONE)] == [
+        f"{fake.url}/post/1",
+    ]
+    assert [
+        job.community for job in database.get_outbox(db.OUTBOX_PENDING)
+    ] == [
+        jobs[1].community,
+    ]
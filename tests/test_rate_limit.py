@@ -0,0 +1,101 @@
+#    Copyright (C) 2025 Carles Muñoz Gorriz <carlesmu@internautas.org>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as
+#    published by the Free Software Foundation, either version 3 of the
+#    License, or (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Tests of the rate limiter of the requests to the Lemmy instances."""
+
+import stat
+from pathlib import Path
+
+import pytest
+
+from apc_lemmy_bot import apc_lb_conf, lemmy
+from apc_lemmy_bot.event import Event
+from apc_lemmy_bot.lemmy import (
+    LemmySession,
+    RateLimiter,
+    create_event_post,
+    image_exists,
+    upload_img_urls,
+)
+from tests.fakes import FakeLemmy
+
+
+class _CountingLimiter(RateLimiter):
+    """A rate limiter that counts the tokens taken from each bucket."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.tokens: dict[str, int] = {}
+
+    def acquire(self, instance: str, tokens: int = 1) -> None:
+        bucket = self._bucket(instance)
+        self.tokens[bucket] = self.tokens.get(bucket, 0) + tokens
+        super().acquire(instance, tokens)
+
+
+def test_default_file_is_private(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Check that the default file is only readable by the user."""
+    monkeypatch.setattr(apc_lb_conf.lemmy, "rate_limit_file", "")
+    monkeypatch.setenv("XDG_STATE_HOME", str(tmp_path / "state"))
+
+    assert RateLimiter(rate=1.0, burst=1).try_acquire("https://a.example") == 0
+
+    path = tmp_path / "state" / "apc_lemmy_bot" / "rate.sqlite"
+    assert stat.S_IMODE(path.stat().st_mode) == 0o600  # noqa: PLR2004
+    assert stat.S_IMODE(path.parent.stat().st_mode) == 0o700  # noqa: PLR2004
+
+
+def test_bucket_is_shared(tmp_path: Path) -> None:
+    """Check that the limiters with the same file share the buckets."""
+    path = str(tmp_path / "rate.sqlite")
+    first = RateLimiter(path, rate=1.0, burst=2)
+    second = RateLimiter(path, rate=1.0, burst=2)
+
+    assert first.try_acquire("https://a.example", 2) == 0
+    assert second.try_acquire("https://a.example/") > 0
+    assert second.try_acquire("https://b.example") == 0
+
+
+def test_all_the_requests_are_limited(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    fake_lemmy: FakeLemmy,
+    event: Event,
+) -> None:
+    """Check that every request to an instance takes a token."""
+    limiter = _CountingLimiter()
+    monkeypatch.setattr(lemmy, "rate_limiter", limiter)
+    token_cache = str(tmp_path / "tokens.json")
+
+    LemmySession(fake_lemmy.url, "bot", "password", token_cache).call(
+        create_event_post,
+        event,
+        community="test",
+    )
+    # A new session reuses the cached token:
+    lemmy_obj = LemmySession(
+        fake_lemmy.url,
+        "bot",
+        "password",
+        token_cache,
+    ).login()
+    image_url, _ = upload_img_urls(lemmy_obj, b"an image", "image.png")
+    assert image_exists(image_url)
+
+    assert limiter.tokens == {
+        fake_lemmy.url.lower(): sum(fake_lemmy.requests.values()),
+    }
@@ -0,0 +1,171 @@
+#    Copyright (C) 2025 Carles Muñoz Gorriz <carlesmu@internautas.org>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as
+#    published by the Free Software Foundation, either version 3 of the
+#    License, or (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Tests of how the failed posts are retried."""
+
+import datetime
+import email.utils
+
+import pytest
+
+from apc_lemmy_bot.event import Event
+from apc_lemmy_bot.lemmy import (
+    LemmyError,
+    LemmySession,
+    RetryPolicy,
+    create_event_post,
+)
+from tests.fakes import FakeLemmy
+
+ROUTE: str = "POST /api/v3/post"
+
+
+def _post(
+    fake: FakeLemmy,
+    event: Event,
+    policy: RetryPolicy,
+) -> None:
+    """Post an event to the `test` community of a fake instance."""
+    LemmySession(fake.url, "bot", "password", token_cache="").call(
+        create_event_post,
+        event,
+        community="test",
+        retry_policy=policy,
+    )
+
+
+def test_delay_grows_exponentially() -> None:
+    """Check that the delay doubles on each try up to its maximum."""
+    policy = RetryPolicy(base_delay=2.0, max_delay=10.0, jitter=0.0)
+    assert [policy.delay(n) for n in range(1, 6)] == [2, 4, 8, 10, 10]
+
+
+def test_delay_jitter() -> None:
+    """Check that the jitter only shortens the delay up to its fraction."""
+    policy = RetryPolicy(base_delay=4.0, jitter=0.25)
+    delays = [policy.delay(2) for _ in range(100)]
+    assert all(6.0 <= x <= 8.0 for x in delays)  # noqa: PLR2004
+    assert len(set(delays)) > 1
+
+
+def test_server_errors_are_retried(
+    fake_lemmy: FakeLemmy,
+    event: Event,
+) -> None:
+    """Check that the server errors are retried with growing delays."""
+    delays: list[float] = []
+    fake_lemmy.fail_next(ROUTE, status=503, times=2)
+
+    _post(fake_lemmy, event, RetryPolicy(jitter=0.0, sleep=delays.append))
+
+    assert delays == [2.0, 4.0]
+    assert fake_lemmy.requests[ROUTE] == 3  # noqa: PLR2004
+    assert len(fake_lemmy.posts) == 1
+
+
+def test_server_errors_give_up(fake_lemmy: FakeLemmy, event: Event) -> None:
+    """Check that a post fails after its last try."""
+    delays: list[float] = []
+    fake_lemmy.fail_next(ROUTE, status=500, times=3)
+
+    with pytest.raises(LemmyError, match="after 3 tries"):
+        _post(fake_lemmy, event, RetryPolicy(sleep=delays.append))
+
+    assert len(delays) == 2  # noqa: PLR2004
+    assert not fake_lemmy.posts
+
+
+def test_retry_after_seconds(fake_lemmy: FakeLemmy, event: Event) -> None:
+    """Check that a rate limited post waits the seconds of Retry-After."""
+    delays: list[float] = []
+    fake_lemmy.fail_next(
+        ROUTE,
+        status=429,
+        error="too_many_requests",
+        headers={"Retry-After": "7"},
+    )
+
+    _post(fake_lemmy, event, RetryPolicy(jitter=0.0, sleep=delays.append))
+
+    assert delays == [7.0]
+    assert len(fake_lemmy.posts) == 1
+
+
+def test_retry_after_date(fake_lemmy: FakeLemmy, event: Event) -> None:
+    """Check that a rate limited post waits until the date of Retry-After."""
+    delays: list[float] = []
+    retry_date = datetime.datetime.now(tz=datetime.UTC) + datetime.timedelta(
+        seconds=30,
+    )
+    fake_lemmy.fail_next(
+        ROUTE,
+        status=429,
+        error="too_many_requests",
+        headers={"Retry-After": email.utils.format_datetime(retry_date, True)},
+    )
+
+    _post(fake_lemmy, event, RetryPolicy(jitter=0.0, sleep=delays.append))
+
+    assert len(delays) == 1
+    assert 25.0 < delays[0] <= 30.0  # noqa: PLR2004
+    assert len(fake_lemmy.posts) == 1
+
+
+def test_retry_after_is_a_minimum(
+    fake_lemmy: FakeLemmy,
+    event: Event,
+) -> None:
+    """Check that a short Retry-After doesn't shorten the backoff."""
+    delays: list[float] = []
+    fake_lemmy.fail_next(
+        ROUTE,
+        status=429,
+        error="too_many_requests",
+        headers={"Retry-After": "1"},
+    )
+
+    _post(
+        fake_lemmy,
+        event,
+        RetryPolicy(base_delay=5.0, jitter=0.0, sleep=delays.append),
+    )
+
+    assert delays == [5.0]
+
+
+@pytest.mark.parametrize(
+    ("status", "error"),
+    [
+        (400, "invalid_url"),
+        (403, "banned_from_community"),
+        (404, "not_found"),
+        (413, "payload_too_large"),
+    ],
+)
+def test_fatal_errors_are_not_retried(
+    fake_lemmy: FakeLemmy,
+    event: Event,
+    status: int,
+    error: str,
+) -> None:
+    """Check that the errors that will fail again are not retried."""
+    delays: list[float] = []
+    fake_lemmy.fail_next(ROUTE, status=status, error=error)
+
+    with pytest.raises(LemmyError, match=error):
+        _post(fake_lemmy, event, RetryPolicy(sleep=delays.append))
+
+    assert not delays
+    assert fake_lemmy.requests[ROUTE] == 1
+    assert not fake_lemmy.posts
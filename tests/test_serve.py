@@ -0,0 +1,104 @@
+#    Copyright (C) 2025 Carles Muñoz Gorriz <carlesmu@internautas.org>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as
+#    published by the Free Software Foundation, either version 3 of the
+#    License, or (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Tests of the serve daemon."""
+
+import asyncio
+import datetime
+import time
+from collections.abc import Iterator
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from apc_lemmy_bot.cli import serve
+from apc_lemmy_bot.database import Database
+from apc_lemmy_bot.lemmy import LemmyTarget
+
+MADRID: ZoneInfo = ZoneInfo("Europe/Madrid")
+
+
+@pytest.fixture
+def madrid(monkeypatch: pytest.MonkeyPatch) -> Iterator[None]:
+    """Use the local time of Madrid, with daylight saving time."""
+    monkeypatch.setenv("TZ", "Europe/Madrid")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+@pytest.mark.usefixtures("madrid")
+@pytest.mark.parametrize(
+    ("now", "expected"),
+    [
+        # The day before the daylight saving time starts (+01:00 → +02:00):
+        (
+            datetime.datetime(2024, 3, 30, 10, tzinfo=MADRID),
+            datetime.datetime(2024, 3, 31, 9, tzinfo=MADRID),
+        ),
+        # The day before it ends (+02:00 → +01:00):
+        (
+            datetime.datetime(2024, 10, 26, 10, tzinfo=MADRID),
+            datetime.datetime(2024, 10, 27, 9, tzinfo=MADRID),
+        ),
+        (
+            datetime.datetime(2024, 10, 27, 8, tzinfo=MADRID),
+            datetime.datetime(2024, 10, 27, 9, tzinfo=MADRID),
+        ),
+    ],
+)
+def test_next_run(now: datetime.datetime, expected: datetime.datetime) -> None:
+    """Check that the next run keeps its local time when the offset changes."""
+    next_run = serve._next_run(now.astimezone(), [datetime.time(9)])  # noqa: SLF001
+
+    assert next_run == expected
+    assert next_run.utcoffset() == expected.utcoffset()
+
+
+def test_serve_survives_errors(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    """Check that an unexpected error in a cycle doesn't stop the daemon."""
+    cycles: list[datetime.datetime] = []
+
+    def _run_cycle(date: datetime.datetime, *_: object) -> None:
+        cycles.append(date)
+        msg = "unexpected"
+        raise RuntimeError(msg)
+
+    monkeypatch.setattr(serve, "_run_cycle", _run_cycle)
+    database = Database(
+        database_url=f"sqlite:///{tmp_path / 'events.db'}",
+        echo=False,
+    )
+
+    # Run now and stop before the next run, tomorrow at midnight:
+    asyncio.run(
+        serve._serve(  # noqa: SLF001
+            [datetime.time(0)],
+            1,
+            True,
+            database,
+            [LemmyTarget("https://lemmy.example", "test")],
+            None,
+            True,
+        ),
+    )
+
+    assert len(cycles) == 1
+    assert "RuntimeError('unexpected')" in capsys.readouterr().out
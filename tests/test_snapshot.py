@@ -0,0 +1,98 @@
+#    Copyright (C) 2025 Carles Muñoz Gorriz <carlesmu@internautas.org>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as
+#    published by the Free Software Foundation, either version 3 of the
+#    License, or (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Tests of the snapshots of the local database."""
+
+import json
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+import sqlalchemy as sa
+
+from apc_lemmy_bot.database import Database, Events
+from apc_lemmy_bot.snapshot import (
+    SnapshotError,
+    export_snapshot,
+    import_snapshot,
+)
+from tests.fakes.corpus import generate_rows, write_database
+
+EVENTS: int = 10
+
+
+@pytest.fixture
+def snapshot(tmp_path: Path) -> Path:
+    """Return a snapshot of a corpus."""
+    database = Database(
+        database_url=f"sqlite:///{tmp_path / 'source.db'}",
+        echo=False,
+    )
+    write_database(database, generate_rows(EVENTS, seed=0))
+    path = tmp_path / "events.jsonl"
+    assert export_snapshot(database, str(path)) == EVENTS
+    database.engine.dispose()
+    return path
+
+
+@pytest.fixture
+def database(tmp_path: Path) -> Iterator[Database]:
+    """Return an empty database."""
+    database = Database(
+        database_url=f"sqlite:///{tmp_path / 'events.db'}",
+        echo=False,
+    )
+    yield database
+    database.engine.dispose()
+
+
+def _indexes(database: Database) -> set[str | None]:
+    """Return the names of the indexes of the events."""
+    inspector = sa.inspect(database.engine)
+    return {x["name"] for x in inspector.get_indexes(Events.__tablename__)}
+
+
+def test_import_snapshot(database: Database, snapshot: Path) -> None:
+    """Check that the indexes dropped by the import are created again."""
+    indexes = _indexes(database)
+
+    stats = import_snapshot(database, str(snapshot), batch_size=3)
+
+    assert stats.events == EVENTS
+    assert stats.skipped == 0
+    assert _indexes(database) == indexes
+
+
+def test_import_snapshot_fails(
+    database: Database,
+    snapshot: Path,
+    tmp_path: Path,
+) -> None:
+    """Check that the indexes are created again when the import fails."""
+    lines = snapshot.read_text(encoding="utf-8").splitlines()
+    record = json.loads(lines[-1])
+    del record["title"]
+    path = tmp_path / "invalid.jsonl"
+    path.write_text(
+        "\n".join([*lines[:-1], json.dumps(record)]) + "\n",
+        encoding="utf-8",
+    )
+    indexes = _indexes(database)
+
+    with pytest.raises(SnapshotError, match="without 'title'"):
+        import_snapshot(database, str(path), batch_size=3)
+
+    assert _indexes(database) == indexes
+    with database.engine.connect() as conn:
+        assert conn.scalar(sa.select(sa.func.count()).select_from(Events)) == 0
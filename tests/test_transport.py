@@ -0,0 +1,74 @@
+#    Copyright (C) 2025 Carles Muñoz Gorriz <carlesmu@internautas.org>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as
+#    published by the Free Software Foundation, either version 3 of the
+#    License, or (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Tests of the shared HTTP transport."""
+
+import pytest
+import requests
+from pythorhead import Lemmy
+from pythorhead import requestor as pythorhead_requestor
+from typer.testing import CliRunner
+
+from apc_lemmy_bot import transport
+from apc_lemmy_bot.cli.__main__ import app
+from tests.fakes import FakeLemmy
+
+
+def test_restore_pythorhead() -> None:
+    """Check that pythorhead uses requests again after restoring it."""
+    assert pythorhead_requestor.requests is not requests
+
+    transport.restore_pythorhead()
+    transport.restore_pythorhead()
+
+    assert pythorhead_requestor.requests is requests
+    assert all(
+        getattr(func, "__module__", "") == "requests.api"
+        for func in pythorhead_requestor.REQUEST_MAP.values()
+    )
+
+    transport.use_in_pythorhead()
+    transport.use_in_pythorhead()
+
+    assert pythorhead_requestor.requests is not requests
+
+
+def test_keep_alive(fake_lemmy: FakeLemmy) -> None:
+    """Check that the requests of pythorhead reuse the connection."""
+    transport.close()
+
+    for _ in range(3):
+        assert Lemmy(fake_lemmy.url, raise_exceptions=True).nodeinfo
+
+    assert fake_lemmy.requests["GET /nodeinfo/2.0.json"] == 3  # noqa: PLR2004
+    assert len(fake_lemmy.connections) == 1
+
+
+def test_cli_restores_pythorhead(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Check that the CLI only uses the shared session while it runs."""
+    transport.restore_pythorhead()
+    used: list[bool] = []
+    use_in_pythorhead = transport.use_in_pythorhead
+
+    def _use_in_pythorhead() -> None:
+        used.append(True)
+        use_in_pythorhead()
+
+    monkeypatch.setattr(transport, "use_in_pythorhead", _use_in_pythorhead)
+
+    result = CliRunner().invoke(app, ["show", "--help"])
+
+    assert result.exit_code == 0
+    assert used == [True]
+    assert pythorhead_requestor.requests is requests